@@ -0,0 +1,357 @@
+"""
+batch_simulation.py: Defines a vectorized NumPy Monte Carlo backend for Blackjack rounds.
+
+Every table has its own shoe and all the tables of a batch are played in the same vectorized steps,
+using the same round logic as SimulationEngine (check_winner/distribute_prizes passes).
+Cards are coded as the integers used by Deck and Shoe (the index in deck.CARDS).
+
+This module includes the following classes and functions:
+- BatchResult: Aggregated outcomes of a batch of simulated rounds.
+- BatchSimulator: Simulates N independent tables held as a 2-D integer array of shoes.
+- score_hands: Scores hands from their hard totals and numbers of aces, counting soft aces.
+- scalar_reference: Plays the same shoes through SimulationEngine to cross-check the batch results.
+"""
+
+import numpy as np
+
+from constants import RANKS, BOT_NAMES
+from deck import CARDS, Deck
+from engine import OUTCOMES, DealerDecider, Seat, SimulationEngine, ThresholdDecider
+from players import Dealer, BotPlayer
+from rules import CLASSIC, HAND_STRIDE
+
+_WIN, _TWENTY_ONE, _PUSH, _LOSE, _BUST = range(len(OUTCOMES))
+
+CARD_POINTS = np.array([card.points for card in CARDS], dtype=np.int16)
+CARD_ACES = (CARD_POINTS == RANKS['Ace']).astype(np.int16)
+PACK_SIZE = len(CARD_POINTS)
+
+BOT_STANDS_ON = 20
+
+
+def score_hands(totals, aces):
+    """
+    Scores hands from their totals (aces counted as 11) and numbers of aces.
+
+    Every ace is turned from 11 into 1 while the hand is over 21.
+
+    Parameters:
+    -----------
+    - totals (ndarray): Totals of the hands with the aces counted as 11.
+    - aces (ndarray): Numbers of aces in the hands.
+
+    Returns:
+    --------
+    ndarray: The points of the hands.
+    """
+    soft_aces = np.minimum(aces, np.maximum(totals - 12, 0) // 10)
+    return totals - 10 * soft_aces
+
+
+class BatchResult:
+    """
+    Aggregated outcomes of a batch of simulated rounds.
+
+    Attributes:
+    -----------
+    - tables (int): Number of simulated rounds (one per table).
+    - dealer_seat (int): Index of the dealer in the seating order.
+    - counts (ndarray): Array of shape (seats, len(OUTCOMES)) with the number of every outcome per seat.
+    - bets (ndarray): Total bets per seat.
+    - prizes (ndarray): Total prizes per seat (including the returned bets).
+    """
+
+    def __init__(self, seats_count, dealer_seat):
+        self.tables = 0
+        self.dealer_seat = dealer_seat
+        self.counts = np.zeros((seats_count, len(OUTCOMES)), dtype=np.int64)
+        self.bets = np.zeros(seats_count, dtype=np.int64)
+        self.prizes = np.zeros(seats_count, dtype=np.int64)
+
+    def add(self, other):
+        """
+        Adds the outcomes of another batch to this one.
+
+        Returns:
+        --------
+        BatchResult: This result.
+        """
+        self.tables += other.tables
+        self.counts += other.counts
+        self.bets += other.bets
+        self.prizes += other.prizes
+        return self
+
+    @property
+    def net(self):
+        """
+        Returns the net gain per seat.
+        """
+        return self.prizes - self.bets
+
+    @property
+    def edge(self):
+        """
+        Returns the expected net gain per bet unit of every seat.
+        """
+        return self.net / np.maximum(self.bets, 1)
+
+    def outcome_counts(self, seat):
+        """
+        Returns the number of every outcome for a seat.
+
+        Returns:
+        --------
+        dict: Mapping of the outcome name to its count.
+        """
+        return dict(zip(OUTCOMES, self.counts[seat].tolist()))
+
+    def __eq__(self, other):
+        return (self.tables == other.tables and self.dealer_seat == other.dealer_seat
+                and np.array_equal(self.counts, other.counts)
+                and np.array_equal(self.bets, other.bets)
+                and np.array_equal(self.prizes, other.prizes))
+
+    def __repr__(self):
+        return f'BatchResult(tables={self.tables}, net={self.net.tolist()})'
+
+
+class BatchSimulator:
+    """
+    Simulates N independent tables of bot players and a dealer in vectorized steps.
+
+    Attributes:
+    -----------
+    - seats_count (int): Number of seats at every table, the dealer included.
+    - dealer_seat (int): Index of the dealer in the seating order.
+    - bet (int): The bet made by every seat in every round.
+    - packs (int): Number of shuffled 52-card packs in every table's shoe.
+    - chunk_size (int): Maximum number of tables simulated at once.
+    - rng (Generator): NumPy random generator used for the shuffles.
+    - rules (RuleSet): The rules of the tables (the dealer's action and the payouts).
+
+    Methods:
+    --------
+    - shoes: Returns a 2-D array of shuffled shoes, one row per table.
+    - simulate: Plays one round on every row of the given shoes.
+    - run: Plays the requested number of rounds in chunks and aggregates the results.
+    """
+
+    def __init__(self, bots_count, dealer_seat=0, bet=10, packs=2, seed=None, chunk_size=100_000, rules=CLASSIC):
+        """
+        Initializes a new batch simulator.
+
+        Parameters:
+        -----------
+        - bots_count (int): Number of bot players at every table.
+        - dealer_seat (int): Index of the dealer in the seating order. Default is 0.
+        - bet (int): The bet made by every seat. Default is 10.
+        - packs (int): Number of 52-card packs in every shoe. Default is 2 so a round never runs out of cards.
+        - seed (int): Seed of the random generator. Default is None.
+        - chunk_size (int): Maximum number of tables simulated at once. Default is 100000.
+        - rules (RuleSet): The rules of the tables. Default is CLASSIC. The shoes keep their own packs.
+        """
+        if not 0 <= dealer_seat <= bots_count:
+            raise ValueError('The dealer seat is out of the table')
+
+        self.seats_count = bots_count + 1
+        self.dealer_seat = dealer_seat
+        self.bet = bet
+        self.packs = packs
+        self.chunk_size = chunk_size
+        self.rng = np.random.default_rng(seed)
+        self.rules = rules
+
+        # hit table of every seat, indexed like RuleSet.dealer_hits (soft * HAND_STRIDE + points)
+        self.hits = np.tile(np.arange(2 * HAND_STRIDE) % HAND_STRIDE < BOT_STANDS_ON, (self.seats_count, 1))
+        self.hits[dealer_seat] = np.frombuffer(rules.dealer_hits, dtype=np.uint8).astype(bool)
+
+    def shoes(self, tables):
+        """
+        Returns shuffled shoes for the tables. Every pack in a shoe is shuffled separately.
+
+        Parameters:
+        -----------
+        - tables (int): Number of tables.
+
+        Returns:
+        --------
+        ndarray: Array of shape (tables, packs * 52) with the card codes, the first card dealt first.
+        """
+        packs = np.broadcast_to(np.arange(PACK_SIZE, dtype=np.int8), (tables * self.packs, PACK_SIZE))
+        return self.rng.permuted(packs, axis=1).reshape(tables, self.packs * PACK_SIZE)
+
+    def simulate(self, shoes):
+        """
+        Plays one round on every table with the same logic as SimulationEngine.play_round.
+
+        Parameters:
+        -----------
+        - shoes (ndarray): Array of shape (tables, cards) with the card codes, the first card dealt first.
+
+        Returns:
+        --------
+        BatchResult: The aggregated outcomes of the rounds.
+        """
+        tables = shoes.shape[0]
+        seats = self.seats_count
+        dealer = self.dealer_seat
+        rows = np.arange(tables)
+        bet = self.bet
+
+        points_of = CARD_POINTS[shoes]
+        aces_of = CARD_ACES[shoes]
+
+        # initial deal: two cards to every seat in the seating order
+        totals = points_of[:, 0:2 * seats:2] + points_of[:, 1:2 * seats:2]
+        aces = aces_of[:, 0:2 * seats:2] + aces_of[:, 1:2 * seats:2]
+        position = np.full(tables, 2 * seats)
+
+        is_dealer = np.zeros(seats, dtype=bool)
+        is_dealer[dealer] = True
+        active = np.ones((tables, seats), dtype=bool)
+        live = np.ones(tables, dtype=bool)
+        outcome = np.full((tables, seats), _LOSE, dtype=np.int8)
+        prize = np.zeros((tables, seats), dtype=np.int64)
+        payouts = self.rules.payouts
+        win_prize = round(payouts[OUTCOMES[_WIN]] * bet)
+        twenty_one_prize = round(payouts[OUTCOMES[_TWENTY_ONE]] * bet)
+        push_prize = round(payouts[OUTCOMES[_PUSH]] * bet)
+
+        while live.any():
+            points = score_hands(totals, aces)
+
+            # check_winner: busted players leave the game
+            busted = active & (points > 21) & ~is_dealer & live[:, None]
+            outcome[busted] = _BUST
+            active &= ~busted
+
+            dealer_busted = live & (points[:, dealer] > 21)
+            outcome[dealer_busted, dealer] = _BUST
+            winners = active & dealer_busted[:, None] & ~is_dealer
+            outcome[winners] = _WIN
+            prize[winners] = win_prize
+            live &= ~dealer_busted
+
+            winners21 = active & (points == 21) & live[:, None]
+            has21 = winners21.any(axis=1)
+            outcome[winners21] = _TWENTY_ONE
+            prize[winners21] = twenty_one_prize
+            live &= ~has21
+
+            only_winner = live & (active.sum(axis=1) == 1)
+            winners = active & only_winner[:, None]
+            outcome[winners] = _WIN
+            prize[winners] = win_prize
+            live &= ~only_winner
+
+            # asking_card: every seat in the seating order decides and takes its card
+            soft = (totals - points) // 10 < aces
+            actions = soft * HAND_STRIDE + np.minimum(points, HAND_STRIDE - 1)
+            any_hit = np.zeros(tables, dtype=bool)
+            for seat in range(seats):
+                hit = live & active[:, seat] & self.hits[seat, actions[:, seat]]
+                hit_rows = rows[hit]
+                cards = position[hit_rows]
+                totals[hit_rows, seat] += points_of[hit_rows, cards]
+                aces[hit_rows, seat] += aces_of[hit_rows, cards]
+                position[hit_rows] += 1
+                any_hit |= hit
+
+            # distribute_prizes: nobody wants one more card
+            finished = live & ~any_hit
+            dealer_points = points[:, dealer][:, None]
+            settled = active & finished[:, None]
+            winners = settled & (points < 21) & (points > dealer_points)
+            outcome[winners] = _WIN
+            prize[winners] = win_prize
+            pushes = settled & ~winners & (points == dealer_points) & ~is_dealer
+            outcome[pushes] = _PUSH
+            prize[pushes] = push_prize
+            live &= ~finished
+
+        result = BatchResult(seats, dealer)
+        result.tables = tables
+        for code in range(len(OUTCOMES)):
+            result.counts[:, code] = (outcome == code).sum(axis=0)
+        result.bets[:] = bet * tables
+        result.prizes[:] = prize.sum(axis=0)
+        return result
+
+    def run(self, rounds_count):
+        """
+        Plays the requested number of rounds in chunks of at most chunk_size tables.
+
+        Parameters:
+        -----------
+        - rounds_count (int): Number of rounds to play.
+
+        Returns:
+        --------
+        BatchResult: The aggregated outcomes of all the rounds.
+        """
+        result = BatchResult(self.seats_count, self.dealer_seat)
+        while result.tables < rounds_count:
+            tables = min(self.chunk_size, rounds_count - result.tables)
+            result.add(self.simulate(self.shoes(tables)))
+        return result
+
+
+class _ShoeRowDeck(Deck):
+    """
+    Deck for SimulationEngine that deals the packs of a shoe row one by one.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.packs = []
+
+    def load(self, row):
+        self.packs = [row[start:start + PACK_SIZE] for start in range(0, len(row), PACK_SIZE)]
+
+    def reshuffle(self):
+        if self.packs:
+            self.deck = bytearray(reversed(self.packs.pop(0).tolist()))
+        else:
+            super().reshuffle()
+
+
+def scalar_reference(simulator, shoes):
+    """
+    Plays the same shoes through SimulationEngine one table at a time.
+
+    The result is equal to simulator.simulate(shoes) and is meant to cross-check the vectorized backend.
+
+    Parameters:
+    -----------
+    - simulator (BatchSimulator): The simulator whose table setup is reproduced.
+    - shoes (ndarray): Array of shape (tables, cards) with the card codes, the first card dealt first.
+
+    Returns:
+    --------
+    BatchResult: The aggregated outcomes of the rounds.
+    """
+    seats = []
+    bot_names = list(BOT_NAMES)
+    for index in range(simulator.seats_count):
+        if index == simulator.dealer_seat:
+            seats.append(Seat(Dealer(rules=simulator.rules), DealerDecider(simulator.rules, bet=simulator.bet)))
+        else:
+            seats.append(Seat(BotPlayer(names=bot_names), ThresholdDecider(BOT_STANDS_ON, bet=simulator.bet)))
+    for seat in seats:
+        seat.player.player_money = simulator.bet * (len(shoes) + 1)
+
+    deck = _ShoeRowDeck()
+    engine = SimulationEngine(seats, game_deck=deck, rules=simulator.rules)
+
+    result = BatchResult(simulator.seats_count, simulator.dealer_seat)
+    outcome_codes = {name: code for code, name in enumerate(OUTCOMES)}
+    for row in shoes:
+        deck.load(row)
+        round_result = engine.play_round()
+        for index, seat_result in enumerate(round_result.seats):
+            result.counts[index, outcome_codes[seat_result.outcome]] += 1
+            result.bets[index] += seat_result.bet
+            result.prizes[index] += seat_result.prize
+        result.tables += 1
+    return result
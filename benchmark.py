@@ -0,0 +1,259 @@
+"""
+benchmark.py: Measures the hot paths of the game and compares them with a stored baseline.
+
+Every benchmark is timed with timeit: the number of calls is calibrated to about 0.5 seconds, the timing
+is repeated and the fastest repeat is kept (the least disturbed by the rest of the machine).
+The results are written to a JSON file and compared with a baseline file; a benchmark slower than
+the baseline by more than the threshold is timed again (a few retries, keeping the fastest time), and if it's
+still slower it's reported as a regression and the script exits with status 1.
+
+Benchmarks:
+- deck_init_shuffle: Deck() construction with its shuffle.
+- deck_get_card: Deck.get_card.
+- shoe_deal_eager, shoe_deal_lazy, shoe_deal_pooled: A 6-deck Shoe dealt to its cut card and reshuffled
+  (per dealt card), shuffled up front, incrementally while dealing, or ahead of time by a ShoePool.
+- count_player_points: AbstractPlayer.count_player_points.
+- player_hand_cards, dealer_hand_cards: Rendering of a hand (the memoized path), and
+  player_hand_cards_cold: rendering with an empty cache.
+- engine_round_<N>_bots: Headless rounds of SimulationEngine with N BotPlayers (per round).
+
+This module includes the following classes and functions:
+- BENCHMARKS: The benchmarks by name.
+- run_benchmarks: Runs the benchmarks and returns their results.
+- compare: Compares results with a baseline.
+- main: Runs the suite from the command line.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+
+from constants import BOT_PLAYERS_LIMITS
+from deck import CARDS, Deck, Shoe, player_hand_cards, dealer_hand_cards, _hand_rows
+from engine import SimulationEngine
+from players import BotPlayer
+from shoe_pool import ShoePool
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+RESULTS_VERSION = 1
+
+
+def _deck_init_shuffle():
+    rng = random.Random(0)
+    return lambda: Deck(rng), 1
+
+
+def _deck_get_card():
+    deck = Deck(random.Random(0))
+    codes = bytes(deck.deck)
+
+    def deal_all():
+        deck.deck[:] = codes
+        for _ in range(len(codes)):
+            deck.get_card()
+    return deal_all, len(codes)
+
+
+def _shoe_deal(lazy=False, pooled=False):
+    def setup():
+        pool = ShoePool(6, seed=0) if pooled else None
+        shoe = Shoe(6, 0.75, random.Random(0), lazy, pool)
+
+        def deal_to_cut_card():
+            while not shoe.cut_card_reached():
+                shoe.get_card()
+            shoe.prepare_round()
+        if pool is None:
+            return deal_to_cut_card, shoe.cut_card
+        return deal_to_cut_card, shoe.cut_card, pool.close
+    return setup
+
+
+def _count_player_points():
+    bot = BotPlayer(random.Random(0), ['Bench'])
+    for code in (0, 17, 30):
+        bot.add_card(CARDS[code])
+    return bot.count_player_points, 1
+
+
+def _hands(count=64, size=3):
+    rng = random.Random(0)
+    return [[CARDS[code] for code in rng.sample(range(len(CARDS)), size)] for _ in range(count)]
+
+
+def _render(renderer, cold=False):
+    def setup():
+        hands = _hands()
+
+        def render_all():
+            if cold:
+                _hand_rows.cache_clear()
+            for hand in hands:
+                renderer(*hand)
+        return render_all, len(hands)
+    return setup
+
+
+def _engine_rounds(bots_count, rounds=100):
+    def setup():
+        engine = SimulationEngine.with_bots(bots_count, rng=random.Random(0))
+
+        def play():
+            for _ in engine.play(rounds):
+                pass
+        return play, rounds
+    return setup
+
+
+# name -> setup function returning (the timed callable, number of operations per call[, cleanup callable])
+BENCHMARKS = {
+    'deck_init_shuffle': _deck_init_shuffle,
+    'deck_get_card': _deck_get_card,
+    'shoe_deal_eager': _shoe_deal(lazy=False),
+    'shoe_deal_lazy': _shoe_deal(lazy=True),
+    'shoe_deal_pooled': _shoe_deal(pooled=True),
+    'count_player_points': _count_player_points,
+    'player_hand_cards': _render(player_hand_cards),
+    'player_hand_cards_cold': _render(player_hand_cards, cold=True),
+    'dealer_hand_cards': _render(dealer_hand_cards),
+}
+for _bots_count in range(BOT_PLAYERS_LIMITS.get('min'), BOT_PLAYERS_LIMITS.get('max') + 1):
+    BENCHMARKS[f'engine_round_{_bots_count}_bots'] = _engine_rounds(_bots_count)
+
+
+def run_benchmarks(names=None, repeat=7, min_time=0.5):
+    """
+    Runs the benchmarks and returns their results.
+
+    Parameters:
+    -----------
+    - names (list): Names of the benchmarks to run. Default is all of them.
+    - repeat (int): Number of timed repeats; the fastest one is kept. Default is 7.
+    - min_time (float): Approximate duration of a repeat in seconds. Default is 0.5.
+
+    Returns:
+    --------
+    dict: The results, with the time per operation (ns_per_op) and operations per second of every benchmark.
+    """
+    results = {}
+    for name in names or BENCHMARKS:
+        function, operations, *cleanup = BENCHMARKS[name]()
+        try:
+            timer = timeit.Timer(function)
+            number, elapsed = timer.autorange()
+            number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+            best = min(timer.repeat(repeat=repeat, number=number)) / (number * operations)
+        finally:
+            for close in cleanup:
+                close()
+        results[name] = {'ns_per_op': best * 1e9, 'ops_per_sec': 1 / best}
+    return {'version': RESULTS_VERSION, 'python': platform.python_version(),
+            'platform': platform.platform(), 'results': results}
+
+
+def compare(results, baseline, threshold=0.5):
+    """
+    Compares results with a baseline.
+
+    Parameters:
+    -----------
+    - results (dict): Results of run_benchmarks.
+    - baseline (dict): Results of an earlier run.
+    - threshold (float): Relative slowdown reported as a regression. Default is 0.5 (50%), above the noise
+      of a shared machine.
+
+    Returns:
+    --------
+    list: Tuples of (name, baseline ns per op, current ns per op, relative change, status) where the status
+    is 'regression', 'improvement', 'unchanged' or 'new'.
+    """
+    rows = []
+    for name, result in results['results'].items():
+        current = result['ns_per_op']
+        old = baseline.get('results', {}).get(name)
+        if old is None:
+            rows.append((name, None, current, None, 'new'))
+            continue
+        change = current / old['ns_per_op'] - 1
+        if change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        rows.append((name, old['ns_per_op'], current, change, status))
+    return rows
+
+
+def _retry_regressions(results, baseline, threshold, retries, repeat, min_time):
+    """
+    Times the regressed benchmarks again and keeps their fastest time, so a disturbed run isn't reported.
+    """
+    rows = compare(results, baseline, threshold)
+    for _ in range(retries):
+        regressed = [name for name, *_, status in rows if status == 'regression']
+        if not regressed:
+            break
+        for name, result in run_benchmarks(regressed, repeat, min_time)['results'].items():
+            if result['ns_per_op'] < results['results'][name]['ns_per_op']:
+                results['results'][name] = result
+        rows = compare(results, baseline, threshold)
+    return rows
+
+
+def _print_report(rows):
+    print(f'{"benchmark":<26}{"baseline":>14}{"current":>14}{"change":>10}  status')
+    for name, old, current, change, status in rows:
+        old_text = '-' if old is None else f'{old:,.0f} ns'
+        change_text = '-' if change is None else f'{change:+.1%}'
+        print(f'{name:<26}{old_text:>14}{current:>11,.0f} ns{change_text:>10}  {status.upper() if status == "regression" else status}')
+
+
+def main(arguments=None):
+    """
+    Runs the suite from the command line.
+
+    Returns:
+    --------
+    int: 1 if a benchmark regressed against the baseline, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks of the Blackjack hot paths')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all)')
+    parser.add_argument('--output', default='benchmark_results.json', help='file for the results')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='baseline to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.5, help='relative slowdown reported as a regression')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--min-time', type=float, default=0.5, help='approximate duration of a repeat in seconds')
+    parser.add_argument('--retries', type=int, default=2, help='times a regressed benchmark is timed again')
+    options = parser.parse_args(arguments)
+
+    unknown = [name for name in options.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f'unknown benchmarks: {", ".join(unknown)} (choose from {", ".join(BENCHMARKS)})')
+
+    baseline = {}
+    if os.path.exists(options.baseline):
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    results = run_benchmarks(options.names, options.repeat, options.min_time)
+    retries = 0 if options.save_baseline else options.retries
+    rows = _retry_regressions(results, baseline, options.threshold, retries, options.repeat, options.min_time)
+    with open(options.output, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    _print_report(rows)
+
+    if options.save_baseline:
+        with open(options.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f'The baseline was saved to {options.baseline}')
+        return 0
+    return int(any(status == 'regression' for *_, status in rows))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,356 @@
+"""
+checkpoint.py: Saves the state of a Game at round boundaries and resumes it after a restart.
+
+A checkpoint file starts with a short header followed by length-prefixed binary records:
+- a table record: the name of the rule set, the seating order, the number of bots, the free bot names and
+  the number of played rounds,
+- a seat record per seat: the name, money, bet, hidden_card flag and hand cards,
+- a deck record: the order of the cards (and the position of a Shoe and whether it shuffles lazily), or
+  a position record when only the position of the Shoe moved,
+- a generator record: the state of the game's random.Random, if the game has one (see replay.create_game),
+  or a generator position record: the number of Mersenne Twister blocks drawn since the generator record,
+  the index in the current block and the next gaussian,
+- an end record closing a complete checkpoint.
+
+Every record is only written when it differs from the last written one, so a checkpoint is usually
+a few seats, the deck and the generator position. The 2.5 KB generator record is only written when the file
+is rewritten (or the generator was reseeded); loading advances a copy of the generator by the recorded
+number of blocks, one twist each. A crash while writing leaves an incomplete checkpoint after the last end record,
+which is ignored when the file is loaded. The file is rewritten with a single full checkpoint from time to
+time, so loading it stays fast.
+
+Seats are numbered: 0 is the player, 1 is the dealer and the bots follow in the order of Game.bot_players.
+
+This module includes the following classes and functions:
+- Checkpointer: Writes incremental checkpoints of a Game to a file.
+- load_checkpoint: Restores the Game of the last complete checkpoint in a file.
+"""
+
+import os
+import random
+from struct import Struct
+
+from deck import CARDS, Deck, Shoe
+from game import Game
+from players import BotPlayer, Dealer
+from rules import RULE_SETS
+
+MAGIC = b'BJCP'
+VERSION = 4
+
+TABLE_RECORD = 1
+SEAT_RECORD = 2
+DECK_RECORD = 3
+POSITION_RECORD = 4
+GENERATOR_RECORD = 5
+END_RECORD = 6
+GENERATOR_POSITION_RECORD = 7
+
+_HEADER = Struct('<4sB')
+_LENGTH = Struct('<H')
+# kind, played rounds, seats in all_players, bots, rules name length; followed by the seat numbers,
+# the rules name and the free bot names
+_TABLE = Struct('<BIBBB')
+# kind, seat number, money, bet, flags, name length, cards count; followed by the name and the card codes
+_SEAT = Struct('<BBddBBB')
+_HIDDEN_CARD, _FLOAT_MONEY, _FLOAT_BET = 1, 2, 4
+# kind, decks count (0 for a single Deck), penetration, position, reshuffles, flags; followed by the card codes
+_DECK = Struct('<BBdHIB')
+_LAZY_SHOE = 1
+_DECK_POSITION = slice(Struct('<BBd').size, Struct('<BBdH').size)
+_GENERATOR = Struct('<BB625Id')  # kind, version, Mersenne Twister state, next gaussian (NaN for None)
+# kind, blocks drawn since the generator record, index in the block, next gaussian (NaN for None)
+_GENERATOR_POSITION = Struct('<BIHd')
+_MT_WORDS = 624
+_MAX_BLOCKS = 64  # blocks searched for the current state before writing a generator record again
+_END = Struct('<BI')
+
+
+def _seat_players(game):
+    return [game.player, game.game_dealer] + game.bot_players
+
+
+def _encode_table(game, seats):
+    numbers = {id(player): number for number, player in enumerate(seats)}
+    if RULE_SETS.get(game.rules.name) is not game.rules:
+        raise ValueError(f'{game.rules!r} is not in rules.RULE_SETS, the checkpoint couldn\'t be loaded')
+    rules_name = game.rules.name.encode()
+    return (_TABLE.pack(TABLE_RECORD, game.rounds_played, len(game.all_players), len(game.bot_players),
+                        len(rules_name))
+            + bytes(numbers[id(player)] for player in game.all_players)
+            + rules_name + '\n'.join(game.bot_names).encode())
+
+
+def _encode_seat(number, player):
+    name = player.name.encode()
+    flags = (player.hidden_card * _HIDDEN_CARD | isinstance(player.player_money, float) * _FLOAT_MONEY
+             | isinstance(player.player_bet, float) * _FLOAT_BET)
+    return (_SEAT.pack(SEAT_RECORD, number, player.player_money, player.player_bet, flags,
+                       len(name), len(player.player_cards))
+            + name + bytes([card.code for card in player.player_cards]))
+
+
+def _encode_deck(game_deck):
+    if hasattr(game_deck, 'position'):
+        return _DECK.pack(DECK_RECORD, game_deck.decks_count, game_deck.penetration, game_deck.position,
+                          game_deck.reshuffles, game_deck.lazy * _LAZY_SHOE) + bytes(game_deck.cards)
+    return _DECK.pack(DECK_RECORD, 0, 0.0, 0, 0, 0) + bytes(game_deck.deck)
+
+
+def _encode_generator(rng):
+    version, state, gauss_next = rng.getstate()
+    return _GENERATOR.pack(GENERATOR_RECORD, version, *state, float('nan') if gauss_next is None else gauss_next)
+
+
+def _next_block(version, words):
+    """
+    Returns the words of a Mersenne Twister state after its next twist.
+    """
+    generator = random.Random()
+    generator.setstate((version, tuple(words) + (_MT_WORDS,), None))
+    generator.getrandbits(32)
+    return generator.getstate()[1][:_MT_WORDS]
+
+
+class Checkpointer:
+    """
+    Writes incremental checkpoints of a Game to a file. Pass it to Game.start_game or Game.resume_game
+    to save the game before every round.
+
+    Attributes:
+    -----------
+    - path (str): The path of the checkpoint file.
+    - compact_every (int): Number of checkpoints after which the file is rewritten with a full checkpoint.
+    - checkpoints (int): Number of checkpoints saved by the checkpointer.
+    - bytes_written (int): Number of bytes written by the checkpointer.
+
+    Methods:
+    --------
+    - save: Saves a checkpoint of the game.
+    - close: Closes the file.
+    """
+
+    def __init__(self, path, compact_every=1000):
+        """
+        Initializes a new checkpointer. The first checkpoint rewrites the file with a full checkpoint.
+
+        Parameters:
+        -----------
+        - path (str): The path of the checkpoint file.
+        - compact_every (int): Number of checkpoints after which the file is rewritten. Default is 1000.
+        """
+        self.path = path
+        self.compact_every = compact_every
+        self.checkpoints = 0
+        self.bytes_written = 0
+        self.file = None
+        self.written = {}  # record key -> last written record
+        self.generator_words = None  # the Mersenne Twister block of the last generator (position) record
+        self.generator_blocks = 0  # blocks drawn between the last generator record and generator_words
+
+    def _write(self, record):
+        self.file.write(_LENGTH.pack(len(record)) + record)
+        self.bytes_written += _LENGTH.size + len(record)
+
+    def save(self, game):
+        """
+        Saves a checkpoint of the game, writing only the records that changed since the last checkpoint.
+
+        Parameters:
+        -----------
+        - game (Game): The game, between two rounds.
+        """
+        seats = _seat_players(game)
+        records = {'table': _encode_table(game, seats), 'deck': _encode_deck(game.game_deck)}
+        for number, player in enumerate(seats):
+            records[number] = _encode_seat(number, player)
+        rewrite = self.file is None or self.checkpoints % self.compact_every == 0
+        if isinstance(game.rng, random.Random):
+            records['generator'] = self._encode_generator(game.rng, rewrite)
+
+        if rewrite:
+            self._rewrite(records)
+        else:
+            for key, record in records.items():
+                last = self.written.get(key)
+                if record == last:
+                    continue
+                if key == 'deck' and last is not None and record[:_DECK_POSITION.start] == \
+                        last[:_DECK_POSITION.start] and record[_DECK_POSITION.stop:] == last[_DECK_POSITION.stop:]:
+                    # the same cards in the same order, only the position of the Shoe moved
+                    self._write(bytes([POSITION_RECORD]) + record[_DECK_POSITION])
+                else:
+                    self._write(record)
+                self.written[key] = record
+            self._write(_END.pack(END_RECORD, self.checkpoints + 1))
+            self.file.flush()
+        self.checkpoints += 1
+
+    def _encode_generator(self, rng, full):
+        """
+        Returns a generator position record, or a generator record if full is True or the current block of
+        the generator isn't found within _MAX_BLOCKS twists of the last one (e.g. the generator was reseeded).
+        """
+        version, state, gauss_next = rng.getstate()
+        words = state[:_MT_WORDS]
+        if not full and self.generator_words is not None:
+            known, blocks = self.generator_words, self.generator_blocks
+            while known != words and blocks < self.generator_blocks + _MAX_BLOCKS:
+                known = _next_block(version, known)
+                blocks += 1
+            if known == words:
+                self.generator_words, self.generator_blocks = words, blocks
+                return _GENERATOR_POSITION.pack(GENERATOR_POSITION_RECORD, blocks, state[_MT_WORDS],
+                                                float('nan') if gauss_next is None else gauss_next)
+        self.generator_words, self.generator_blocks = words, 0
+        return _encode_generator(rng)
+
+    def _rewrite(self, records):
+        """
+        Replaces the file with a single full checkpoint.
+        """
+        if self.file is not None:
+            self.file.close()
+        temporary_path = f'{self.path}.tmp'
+        self.file = open(temporary_path, 'wb')
+        self.file.write(_HEADER.pack(MAGIC, VERSION))
+        for record in records.values():
+            self._write(record)
+        self.written = records
+        self._write(_END.pack(END_RECORD, self.checkpoints + 1))
+        self.file.close()
+        os.replace(temporary_path, self.path)
+        self.file = open(self.path, 'ab')
+
+    def close(self):
+        """
+        Closes the file.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def _read_checkpoint(path):
+    """
+    Returns the records of the last complete checkpoint in a file.
+
+    Returns:
+    --------
+    dict: Mapping of the record key to the payload.
+    """
+    with open(path, 'rb') as checkpoint_file:
+        content = checkpoint_file.read()
+    if content[:_HEADER.size] != _HEADER.pack(MAGIC, VERSION):
+        raise ValueError(f'{path} is not a checkpoint of version {VERSION}')
+
+    current = {}
+    complete = None
+    offset = _HEADER.size
+    while offset + _LENGTH.size <= len(content):
+        (length,) = _LENGTH.unpack_from(content, offset)
+        offset += _LENGTH.size
+        record = content[offset:offset + length]
+        offset += length
+        if len(record) < length:
+            break
+        kind = record[0]
+        if kind == TABLE_RECORD:
+            current['table'] = record
+        elif kind == SEAT_RECORD:
+            current[record[1]] = record
+        elif kind == DECK_RECORD:
+            current['deck'] = record
+        elif kind == POSITION_RECORD:
+            deck = current['deck']
+            current['deck'] = deck[:_DECK_POSITION.start] + record[1:] + deck[_DECK_POSITION.stop:]
+        elif kind == GENERATOR_RECORD:
+            current['generator'] = record
+            current.pop('generator_position', None)
+        elif kind == GENERATOR_POSITION_RECORD:
+            current['generator_position'] = record
+        elif kind == END_RECORD:
+            complete = dict(current)
+    if complete is None:
+        raise ValueError(f'{path} has no complete checkpoint')
+    return complete
+
+
+def _restore_cards(player, codes):
+    player.clear_cards()
+    for code in codes:
+        player.add_card(CARDS[code])
+
+
+def load_checkpoint(path, player=None, pacer=None, listener=None):
+    """
+    Restores the Game of the last complete checkpoint in a file. Continue it with Game.resume_game.
+
+    Parameters:
+    -----------
+    - path (str): The path of the checkpoint file.
+    - player (Player): The human player object to restore into. Default is a new Player.
+    - pacer, listener: Passed to Game.
+
+    Returns:
+    --------
+    Game: The restored game.
+    """
+    records = _read_checkpoint(path)
+    table = records['table']
+    rounds_played, all_count, bots_count, name_length = _TABLE.unpack_from(table)[1:]
+    order = table[_TABLE.size:_TABLE.size + all_count]
+    rules_name = table[_TABLE.size + all_count:_TABLE.size + all_count + name_length].decode()
+    if rules_name not in RULE_SETS:
+        raise ValueError(f'{path} was saved with the unknown rule set {rules_name!r}')
+    rules = RULE_SETS[rules_name]
+    generator = records.get('generator')
+    rng = random.Random() if generator is not None else random
+
+    decks_count, penetration, position, reshuffles, flags = _DECK.unpack_from(records['deck'])[1:]
+    codes = bytearray(records['deck'][_DECK.size:])
+    if decks_count:
+        game_deck = Shoe(decks_count, penetration, rng, bool(flags & _LAZY_SHOE))
+        game_deck.cards = codes
+        game_deck.position = position
+        game_deck.reshuffles = reshuffles
+    else:
+        game_deck = Deck(rng)
+        game_deck.deck = codes
+
+    game = Game(game_deck, pacer, player, listener, rng, rules)
+    bot_names = table[_TABLE.size + all_count + name_length:].decode()
+    game.bot_names = [name for name in bot_names.split('\n') if name]
+    game.rounds_played = rounds_played
+
+    game.game_dealer = Dealer(rng=rng, rules=rules)
+    game.bot_players = []
+    seats = [game.player, game.game_dealer]
+    for number in range(2, 2 + bots_count):
+        name_length = _SEAT.unpack_from(records[number])[5]
+        name = records[number][_SEAT.size:_SEAT.size + name_length].decode()
+        bot = BotPlayer(rng, [name])
+        bot.apply_rules(rules)
+        game.bot_players.append(bot)
+        seats.append(bot)
+
+    for number, seat in enumerate(seats):
+        record = records[number]
+        money, bet, flags, name_length, cards_count = _SEAT.unpack_from(record)[2:]
+        seat.name = record[_SEAT.size:_SEAT.size + name_length].decode()
+        seat.player_money = money if flags & _FLOAT_MONEY else int(money)
+        seat.player_bet = bet if flags & _FLOAT_BET else int(bet)
+        seat.hidden_card = bool(flags & _HIDDEN_CARD)
+        _restore_cards(seat, record[_SEAT.size + name_length:])
+    game.all_players = [seats[number] for number in order]
+
+    if generator is not None:
+        values = _GENERATOR.unpack(generator)
+        version, words, index, gauss_next = values[1], values[2:2 + _MT_WORDS], values[-2], values[-1]
+        position = records.get('generator_position')
+        if position is not None:
+            blocks, index, gauss_next = _GENERATOR_POSITION.unpack(position)[1:]
+            for _ in range(blocks):
+                words = _next_block(version, words)
+        rng.setstate((version, tuple(words) + (index,), None if gauss_next != gauss_next else gauss_next))
+    return game
@@ -0,0 +1,218 @@
+"""
+counting.py: Defines card counting systems and a counter that follows the cards dealt from a Deck or Shoe.
+
+The counter is registered as an observer of the deck, so the running count, the true count and the number of
+remaining cards of every rank are updated in O(1) for every dealt card, without rescanning the deck.
+
+This module includes the following classes and functions:
+- CountingSystem: Tags of a card counting system and its initial running count.
+- HI_LO, KO, OMEGA_II: The supported counting systems.
+- CardCounter: Keeps the counts of a Deck or Shoe up to date.
+- bet_from_true_count: Sizes a bet from the true count.
+- CountingDecider: Decider for the headless engine that sizes its bets from the true count.
+"""
+
+from constants import RANKS, BET_LIMITS
+from engine import Decider, ThresholdDecider
+
+RANK_NAMES = tuple(RANKS)
+PACK_SIZE = 52
+
+
+class CountingSystem:
+    """
+    Tags of a card counting system.
+
+    Attributes:
+    -----------
+    - name (str): The name of the system.
+    - tags (tuple): The tag of every rank, in the order of constants.RANKS (the rank index of a card code).
+    - balanced (bool): True if the tags of a full pack sum to zero.
+    """
+
+    def __init__(self, name, tags):
+        """
+        Initializes a new counting system.
+
+        Parameters:
+        -----------
+        - name (str): The name of the system.
+        - tags (dict): Mapping of the rank name to its tag.
+        """
+        self.name = name
+        self.tags = tuple(tags[rank] for rank in RANK_NAMES)
+        self.balanced = sum(self.tags) == 0
+
+    def initial_count(self, decks_count):
+        """
+        Returns the initial running count for a shoe of decks_count decks.
+
+        Unbalanced systems (like KO) start below zero so that the count ends at +4 after the whole shoe.
+        """
+        if self.balanced:
+            return 0
+        return 4 - 4 * sum(self.tags) * decks_count
+
+    def __repr__(self):
+        return f'CountingSystem({self.name!r})'
+
+
+HI_LO = CountingSystem('Hi-Lo', {'2': 1, '3': 1, '4': 1, '5': 1, '6': 1, '7': 0, '8': 0, '9': 0,
+                                  '10': -1, 'Jack': -1, 'Queen': -1, 'King': -1, 'Ace': -1})
+KO = CountingSystem('KO', {'2': 1, '3': 1, '4': 1, '5': 1, '6': 1, '7': 1, '8': 0, '9': 0,
+                           '10': -1, 'Jack': -1, 'Queen': -1, 'King': -1, 'Ace': -1})
+OMEGA_II = CountingSystem('Omega II', {'2': 1, '3': 1, '4': 2, '5': 2, '6': 2, '7': 1, '8': 0, '9': -1,
+                                       '10': -2, 'Jack': -2, 'Queen': -2, 'King': -2, 'Ace': 0})
+
+
+class CardCounter:
+    """
+    Keeps the counts of a Deck or Shoe up to date as an observer of its dealt cards and reshuffles.
+
+    Attributes:
+    -----------
+    - system (CountingSystem): The counting system.
+    - decks_count (int): Number of decks in the observed Deck or Shoe.
+    - running_count (int): The running count.
+    - remaining (list): Number of remaining cards of every rank, in the order of constants.RANKS.
+    - cards_remaining (int): Number of cards remaining in the deck.
+
+    Methods:
+    --------
+    - card_dealt: Updates the counts with a dealt card.
+    - shuffled: Resets the counts after a reshuffle.
+    - true_count: Returns the running count per remaining deck.
+    - composition: Returns the remaining cards by point value, as used by expected_value.
+    """
+
+    def __init__(self, game_deck, system=HI_LO):
+        """
+        Initializes a new counter and registers it as an observer of the deck.
+
+        Parameters:
+        -----------
+        - game_deck (Deck or Shoe): The observed cards.
+        - system (CountingSystem): The counting system. Default is HI_LO.
+        """
+        self.system = system
+        self.decks_count = getattr(game_deck, 'decks_count', 1)
+        self.shuffled(game_deck)
+        game_deck.add_observer(self)
+
+    def card_dealt(self, card):
+        """
+        Updates the counts with a dealt card.
+        """
+        rank_index = card.code % len(RANK_NAMES)
+        self.running_count += self.system.tags[rank_index]
+        self.remaining[rank_index] -= 1
+        self.cards_remaining -= 1
+
+    def shuffled(self, game_deck):
+        """
+        Resets the counts after a reshuffle.
+        """
+        self.running_count = self.system.initial_count(self.decks_count)
+        self.remaining = [4 * self.decks_count] * len(RANK_NAMES)
+        self.cards_remaining = PACK_SIZE * self.decks_count
+
+    def true_count(self):
+        """
+        Returns the running count per remaining deck.
+
+        Returns:
+        --------
+        float: The true count.
+        """
+        return self.running_count * PACK_SIZE / max(self.cards_remaining, 1)
+
+    def remaining_by_rank(self):
+        """
+        Returns the number of remaining cards of every rank.
+
+        Returns:
+        --------
+        dict: Mapping of the rank name to the number of remaining cards.
+        """
+        return dict(zip(RANK_NAMES, self.remaining))
+
+    def composition(self):
+        """
+        Returns the remaining cards by point value (2 to 11), as used by expected_value.action_evs.
+
+        Returns:
+        --------
+        tuple: Number of remaining cards of every point value.
+        """
+        counts = [0] * 10
+        for rank, count in zip(RANK_NAMES, self.remaining):
+            counts[RANKS[rank] - 2] += count
+        return tuple(counts)
+
+
+def bet_from_true_count(true_count, base_bet=BET_LIMITS.get('min'), max_units=8, max_bet=BET_LIMITS.get('max')):
+    """
+    Sizes a bet from the true count: one unit up to a true count of +1, then one more unit per true count.
+
+    Parameters:
+    -----------
+    - true_count (float): The true count.
+    - base_bet (int): The bet of one unit. Default is the minimum bet.
+    - max_units (int): The largest bet in units (the bet spread). Default is 8.
+    - max_bet (int): The maximum bet of the table. Default is the maximum bet.
+
+    Returns:
+    --------
+    int: The bet amount.
+    """
+    units = min(max(int(true_count), 1), max_units)
+    return min(units * base_bet, max_bet)
+
+
+class CountingDecider(Decider):
+    """
+    Decider for the headless engine that sizes its bets from the true count of a CardCounter.
+
+    Attributes:
+    -----------
+    - counter (CardCounter): The counter of the table's cards.
+    - play_decider (Decider): Decider making the playing and insurance decisions. Default is the BotPlayer strategy.
+    - base_bet (int): The bet of one unit, or None for the table's minimum bet.
+    - max_units (int): The largest bet in units.
+    """
+
+    def __init__(self, counter, play_decider=None, base_bet=None, max_units=8):
+        self.counter = counter
+        self.play_decider = play_decider if play_decider is not None else ThresholdDecider(20)
+        self.base_bet = base_bet
+        self.max_units = max_units
+
+    def join(self, engine):
+        self.play_decider.join(engine)
+
+    def make_a_bet(self, player):
+        """
+        Returns the bet sized from the true count within the table's bet limits, or all the player's money
+        if it's less.
+        """
+        base_bet = self.base_bet if self.base_bet is not None else player.min_bet
+        bet = bet_from_true_count(self.counter.true_count(), base_bet, self.max_units, player.max_bet)
+        return min(max(bet, player.min_bet), player.player_money)
+
+    def hit_or_stand(self, player):
+        """
+        Returns the decision of the play decider.
+        """
+        return self.play_decider.hit_or_stand(player)
+
+    def action(self, player, allowed):
+        """
+        Returns the action of the play decider.
+        """
+        return self.play_decider.action(player, allowed)
+
+    def take_insurance(self, player):
+        """
+        Returns the insurance decision of the play decider.
+        """
+        return self.play_decider.take_insurance(player)
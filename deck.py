@@ -3,11 +3,14 @@ deck.py: Defines classes related to the deck of cards for a card game.
 
 This module includes the following classes and functions:
 - Card: Represents a playing card with suit, rank, and point value.
+- CARDS: Tuple of the 52 shared Card objects, indexed by the card code.
 - player_hand_cards: Function to format and print player's hand cards.
 - dealer_hand_cards: Function to format and print dealer's hand cards with a hidden card.
 - Deck: Represents a deck of playing cards.
+- Shoe: Represents a multi-deck shoe with a cut card.
 """
 
+from functools import lru_cache
 from itertools import product
 import random
 
@@ -23,7 +26,9 @@ class Card:
         - suit (str): The suit of the card.
         - rank (str): The rank of the card.
         - points (int): The point value of the card based on the game rules.
+        - code (int): Index of the card in CARDS (suit * 13 + rank index).
     """
+    __slots__ = ('suit', 'rank', 'points', 'code')
 
     def __init__(self, suit, rank):
         """
@@ -32,6 +37,68 @@ class Card:
         self.suit = suit
         self.rank = rank
         self.points = RANKS.get(rank)
+        self.code = list(SUITS).index(suit) * len(RANKS) + list(RANKS).index(rank)
+
+
+# Decks store card codes (small integers) and deal these shared Card objects
+CARDS = tuple(Card(suit=card_suit, rank=card_rank) for card_suit, card_rank in product(SUITS, RANKS))
+
+
+def _card_glyph(card):
+    """
+    Formats the 9 lines of a card's picture.
+
+    Parameters:
+    -----------
+    card: The Card object to draw.
+
+    Returns:
+    --------
+    tuple: The 9 lines of the card's picture.
+    """
+    if card.rank == '10':
+        rank = card.rank
+        space = ''
+    else:
+        rank = card.rank[0]
+        space = ' '
+
+    suit = SUITS.get(card.suit)
+
+    return ('┌─────────────┐',
+            '│{}{}           │'.format(rank, space),
+            '│             │',
+            '│             │',
+            '│      {}      │'.format(suit),
+            '│             │',
+            '│             │',
+            '│           {}{}│'.format(space, rank),
+            '└─────────────┘')
+
+
+# The pictures are drawn once per card; hands are rendered by joining them row by row
+CARD_GLYPHS = tuple(_card_glyph(card) for card in CARDS)
+HIDDEN_CARD_GLYPH = ('┌─────────────┐',) + ('│░░░░░░░░░░░░░│',) * 7 + ('└─────────────┘',)
+
+
+@lru_cache(maxsize=4096)
+def _hand_rows(codes, hidden_first=False):
+    """
+    Joins the pictures of the cards row by row. The result is memoized per hand.
+
+    Parameters:
+    -----------
+    codes (tuple): Codes of the cards of the hand.
+    hidden_first (bool): Flag indicating whether the first card is drawn face-down. Default is False.
+
+    Returns:
+    --------
+    tuple: The 9 rows of the hand's picture.
+    """
+    glyphs = [CARD_GLYPHS[code] for code in codes]
+    if hidden_first:
+        glyphs[0] = HIDDEN_CARD_GLYPH
+    return tuple(''.join(row) for row in zip(*glyphs)) if glyphs else ('',) * 9
 
 
 def player_hand_cards(*cards, no_hidden_card=True):
@@ -47,37 +114,11 @@ def player_hand_cards(*cards, no_hidden_card=True):
         --------
         str: Formatted string representation of the player's hand cards.
     """
-
-    printed_lines = [[] for _ in range(9)]
-
-    for index, card in enumerate(cards):
-        if card.rank == '10':
-            rank = card.rank
-            space = ''
-        else:
-            rank = card.rank[0]
-            space = ' '
-
-        suit = SUITS.get(card.suit)
-
-        printed_lines[0].append('┌─────────────┐')
-        printed_lines[1].append('│{}{}           │'.format(rank, space))
-        printed_lines[2].append('│             │')
-        printed_lines[3].append('│             │')
-        printed_lines[4].append('│      {}      │'.format(suit))
-        printed_lines[5].append('│             │')
-        printed_lines[6].append('│             │')
-        printed_lines[7].append('│           {}{}│'.format(space, rank))
-        printed_lines[8].append('└─────────────┘')
-
-    player_cards_to_print = []
-    for index, line in enumerate(printed_lines):
-        player_cards_to_print.append(''.join(printed_lines[index]))
-
+    rows = _hand_rows(tuple(card.code for card in cards))
     if no_hidden_card:
-        return '\n'.join(player_cards_to_print)
+        return '\n'.join(rows)
     else:
-        return player_cards_to_print
+        return list(rows)
 
 
 def dealer_hand_cards(*cards):
@@ -92,25 +133,7 @@ def dealer_hand_cards(*cards):
         --------
         str: Formatted string representation of the dealer's hand cards with a hidden card.
     """
-
-    hidden_card = [['┌─────────────┐'],
-                   ['│░░░░░░░░░░░░░│'],
-                   ['│░░░░░░░░░░░░░│'],
-                   ['│░░░░░░░░░░░░░│'],
-                   ['│░░░░░░░░░░░░░│'],
-                   ['│░░░░░░░░░░░░░│'],
-                   ['│░░░░░░░░░░░░░│'],
-                   ['│░░░░░░░░░░░░░│'],
-                   ['└─────────────┘']]
-
-    cards_except_hidden = player_hand_cards(*cards[1:], no_hidden_card=False)
-    for index, line in enumerate(cards_except_hidden):
-        hidden_card[index].append(line)
-
-    for index, line in enumerate(hidden_card):
-        hidden_card[index] = ''.join(line)
-
-    return '\n'.join(hidden_card)
+    return '\n'.join(_hand_rows(tuple(card.code for card in cards), hidden_first=True))
 
 
 class Deck:
@@ -119,36 +142,79 @@ class Deck:
 
         Attributes:
         -----------
-        - deck (list): List containing Card objects representing the deck of cards.
+        - deck (bytearray): Codes of the cards remaining in the deck, the top card last.
+        - pool (ShoePool): The pool of pre-shuffled decks the deck takes its cards from, or None.
 
         Methods:
         --------
         - __init__: Initializes a new deck by generating and shuffling the cards.
         - _generate_deck: Generates a deck of cards using product of suits and ranks.
+        - add_observer: Registers an observer of the dealt cards and the reshuffles.
+        - reshuffle: Puts all the cards back into the deck and shuffles it.
+        - prepare_round: Prepares the deck for a new round (a full reshuffled deck for every round).
         - get_card: Retrieves and removes the top card from the deck.
         - __len__: Returns the number of cards remaining in the deck.
     """
 
-    def __init__(self):
+    def __init__(self, rng=random, pool=None):
         """
             Initializes a new deck by generating and shuffling the cards.
+
+            Parameters:
+            -----------
+            rng: Random number generator used for the shuffle (random.Random or the random module). Default is random.
+            pool (ShoePool): A pool of pre-shuffled single decks (see shoe_pool.py) that replaces the shuffles.
+              Default is None.
         """
-        self.deck = self._generate_deck()
-        random.shuffle(self.deck)
+        if pool is not None and pool.decks_count != 1:
+            raise ValueError('A Deck takes its cards from a pool of single decks')
+        self.rng = rng
+        self.pool = pool
+        self.observers = []
+        self._fill()
+
+    def _fill(self):
+        if self.pool is not None:
+            self.deck = self.pool.take()
+        else:
+            self.deck = self._generate_deck()
+            self.rng.shuffle(self.deck)
 
-    def _generate_deck(self):
+    @staticmethod
+    def _generate_deck():
         """
         Generates a deck of cards using the product of suits and ranks.
 
         Returns:
         --------
-        list: List containing Card objects representing the deck of cards.
+        bytearray: Codes of the cards of the deck, one per Card in CARDS.
+        """
+        return bytearray(range(len(CARDS)))
+
+    def add_observer(self, observer):
+        """
+        Registers an observer of the deck. Its card_dealt(card) method is called for every dealt card
+        and its shuffled(deck) method after every reshuffle.
+
+        Parameters:
+        -----------
+        observer: The object to notify.
+        """
+        self.observers.append(observer)
+
+    def reshuffle(self):
+        """
+        Puts all the cards back into the deck and shuffles it (or takes the next deck of the pool).
+        """
+        self._fill()
+        for observer in self.observers:
+            observer.shuffled(self)
+
+    def prepare_round(self):
+        """
+        Prepares the deck for a new round. A single deck is reshuffled before every round.
         """
-        cards_pack = []
-        for card_suit, card_rank in product(SUITS, RANKS):
-            card = Card(suit=card_suit, rank=card_rank)
-            cards_pack.append(card)
-        return cards_pack
+        self.reshuffle()
 
     def get_card(self):
         """
@@ -158,7 +224,10 @@ class Deck:
         --------
         Card: The top card from the deck.
         """
-        return self.deck.pop()
+        card = CARDS[self.deck.pop()]
+        for observer in self.observers:
+            observer.card_dealt(card)
+        return card
 
     def __len__(self):
         """
@@ -169,3 +238,141 @@ class Deck:
         int: Number of cards remaining in the deck.
         """
         return len(self.deck)
+
+
+class Shoe:
+    """
+        Represents a multi-deck shoe with a plastic cut card, as described in bj_rules.
+
+        The cards are generated once and kept for the whole session. Dealing moves a position forward,
+        and the shoe is reshuffled in place before a round only after the cut card was reached.
+
+        A lazy shoe shuffles incrementally (Fisher-Yates, one step per dealt card): every dealt card is drawn
+        uniformly from the undealt region, so the dealt sequence has the same distribution as a full shuffle,
+        and a reshuffle only moves the position back. The cards behind the cut card are never shuffled.
+        A lazy shoe deals a different (but as reproducible) sequence than an eager one with the same seed.
+
+        A shoe created with a ShoePool (see shoe_pool.py) doesn't shuffle at all: every reshuffle takes
+        the next shoe shuffled ahead of time by the pool's worker.
+
+        Attributes:
+        -----------
+        - decks_count (int): Number of 52-card decks in the shoe.
+        - penetration (float): Share of the shoe dealt before the cut card.
+        - cards (bytearray): Codes of the cards of all the decks in the shoe.
+        - position (int): Index of the next card to deal.
+        - cut_card (int): Index of the cut card.
+        - reshuffles (int): Number of reshuffles made since the shoe was created.
+        - lazy (bool): True if the shoe shuffles incrementally while dealing.
+        - pool (ShoePool): The pool of pre-shuffled shoes the shoe takes its cards from, or None.
+
+        Methods:
+        --------
+        - __init__: Initializes a new shoe by generating and shuffling the cards.
+        - add_observer: Registers an observer of the dealt cards and the reshuffles.
+        - reshuffle: Shuffles all the cards back into the shoe.
+        - cut_card_reached: Returns True if the cut card was dealt.
+        - prepare_round: Reshuffles the shoe if the cut card was reached.
+        - get_card: Retrieves the next card from the shoe.
+        - __len__: Returns the number of cards remaining in the shoe.
+    """
+
+    def __init__(self, decks_count=6, penetration=0.75, rng=random, lazy=False, pool=None):
+        """
+            Initializes a new shoe by generating and shuffling the cards.
+
+            Parameters:
+            -----------
+            decks_count (int): Number of 52-card decks in the shoe. Default is 6.
+            penetration (float): Share of the shoe dealt before the cut card. Default is 0.75.
+            rng: Random number generator used for the shuffles. Default is the random module.
+            lazy (bool): Shuffle incrementally while dealing instead of up front. Default is False.
+            pool (ShoePool): A pool of pre-shuffled shoes of decks_count decks that replaces the shuffles.
+              Default is None.
+        """
+        if decks_count < 1 or not 0 < penetration <= 1:
+            raise ValueError('The shoe needs at least one deck and a penetration in (0, 1]')
+        if pool is not None and (lazy or pool.decks_count != decks_count):
+            raise ValueError('A shoe takes its cards from a pool of shoes of the same size and isn\'t lazy')
+
+        self.decks_count = decks_count
+        self.penetration = penetration
+        self.rng = rng
+        self.pool = pool
+        self.cards = pool.take() if pool is not None else Deck._generate_deck() * decks_count
+        self.cut_card = int(len(self.cards) * penetration)
+        self.position = 0
+        self.reshuffles = 0
+        self.observers = []
+        self.lazy = lazy
+        if not lazy and pool is None:
+            rng.shuffle(self.cards)
+
+    def add_observer(self, observer):
+        """
+        Registers an observer of the shoe (see Deck.add_observer).
+        """
+        self.observers.append(observer)
+
+    def reshuffle(self):
+        """
+        Shuffles all the cards back into the shoe. A lazy shoe shuffles them while dealing,
+        and a shoe with a pool takes the next pre-shuffled shoe.
+        """
+        if self.pool is not None:
+            self.cards = self.pool.take()
+        elif not self.lazy:
+            self.rng.shuffle(self.cards)
+        self.position = 0
+        self.reshuffles += 1
+        for observer in self.observers:
+            observer.shuffled(self)
+
+    def cut_card_reached(self):
+        """
+        Returns True if the cut card was dealt.
+
+        Returns:
+        --------
+        bool: True if the shoe has to be reshuffled before the next round.
+        """
+        return self.position >= self.cut_card
+
+    def prepare_round(self):
+        """
+        Prepares the shoe for a new round. The shoe is reshuffled only if the cut card was reached.
+        """
+        if self.cut_card_reached():
+            self.reshuffle()
+
+    def get_card(self):
+        """
+        Retrieves the next card from the shoe. An empty shoe is reshuffled first.
+
+        Returns:
+        --------
+        Card: The next card from the shoe.
+        """
+        if self.position >= len(self.cards):
+            self.reshuffle()
+        cards = self.cards
+        position = self.position
+        if self.lazy:
+            # one Fisher-Yates step: swap a uniformly drawn undealt card to the position
+            other = self.rng.randrange(position, len(cards))
+            cards[position], cards[other] = cards[other], cards[position]
+        card = CARDS[cards[position]]
+        self.position = position + 1
+        for observer in self.observers:
+            observer.card_dealt(card)
+        return card
+
+    def __len__(self):
+        """
+        Returns the number of cards remaining in the shoe.
+
+        Returns:
+        --------
+        int: Number of cards remaining in the shoe.
+        """
+        return len(self.cards) - self.position
@@ -0,0 +1,650 @@
+"""
+engine.py: Defines a headless engine that plays Blackjack rounds without any console interaction.
+
+This module includes the following classes:
+- Decider: Abstract base class for the betting and hit/stand decisions of a seat.
+- ThresholdDecider: Decider that hits below a fixed number of points.
+- DealerDecider: Decider that plays the dealer's hand with the compiled dealer action of a rule set.
+- CallbackDecider: Decider that delegates both decisions to plain functions.
+- RoundListener: No-op observer of the round events (the I/O interface of the engine).
+- ConsoleListener: Listener that prints the round events to the console.
+- Seat: Binds a player object to its decider.
+- SeatResult: Outcome of a single seat in a played round.
+- RoundResult: Structured result of a played round.
+- hand_results: Returns the results of every hand of a seat that split a pair.
+- SimulationEngine: Plays rounds using the same logic as the Game class, but with no input(), print() or time.sleep().
+"""
+
+from abc import ABC, abstractmethod
+import random
+
+from constants import BOT_NAMES
+from players import ACE_POINTS, STAND, HIT, DOUBLE, SPLIT, Dealer, BotPlayer, Player
+from rules import CLASSIC, HAND_STRIDE
+from settlement import WIN, TWENTY_ONE, PUSH, LOSE, BUST, OUTCOMES, Settlement
+
+
+class Decider(ABC):
+    """
+    Abstract base class for the decisions of a seat in the headless engine.
+
+    Methods:
+    --------
+    - join: Called by the engine when the seat joins its table.
+    - make_a_bet: Abstract method returning the bet amount for the player.
+    - hit_or_stand: Abstract method deciding whether the player takes one more card.
+    - action: Chooses the action of a hand (hit or stand by default).
+    - take_insurance: Decides whether the player takes insurance (never by default).
+    """
+
+    def join(self, engine):
+        """
+        Called by the engine when the seat joins its table. Deciders that look at the table
+        (e.g. the dealer's upcard or the remaining cards) keep the engine here.
+
+        Parameters:
+        -----------
+        - engine (SimulationEngine): The engine of the table.
+        """
+        pass
+
+    @abstractmethod
+    def make_a_bet(self, player):
+        """
+        Abstract method returning the bet amount for the player.
+
+        Parameters:
+        -----------
+        - player (AbstractPlayer): The player to make a bet for.
+
+        Returns:
+        --------
+        int: The bet amount.
+        """
+        pass
+
+    @abstractmethod
+    def hit_or_stand(self, player):
+        """
+        Abstract method deciding whether the player takes one more card.
+
+        Parameters:
+        -----------
+        - player (AbstractPlayer): The player to decide for.
+
+        Returns:
+        --------
+        bool: True if the player hits, False if the player stands.
+        """
+        pass
+
+    def action(self, player, allowed):
+        """
+        Chooses the action of the player's current hand. Deciders that double down or split override it,
+        the others only hit or stand (hit_or_stand). The engine only asks for it when the rules allow
+        doubling down or splitting, otherwise it asks hit_or_stand directly.
+
+        Parameters:
+        -----------
+        - player (AbstractPlayer): The player to decide for.
+        - allowed (tuple): The allowed actions (AbstractPlayer.allowed_actions).
+
+        Returns:
+        --------
+        int: One of the allowed actions (STAND, HIT, DOUBLE or SPLIT).
+        """
+        return HIT if self.hit_or_stand(player) else STAND
+
+    def take_insurance(self, player):
+        """
+        Decides whether the player takes insurance when the dealer shows an ace. Default is never.
+
+        Returns:
+        --------
+        bool: True to take insurance.
+        """
+        return False
+
+
+class ThresholdDecider(Decider):
+    """
+    Decider that hits while the player has fewer points than a threshold.
+
+    The bot strategy of BotPlayer is ThresholdDecider(20) (stands above 19).
+
+    Attributes:
+    -----------
+    - stand_on (int): The number of points at which the player stands.
+    - bet (int): Fixed bet amount. If None, a random bet is made like BotPlayer.make_a_bet.
+    - rng: Random number generator used for the random bets.
+    """
+
+    def __init__(self, stand_on, bet=None, rng=random):
+        """
+        Initializes a new threshold decider.
+
+        Parameters:
+        -----------
+        - stand_on (int): The number of points at which the player stands.
+        - bet (int): Fixed bet amount. Default is None (random bet).
+        - rng: Random number generator used for the random bets. Default is the random module.
+        """
+        self.stand_on = stand_on
+        self.bet = bet
+        self.rng = rng
+
+    def make_a_bet(self, player):
+        """
+        Returns the fixed bet or a random bet between the minimum bet and the maximum bet or the player's money.
+        """
+        if self.bet is not None:
+            return min(self.bet, player.player_money)
+        return self.rng.randint(player.min_bet, min(player.max_bet, player.player_money))
+
+    def hit_or_stand(self, player):
+        """
+        Returns True while the player has fewer points than the threshold.
+        """
+        return player.count_player_points() < self.stand_on
+
+
+class DealerDecider(ThresholdDecider):
+    """
+    Decider that plays the dealer's hand like Dealer: a lookup in the compiled dealer action of a rule set
+    (RuleSet.dealer_hits), e.g. standing at 17 or hitting a soft 17.
+
+    Attributes:
+    -----------
+    - dealer_hits (bytes): The compiled dealer action.
+    """
+
+    def __init__(self, rules=CLASSIC, bet=None, rng=random):
+        """
+        Initializes a new dealer decider.
+
+        Parameters:
+        -----------
+        - rules (RuleSet): The rules of the table. Default is CLASSIC.
+        - bet (int): Fixed bet amount. Default is None (random bet).
+        - rng: Random number generator used for the random bets. Default is the random module.
+        """
+        super().__init__(rules.dealer_stands_on, bet, rng)
+        self.dealer_hits = rules.dealer_hits
+
+    def hit_or_stand(self, player):
+        """
+        Returns True if the dealer hits the hand.
+        """
+        return self.dealer_hits[player.is_soft() * HAND_STRIDE + player.player_points] == 1
+
+
+class CallbackDecider(Decider):
+    """
+    Decider that delegates both decisions to plain functions.
+
+    Attributes:
+    -----------
+    - bet_callback (callable): Function taking the player and returning the bet amount.
+    - hit_callback (callable): Function taking the player and returning True to hit.
+    """
+
+    def __init__(self, bet_callback, hit_callback):
+        """
+        Initializes a new callback decider.
+        """
+        self.bet_callback = bet_callback
+        self.hit_callback = hit_callback
+
+    def make_a_bet(self, player):
+        """
+        Returns the bet amount chosen by the bet callback.
+        """
+        return self.bet_callback(player)
+
+    def hit_or_stand(self, player):
+        """
+        Returns the decision of the hit callback.
+        """
+        return self.hit_callback(player)
+
+
+class RoundListener:
+    """
+    No-op observer of the round events. Subclass it to show or record the game.
+
+    Methods:
+    --------
+    - on_bet: Called after a player made a bet.
+    - on_deal: Called after a player received a card.
+    - on_decision: Called after a player decided to hit or stand.
+    - on_outcome: Called after a player's outcome is settled.
+    - on_round: Called after the round is over, with the players in the seating order and the RoundResult.
+    - on_seating: Called after the players took their seats at a new table, in the seating order.
+    - on_double: Called after a player doubled down, with the new bet of the hand.
+    - on_split: Called after a player split a pair, with the index of the new hand.
+    - on_insurance: Called after a player took insurance.
+    """
+
+    def on_bet(self, player, bet):
+        pass
+
+    def on_deal(self, player, card):
+        pass
+
+    def on_decision(self, player, hit):
+        pass
+
+    def on_outcome(self, player, outcome, prize):
+        pass
+
+    def on_round(self, players, result):
+        pass
+
+    def on_seating(self, players):
+        pass
+
+    def on_double(self, player, bet):
+        pass
+
+    def on_split(self, player, hand):
+        pass
+
+    def on_insurance(self, player, bet):
+        pass
+
+
+class ConsoleListener(RoundListener):
+    """
+    Listener that prints the round events to the console without any pauses.
+    """
+
+    def on_bet(self, player, bet):
+        print(f'{player.name} put {bet}$')
+
+    def on_decision(self, player, hit):
+        if hit:
+            print(f'{player.name} takes one more card.')
+        else:
+            print(f'{player.name} don\'t want to take anymore card.')
+
+    def on_outcome(self, player, outcome, prize):
+        print(f'{player.name}: {outcome} ({player.player_points} points), prize {prize}$')
+
+    def on_double(self, player, bet):
+        print(f'{player.name} doubles down, the bet is {bet}$')
+
+    def on_split(self, player, hand):
+        print(f'{player.name} splits the pair into hand {hand + 1}')
+
+    def on_insurance(self, player, bet):
+        print(f'{player.name} takes insurance for {bet}$')
+
+
+class Seat:
+    """
+    Binds a player object to its decider.
+
+    Attributes:
+    -----------
+    - player (AbstractPlayer): The player holding the hand cards and the money.
+    - decider (Decider): The decider making the player's bets and hit/stand decisions.
+    """
+
+    def __init__(self, player, decider):
+        self.player = player
+        self.decider = decider
+
+
+class SeatResult:
+    """
+    Outcome of a single seat in a played round.
+
+    Attributes:
+    -----------
+    - name (str): The name of the player.
+    - bet (int): The bets made by the player (every hand, doubles and insurance included).
+    - points (int): The final points of the player's (first) hand.
+    - outcome (str): One of 'win', 'twenty_one', 'push', 'lose' or 'bust', for the first hand.
+    - prize (int): The amount paid back to the player (including the bets).
+    - money (int): The player's money after the round.
+    - hands (list): (bet, points, outcome, prize) of every hand of a seat that split a pair, None otherwise.
+    """
+
+    def __init__(self, name, bet, points, outcome, prize, money, hands=None):
+        self.name = name
+        self.bet = bet
+        self.points = points
+        self.outcome = outcome
+        self.prize = prize
+        self.money = money
+        self.hands = hands
+
+    @property
+    def net(self):
+        """
+        Returns the player's net gain in the round.
+        """
+        return self.prize - self.bet
+
+    def __repr__(self):
+        return (f'SeatResult(name={self.name!r}, bet={self.bet}, points={self.points}, '
+                f'outcome={self.outcome!r}, prize={self.prize})')
+
+
+def hand_results(settlement, seat, player):
+    """
+    Returns the results of every hand of a seat that split a pair.
+
+    Parameters:
+    -----------
+    - settlement (Settlement): The settlement of the round.
+    - seat (int): The index of the seat.
+    - player (AbstractPlayer): The player of the seat, back on hand 0.
+
+    Returns:
+    --------
+    list: (bet, points, outcome, prize) of every hand, or None if the seat has one hand.
+    """
+    hands = player.hands
+    if hands.count == 1:
+        return None
+    results = []
+    for hand in range(hands.count):
+        entry = hand * settlement.seats + seat
+        results.append((settlement.bets[entry], hands.hand_points(player, hand), settlement.outcomes[entry],
+                        settlement.prizes[entry]))
+    return results
+
+
+class RoundResult:
+    """
+    Structured result of a played round.
+
+    Attributes:
+    -----------
+    - number (int): The number of the round in the engine.
+    - seats (list): List of SeatResult objects in the seating order.
+    - dealer_points (int): The final points of the dealer.
+    - passes (int): How many times the players were asked for one more card.
+    """
+
+    def __init__(self, number, seats, dealer_points, passes):
+        self.number = number
+        self.seats = seats
+        self.dealer_points = dealer_points
+        self.passes = passes
+
+    def __repr__(self):
+        return f'RoundResult(number={self.number}, dealer_points={self.dealer_points}, seats={self.seats!r})'
+
+
+class SimulationEngine:
+    """
+    Plays Blackjack rounds with the same logic as Game
+    (making_a_bets -> initial_deal -> game_round -> check_winner/distribute_prizes),
+    but with decisions and output going through Decider and RoundListener objects.
+
+    Attributes:
+    -----------
+    - seats (list): List of Seat objects in the seating order (the dealer included).
+    - players (list): The players of the seats in the seating order.
+    - dealer (Dealer): The dealer of the table.
+    - dealer_seat (int): The index of the dealer's seat.
+    - listener (RoundListener): The observer of the round events.
+    - game_deck (Deck or Shoe): The cards of the table, prepared before every round (like Game.reset_room).
+    - rules (RuleSet): The rules of the table (bet limits, payouts, doubling, splitting and insurance).
+    - bankroll (int): Money given to a player who can't make the minimum bet anymore.
+    - rounds_played (int): Number of rounds played by the engine.
+    - rebuys (int): How many times the players got a new bankroll.
+
+    Methods:
+    --------
+    - with_bots: Creates an engine for a table of bot players, a dealer and an optional player.
+    - play_round: Plays one round and returns its RoundResult.
+    - play: Plays several rounds and yields their results.
+    """
+
+    def __init__(self, seats, listener=None, game_deck=None, bankroll=100, rules=CLASSIC):
+        """
+        Initializes a new engine.
+
+        Parameters:
+        -----------
+        - seats (list): List of Seat objects in the seating order. Exactly one of them must hold a Dealer.
+        - listener (RoundListener): The observer of the round events. Default is a no-op listener.
+        - game_deck (Deck or Shoe): The cards of the table. Default is a new deck of the rules.
+        - bankroll (int): Money given to a player who can't make the minimum bet anymore. Default is 100.
+        - rules (RuleSet): The rules of the table. The bet limits are applied to the seats. Default is CLASSIC.
+        """
+        dealers = [seat.player for seat in seats if isinstance(seat.player, Dealer)]
+        if len(dealers) != 1:
+            raise ValueError('The table must have exactly one dealer')
+
+        self.seats = seats
+        self.players = [seat.player for seat in seats]
+        self.dealer = dealers[0]
+        self.dealer_seat = self.players.index(self.dealer)
+        self.listener = listener if listener is not None else RoundListener()
+        self.rules = rules
+        self.game_deck = game_deck if game_deck is not None else rules.new_deck()
+        self.bankroll = bankroll
+        self.rounds_played = 0
+        self.rebuys = 0
+        for seat in seats:
+            seat.player.apply_rules(rules)
+            seat.decider.join(self)
+        self.listener.on_seating([seat.player for seat in seats])
+
+    @classmethod
+    def with_bots(cls, bots_count, player_decider=None, rng=random, bot_decider_factory=None, rules=CLASSIC,
+                  **kwargs):
+        """
+        Creates an engine for a table of bot players, a dealer and an optional player.
+
+        Parameters:
+        -----------
+        - bots_count (int): Number of bot players.
+        - player_decider (Decider): Decider for the human player's seat. If None, the table has no player.
+        - rng: Random number generator used for the seating, the bots and the shuffles. Default is the random module.
+        - bot_decider_factory (callable): Function returning a new Decider for every bot.
+          Default is the BotPlayer strategy (ThresholdDecider(20)).
+        - rules (RuleSet): The rules of the table; the dealer plays them with a DealerDecider. Default is CLASSIC.
+        - **kwargs: Passed to the engine's constructor.
+
+        Returns:
+        --------
+        SimulationEngine: A new engine with shuffled seats.
+        """
+        bot_names = list(BOT_NAMES)
+        seats = [Seat(Dealer(rules=rules), DealerDecider(rules, rng=rng))]
+        if player_decider is not None:
+            seats.append(Seat(Player(), player_decider))
+        for _ in range(bots_count):
+            bot_decider = bot_decider_factory() if bot_decider_factory else ThresholdDecider(20, rng=rng)
+            seats.append(Seat(BotPlayer(rng, bot_names), bot_decider))
+        rng.shuffle(seats)  # change players places
+        kwargs.setdefault('game_deck', rules.new_deck(rng))
+        return cls(seats, rules=rules, **kwargs)
+
+    def _draw(self):
+        """
+        Takes a card from the deck, reshuffling the deck when it's empty.
+
+        Returns:
+        --------
+        Card: The top card from the deck.
+        """
+        if not len(self.game_deck):
+            self.game_deck.reshuffle()
+        return self.game_deck.get_card()
+
+    def _give_card(self, player):
+        card = self._draw()
+        player.add_card(card)
+        self.listener.on_deal(player, card)
+
+    def _making_a_bets(self):
+        for seat in self.seats:
+            player = seat.player
+            if player.player_money < player.min_bet:
+                player.player_money += self.bankroll
+                self.rebuys += 1
+            # the deciders' bets are kept within the table's limits and the player's money
+            bet = min(max(seat.decider.make_a_bet(player), player.min_bet), player.max_bet, player.player_money)
+            player.player_bet = bet
+            player.player_money -= bet
+            self.listener.on_bet(player, player.player_bet)
+
+    def _initial_deal(self):
+        for seat in self.seats:
+            seat.player.clear_cards()
+            self._give_card(seat.player)
+            self._give_card(seat.player)
+
+    def _new_settlement(self):
+        """
+        Returns the settlement of a round whose bets are made.
+        """
+        return Settlement([seat.player.player_bet for seat in self.seats], self.dealer_seat, self.rules.payouts,
+                          self.rules.max_hands)
+
+    def _offer_insurance(self, settlement):
+        """
+        Offers insurance (half the bet) to the players when the rules allow it and the dealer shows an ace.
+        The insurance bets are settled at once: the dealer's first two cards are known.
+        """
+        rules = self.rules
+        dealer = self.dealer
+        if not rules.insurance or dealer.player_cards[1].points != ACE_POINTS:
+            return
+        dealer_blackjack = dealer.is_blackjack()
+        for index, seat in enumerate(self.seats):
+            player = seat.player
+            bet = player.insurance_bet(rules, dealer)
+            if bet and seat.decider.take_insurance(player):
+                player.insure(settlement, index, bet, dealer_blackjack, rules, self.listener)
+
+    def _check_winner(self, settlement):
+        """
+        Settles the round the same way as Game.check_winner.
+
+        Parameters:
+        -----------
+        - settlement (Settlement): The settlement of the round.
+
+        Returns:
+        --------
+        bool: True if the round is over, False otherwise.
+        """
+        return settlement.check(settlement.points(self.players))
+
+    def _distribute_prizes(self, settlement):
+        """
+        Settles the round the same way as Game.distribute_prizes.
+        """
+        settlement.stand(settlement.points(self.players))
+
+    def play_round(self):
+        """
+        Plays one round and returns its result.
+
+        Returns:
+        --------
+        RoundResult: The structured result of the round.
+        """
+        self.game_deck.prepare_round()
+        self._making_a_bets()
+        self._initial_deal()
+
+        settlement = self._new_settlement()
+        self._offer_insurance(settlement)
+        passes = 0
+        while not self._check_winner(settlement):
+            passes += 1
+            if not self._asking_card(settlement):
+                self._distribute_prizes(settlement)
+                break
+        return self._finish_round(settlement, passes)
+
+    def _asking_card(self, settlement):
+        """
+        Asks every hand still in the game for its action, the same way as Game.asking_card.
+        The hands made by a split take their first decision in the next pass.
+
+        Returns:
+        --------
+        bool: True if at least one player took a card.
+        """
+        answers = False
+        rules = self.rules
+        active = settlement.active
+        if rules.max_hands == 1 and not rules.double_totals:
+            for seat, in_play in zip(self.seats, active):
+                if not in_play:
+                    continue
+                player = seat.player
+                hit = seat.decider.hit_or_stand(player)
+                self.listener.on_decision(player, hit)
+                if hit:
+                    self._give_card(player)
+                    answers = True
+            return answers
+
+        seats_count = len(self.seats)
+        for index, seat in enumerate(self.seats):
+            player = seat.player
+            hands = player.hands
+            for hand in range(hands.count):
+                if not active[hand * seats_count + index] or hands.done[hand]:
+                    continue
+                hands.select(player, hand)
+                action = seat.decider.action(player, player.allowed_actions(rules))
+                hit = action != STAND
+                self.listener.on_decision(player, hit)
+                if action == HIT:
+                    self._give_card(player)
+                elif action == DOUBLE:
+                    player.double_down(settlement, index, hand, self._give_card, self.listener)
+                elif action == SPLIT:
+                    player.split_pair(settlement, index, hand, self._give_card, self.listener)
+                answers = answers or hit
+            hands.select(player, 0)
+        return answers
+
+    def _finish_round(self, settlement, passes):
+        """
+        Pays the prizes and reports the outcomes of the round. Players without a prize lost the round.
+
+        Returns:
+        --------
+        RoundResult: The structured result of the round.
+        """
+        self.rounds_played += 1
+        results = []
+        players = self.players
+        seat_bets = settlement.seat_bets()
+        seat_prizes = settlement.seat_prizes()
+        for index, player in enumerate(players):
+            outcome, prize = settlement.outcomes[index], seat_prizes[index]
+            player.player_money += prize
+            self.listener.on_outcome(player, outcome, prize)
+            results.append(SeatResult(player.name, seat_bets[index], player.player_points, outcome, prize,
+                                      player.player_money, hand_results(settlement, index, player)))
+        result = RoundResult(self.rounds_played, results, self.dealer.player_points, passes)
+        self.listener.on_round(players, result)
+        return result
+
+    def play(self, rounds_count):
+        """
+        Plays several rounds and yields their results.
+
+        Parameters:
+        -----------
+        - rounds_count (int): Number of rounds to play.
+
+        Yields:
+        -------
+        RoundResult: The result of every played round.
+        """
+        for _ in range(rounds_count):
+            yield self.play_round()
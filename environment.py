@@ -0,0 +1,438 @@
+"""
+environment.py: Gym-style reset()/step() environments over the round logic, for training strategies (requires numpy).
+
+The agent holds one seat at a table with bot players and a dealer. An episode is one round: reset() makes
+the bets and deals the cards, and every step() is one pass of the round where the agent hits (action 1)
+or stands (action 0) and the other seats decide like BotPlayer and Dealer. The round is settled with
+the rules of Game.check_winner and Game.distribute_prizes (see settlement.py), and the reward is the agent's
+net gain per bet unit (with the default payouts: 0.5 for a win, 1 for 21, 0 for a push, -1 for a loss
+or a bust). The tables play a rule set of rules.py, SHOE_S17 by default.
+A round can be over before the agent decides (e.g. a 21 in the first cards); the next step() then ignores
+the action and returns the reward.
+
+An observation is a float32 vector of OBSERVATION_FIELDS: the agent's points, 1 if an ace of the hand
+counts as 11, the dealer's upcard and the Hi-Lo true count of the cards seen so far (the dealer's hole card
+is not seen). The methods follow the Gymnasium API: reset() returns (observation, info) and step() returns
+(observation, reward, terminated, truncated, info).
+
+This module includes the following classes and functions:
+- OBSERVATION_FIELDS: The fields of an observation.
+- BlackjackEnv: One table played by SimulationEngine.
+- BatchBlackjackEnv: K tables stepped together in vectorized NumPy operations.
+"""
+
+import random
+
+import numpy as np
+
+from batch_simulation import CARD_POINTS, CARD_ACES, PACK_SIZE, BOT_STANDS_ON, score_hands
+from counting import CardCounter, HI_LO
+from deck import Shoe
+from engine import Decider, SimulationEngine
+from rules import HAND_STRIDE, SHOE_S17
+from settlement import OUTCOMES
+
+OBSERVATION_FIELDS = ('total', 'soft', 'dealer_upcard', 'true_count')
+
+_WIN, _TWENTY_ONE, _PUSH, _LOSE, _BUST = range(len(OUTCOMES))
+_CARD_TAGS = np.array([HI_LO.tags[code % 13] for code in range(PACK_SIZE)], dtype=np.int16)
+
+
+class _ActionDecider(Decider):
+    """
+    Decider of the agent's seat: a fixed bet and the hit/stand action of the current step.
+    """
+
+    def __init__(self, bet):
+        self.bet = bet
+        self.hit = False
+
+    def make_a_bet(self, player):
+        return min(self.bet, player.player_money)
+
+    def hit_or_stand(self, player):
+        return self.hit
+
+
+class BlackjackEnv:
+    """
+    One table played by SimulationEngine with the agent's seat, bot players and a dealer.
+
+    Attributes:
+    -----------
+    - engine (SimulationEngine): The engine of the table (a Shoe, seats shuffled like Game).
+    - player: The agent's player object.
+    - counter (CardCounter): The Hi-Lo counter of the shoe.
+    - settlement (Settlement): The settlement of the current round.
+    - result (RoundResult): The result of the last settled round.
+
+    Methods:
+    --------
+    - reset: Starts a new round and returns its first observation.
+    - step: Plays one pass of the round with the agent's action.
+    - observation: Returns the current observation.
+    """
+
+    def __init__(self, bots_count=3, bet=10, decks_count=None, penetration=None, seed=None, rules=SHOE_S17):
+        """
+        Initializes a new table.
+
+        Parameters:
+        -----------
+        - bots_count (int): Number of bot players. Default is 3.
+        - bet (int): The agent's bet in every round. Default is 10.
+        - decks_count (int), penetration (float): The shoe of the table. Default is the shoe of the rules.
+        - seed: Seed of the table's random.Random. Default is None.
+        - rules (RuleSet): The rules of the table. Default is SHOE_S17.
+        """
+        rng = random.Random(seed)
+        if decks_count is None and penetration is None:
+            game_deck = rules.new_deck(rng)
+        else:
+            game_deck = Shoe(decks_count or rules.decks_count or 1, penetration or rules.penetration, rng)
+        self.decider = _ActionDecider(bet)
+        self.engine = SimulationEngine.with_bots(bots_count, self.decider, rng=rng, game_deck=game_deck,
+                                                 rules=rules)
+        self.player_seat = [seat.decider for seat in self.engine.seats].index(self.decider)
+        self.player = self.engine.seats[self.player_seat].player
+        self.counter = CardCounter(self.engine.game_deck)
+        self.settlement = None
+        self.result = None
+        self.passes = 0
+
+    def observation(self):
+        """
+        Returns the current observation (see OBSERVATION_FIELDS).
+
+        Returns:
+        --------
+        ndarray: float32 vector of the agent's points, soft flag, the dealer's upcard and the true count.
+        """
+        hole_card, upcard = self.engine.dealer.player_cards[:2]
+        counter = self.counter
+        running_count = counter.running_count - counter.system.tags[hole_card.code % 13]
+        true_count = running_count * PACK_SIZE / (counter.cards_remaining + 1)
+        return np.array([self.player.player_points, self.player.is_soft(), upcard.points, true_count],
+                        dtype=np.float32)
+
+    def reset(self, seed=None):
+        """
+        Starts a new round: the bets, the initial deal and the first check of the round.
+
+        Parameters:
+        -----------
+        - seed: Ignored, the table is seeded once by its constructor (Gymnasium signature).
+
+        Returns:
+        --------
+        tuple: The observation and an info dict ({'decision': False} if the round is already over).
+        """
+        engine = self.engine
+        engine.game_deck.prepare_round()
+        engine._making_a_bets()
+        engine._initial_deal()
+        self.settlement = engine._new_settlement()
+        self.passes = 0
+        self.result = None
+        engine._check_winner(self.settlement)
+        return self.observation(), {'decision': not self.settlement.over}
+
+    def _pass(self):
+        self.passes += 1
+        if self.engine._asking_card(self.settlement):
+            self.engine._check_winner(self.settlement)
+        else:
+            self.engine._distribute_prizes(self.settlement)
+
+    def step(self, action):
+        """
+        Plays one pass of the round: the agent hits (action 1) or stands (action 0), the other seats decide
+        and the round is checked. When the agent is busted, the rest of the round is played without it.
+
+        Parameters:
+        -----------
+        - action (int): 1 to hit, 0 to stand.
+
+        Returns:
+        --------
+        tuple: (observation, reward, terminated, truncated, info); the info has the 'outcome' of a settled round.
+        """
+        settlement = self.settlement
+        if settlement is None:
+            raise RuntimeError('Call reset() before step()')
+        self.decider.hit = bool(action)
+        if not settlement.over:
+            self._pass()
+            while not settlement.over and not settlement.active[self.player_seat]:
+                self._pass()
+        if not settlement.over:
+            return self.observation(), 0.0, False, False, {'decision': True}
+
+        if self.result is None:
+            self.result = self.engine._finish_round(settlement, self.passes)
+        seat = self.result.seats[self.player_seat]
+        reward = seat.net / seat.bet if seat.bet else 0.0
+        return self.observation(), reward, True, False, {'outcome': seat.outcome}
+
+
+class BatchBlackjackEnv:
+    """
+    K independent tables stepped together in vectorized NumPy operations, with the round logic of
+    SimulationEngine (bots stand on 20, the dealer plays the rule set, every seat bets the same amount).
+
+    Every table has its own multi-deck shoe with a cut card. A table whose round is settled is reset
+    automatically: step() returns its reward with terminated set and the first observation of its next round.
+
+    Attributes:
+    -----------
+    - tables (int): Number of tables (K).
+    - seats_count (int): Number of seats at every table (the bots, the agent and the dealer).
+    - player_seat (int), dealer_seat (int): The indexes of the agent's and the dealer's seats.
+    - rules (RuleSet): The rules of the tables.
+    - shoes (ndarray): The card codes of every table's shoe, shape (K, decks_count * 52).
+    - position (ndarray): Index of the next card of every shoe.
+
+    Methods:
+    --------
+    - reset: Starts a new round on every table.
+    - step: Plays one pass on every table with the agents' actions.
+    - observation: Returns the current observations.
+    """
+
+    def __init__(self, tables, bots_count=3, bet=10, decks_count=None, penetration=None, seed=None,
+                 player_seat=0, dealer_seat=None, rules=SHOE_S17):
+        """
+        Initializes K tables.
+
+        Parameters:
+        -----------
+        - tables (int): Number of tables.
+        - bots_count (int): Number of bot players at every table. Default is 3.
+        - bet (int): The bet of every seat. Default is 10.
+        - decks_count (int), penetration (float): The shoe of every table. Default is the shoe of the rules
+          (a single deck for the rules without a shoe).
+        - seed (int): Seed of the NumPy generator. Default is None.
+        - player_seat (int): The agent's seat in the seating order. Default is 0.
+        - dealer_seat (int): The dealer's seat. Default is the last seat.
+        - rules (RuleSet): The rules of the tables. Default is SHOE_S17.
+        """
+        decks_count = decks_count or rules.decks_count or 1
+        penetration = penetration or rules.penetration
+        self.tables = tables
+        self.seats_count = bots_count + 2
+        self.player_seat = player_seat
+        self.dealer_seat = self.seats_count - 1 if dealer_seat is None else dealer_seat
+        if not (0 <= self.player_seat < self.seats_count and 0 <= self.dealer_seat < self.seats_count
+                and self.player_seat != self.dealer_seat):
+            raise ValueError('The agent and the dealer need two different seats of the table')
+        if decks_count < 1 or not 0 < penetration <= 1:
+            raise ValueError('The shoe needs at least one deck and a penetration in (0, 1]')
+
+        self.bet = bet
+        self.rules = rules
+        self.win_prize = round(rules.payouts[OUTCOMES[_WIN]] * bet)
+        self.twenty_one_prize = round(rules.payouts[OUTCOMES[_TWENTY_ONE]] * bet)
+        self.push_prize = round(rules.payouts[OUTCOMES[_PUSH]] * bet)
+        self.rng = np.random.default_rng(seed)
+        self.cards_count = decks_count * PACK_SIZE
+        self.cut_card = int(self.cards_count * penetration)
+        self.shoes = np.empty((tables, self.cards_count), dtype=np.int8)
+        self.position = np.zeros(tables, dtype=np.int64)
+        self.running_count = np.zeros(tables, dtype=np.int64)
+        self._shuffle(np.ones(tables, dtype=bool))
+
+        # hit tables of the bots and the dealer, indexed like RuleSet.dealer_hits (soft * HAND_STRIDE + points)
+        self.hits = np.tile(np.arange(2 * HAND_STRIDE) % HAND_STRIDE < BOT_STANDS_ON, (self.seats_count, 1))
+        self.hits[self.dealer_seat] = np.frombuffer(rules.dealer_hits, dtype=np.uint8).astype(bool)
+        self.is_dealer = np.zeros(self.seats_count, dtype=bool)
+        self.is_dealer[self.dealer_seat] = True
+        self.rows = np.arange(tables)
+
+        shape = (tables, self.seats_count)
+        self.totals = np.zeros(shape, dtype=np.int16)
+        self.aces = np.zeros(shape, dtype=np.int16)
+        self.active = np.zeros(shape, dtype=bool)
+        self.outcome = np.full(shape, _LOSE, dtype=np.int8)
+        self.prize = np.zeros(shape, dtype=np.int64)
+        self.hole_card = np.zeros(tables, dtype=np.int8)
+        self.upcard = np.zeros(tables, dtype=np.int8)
+        self.over = np.zeros(tables, dtype=bool)
+
+    def _shuffle(self, rows):
+        indexes = np.flatnonzero(rows)
+        cards = np.tile(np.arange(PACK_SIZE, dtype=np.int8), self.cards_count // PACK_SIZE)
+        self.shoes[indexes] = self.rng.permuted(np.broadcast_to(cards, (len(indexes), self.cards_count)), axis=1)
+        self.position[indexes] = 0
+        self.running_count[indexes] = 0
+
+    def _draw(self, rows):
+        """
+        Deals the next card of the shoes of the given rows (an empty shoe is reshuffled first, like Shoe).
+
+        Returns:
+        --------
+        ndarray: The card codes.
+        """
+        empty = np.zeros(self.tables, dtype=bool)
+        empty[rows] = self.position[rows] >= self.cards_count
+        if empty.any():
+            self._shuffle(empty)
+        cards = self.shoes[rows, self.position[rows]]
+        self.position[rows] += 1
+        self.running_count[rows] += _CARD_TAGS[cards]
+        return cards
+
+    def _give_cards(self, rows, seat):
+        cards = self._draw(rows)
+        self.totals[rows, seat] += CARD_POINTS[cards]
+        self.aces[rows, seat] += CARD_ACES[cards]
+        return cards
+
+    def _points(self):
+        return score_hands(self.totals, self.aces)
+
+    def _check(self, live):
+        """
+        Settles the live tables that have winners (Settlement.check, vectorized).
+        """
+        points = self._points()
+        dealer = self.dealer_seat
+        busted = self.active & (points > 21) & ~self.is_dealer & live[:, None]
+        self.outcome[busted] = _BUST
+        self.active &= ~busted
+
+        dealer_busted = live & (points[:, dealer] > 21)
+        self.outcome[dealer_busted, dealer] = _BUST
+        self.active[dealer_busted, dealer] = False
+        winners = self.active & dealer_busted[:, None]
+        self.outcome[winners] = _WIN
+        self.prize[winners] = self.win_prize
+        live = live & ~dealer_busted
+
+        winners21 = self.active & (points == 21) & live[:, None]
+        self.outcome[winners21] = _TWENTY_ONE
+        self.prize[winners21] = self.twenty_one_prize
+        has21 = winners21.any(axis=1)
+        live = live & ~has21
+
+        only_winner = live & (self.active.sum(axis=1) == 1)
+        winners = self.active & only_winner[:, None] & (points < 21)
+        self.outcome[winners] = _WIN
+        self.prize[winners] = self.win_prize
+        self.over |= dealer_busted | has21 | winners.any(axis=1)
+
+    def _stand(self, finished):
+        """
+        Settles the finished tables by comparing the players with the dealer (Settlement.stand, vectorized).
+        """
+        points = self._points()
+        dealer_points = points[:, self.dealer_seat][:, None]
+        settled = self.active & finished[:, None]
+        winners = settled & (points < 21) & (points > dealer_points)
+        self.outcome[winners] = _WIN
+        self.prize[winners] = self.win_prize
+        pushes = settled & ~winners & (points == dealer_points) & ~self.is_dealer
+        self.outcome[pushes] = _PUSH
+        self.prize[pushes] = self.push_prize
+        self.over |= finished
+
+    def _pass(self, live, actions):
+        """
+        Asks every seat of the live tables for one more card, in the seating order, then checks the tables.
+        """
+        points = self._points()
+        soft = (self.totals - points) // 10 < self.aces
+        hands = soft * HAND_STRIDE + np.minimum(points, HAND_STRIDE - 1)
+        any_hit = np.zeros(self.tables, dtype=bool)
+        for seat in range(self.seats_count):
+            wants = actions if seat == self.player_seat else self.hits[seat, hands[:, seat]]
+            hit = live & self.active[:, seat] & wants
+            if hit.any():
+                self._give_cards(self.rows[hit], seat)
+                any_hit |= hit
+        self._stand(live & ~any_hit)
+        self._check(live & any_hit)
+
+    def _new_rounds(self, rows):
+        """
+        Starts a new round on the given tables: reshuffles the shoes past the cut card and deals the cards.
+        """
+        self._shuffle(rows & (self.position >= self.cut_card))
+        self.totals[rows] = 0
+        self.aces[rows] = 0
+        self.active[rows] = True
+        self.outcome[rows] = _LOSE
+        self.prize[rows] = 0
+        self.over[rows] = False
+        indexes = np.flatnonzero(rows)
+        for seat in range(self.seats_count):
+            first = self._give_cards(indexes, seat)
+            second = self._give_cards(indexes, seat)
+            if seat == self.dealer_seat:
+                self.hole_card[indexes] = first
+                self.upcard[indexes] = second
+        self._check(rows)
+
+    def observation(self):
+        """
+        Returns the current observations (see OBSERVATION_FIELDS).
+
+        Returns:
+        --------
+        ndarray: float32 array of shape (K, 4).
+        """
+        points = self._points()[:, self.player_seat]
+        totals = self.totals[:, self.player_seat]
+        soft = (self.aces[:, self.player_seat] > 0) & (points != totals - 10 * self.aces[:, self.player_seat])
+        running_count = self.running_count - _CARD_TAGS[self.hole_card]
+        true_count = running_count * PACK_SIZE / (self.cards_count - self.position + 1)
+        return np.stack([points, soft, CARD_POINTS[self.upcard], true_count], axis=1).astype(np.float32)
+
+    def reset(self, seed=None):
+        """
+        Starts a new round on every table.
+
+        Parameters:
+        -----------
+        - seed (int): Reseeds the NumPy generator if given. Default is None.
+
+        Returns:
+        --------
+        tuple: The observations and an info dict with the 'decision' mask (False where the round is already over).
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._new_rounds(np.ones(self.tables, dtype=bool))
+        return self.observation(), {'decision': ~self.over}
+
+    def step(self, actions):
+        """
+        Plays one pass on every table with the agents' actions; the tables whose round is settled get their
+        reward and start a new round.
+
+        Parameters:
+        -----------
+        - actions (array-like): 1 to hit, 0 to stand, one per table.
+
+        Returns:
+        --------
+        tuple: (observations, rewards, terminated, truncated, info). The info has the 'outcome' codes of
+        the agents (indexes in OUTCOMES, meaningful where terminated) and the 'decision' mask of the new state.
+        """
+        actions = np.asarray(actions, dtype=bool)
+        live = ~self.over
+        self._pass(live, actions)
+        # the busted agents' rounds are played to the end without them
+        while True:
+            live = ~self.over & ~self.active[:, self.player_seat]
+            if not live.any():
+                break
+            self._pass(live, np.zeros(self.tables, dtype=bool))
+
+        terminated = self.over.copy()
+        rewards = np.where(terminated, (self.prize[:, self.player_seat] - self.bet) / self.bet, 0.0)
+        outcomes = self.outcome[:, self.player_seat].copy()
+        if terminated.any():
+            self._new_rounds(terminated)
+        info = {'outcome': outcomes, 'decision': ~self.over}
+        return self.observation(), rewards.astype(np.float32), terminated, np.zeros(self.tables, dtype=bool), info
@@ -0,0 +1,378 @@
+"""
+expected_value.py: Computes the exact expected values of the player actions for a given shoe composition.
+
+Unlike the infinite-deck solver in strategy.py, every drawn card is removed from the composition, both for
+the player's and for the dealer's cards. All the results are kept in bounded LRU caches keyed on the
+composition, so repeated queries within a shoe are nearly free: the values of hitting are memoized per
+remaining composition and hand state, in a memo shared by all the queries against the same dealer
+distribution, and ExpectedValueDecider computes the dealer's distribution once per round. The dealer plays
+the compiled action of a rule set (rules.py), CLASSIC by default, and the outcomes pay the rule set's payouts
+(see strategy.py).
+
+A composition is a tuple with the number of remaining cards of every point value from 2 to 11 (the ace is 11).
+
+This module includes the following classes and functions:
+- composition_of: Returns the composition of the cards remaining in a Deck or Shoe.
+- dealer_distribution: Returns the dealer's final-total distribution for a composition and an upcard.
+- action_evs: Returns the expected values of standing, hitting and doubling.
+- cache_info: Returns the statistics of the caches.
+- ExpectedValueDecider: Decider for the headless engine that plays the action with the highest EV.
+"""
+
+from functools import lru_cache
+from types import MappingProxyType
+
+from deck import CARDS
+from engine import Decider
+from players import STAND, HIT, DOUBLE
+from rules import CLASSIC
+from settlement import WIN, TWENTY_ONE, PUSH, LOSE, BUST
+
+CARD_VALUES = tuple(range(2, 12))
+CACHE_SIZE = 1 << 16
+MEMOS_SIZE = 8  # hit memos kept, one per dealer distribution (a round of ExpectedValueDecider)
+
+# indices of the dealer's final totals in a distribution tuple
+_FINALS = (17, 18, 19, 20, 21)
+_BUST = len(_FINALS)
+_BLACKJACK = _BUST + 1
+# the dealer draws at most 11 cards (hole card included) before standing or busting, when hitting a soft 17
+_MAX_DEALER_CARDS = 12
+# a remaining composition is packed into an integer, 8 bits per value (up to 255 cards, a shoe of 63 decks)
+_COUNT_BITS = 8
+_COUNT_MASK = (1 << _COUNT_BITS) - 1
+_SHIFTS = tuple(_COUNT_BITS * index for index in range(len(CARD_VALUES)))
+
+
+def composition_of(game_deck):
+    """
+    Returns the composition of the cards remaining in a Deck or Shoe.
+
+    Parameters:
+    -----------
+    - game_deck (Deck or Shoe): The cards of the table.
+
+    Returns:
+    --------
+    tuple: Number of remaining cards of every point value from 2 to 11.
+    """
+    if hasattr(game_deck, 'position'):
+        codes = game_deck.cards[game_deck.position:]
+    else:
+        codes = game_deck.deck
+    counts = [0] * len(CARD_VALUES)
+    for code in range(len(CARDS)):
+        counts[CARDS[code].points - 2] += codes.count(code)
+    return tuple(counts)
+
+
+def _add_card(hard, has_ace, value):
+    if value == 11:
+        return hard + 1, True
+    return hard + value, has_ace
+
+
+def _points(hard, has_ace):
+    return hard + 10 if has_ace and hard <= 11 else hard
+
+
+def _dealer_sequences(hard, has_ace, drawn, sequences, rules):
+    """
+    Enumerates the dealer's draws from a hand state until the dealer stands or busts.
+
+    Parameters:
+    -----------
+    - hard (int), has_ace (bool): The dealer's hand state.
+    - drawn (tuple): Number of drawn cards of every point value.
+    - sequences (dict): Mapping of (drawn, final index) to the number of orders, filled by the function.
+    - rules (RuleSet): The rules the dealer plays.
+    """
+    points = _points(hard, has_ace)
+    if points > 21 or not rules.dealer_hit(points, has_ace and hard <= 11):
+        key = (drawn, _BUST if points > 21 else points - 17)
+        sequences[key] = sequences.get(key, 0) + 1
+        return
+    for index in range(len(CARD_VALUES)):
+        more = drawn[:index] + (drawn[index] + 1,) + drawn[index + 1:]
+        _dealer_sequences(*_add_card(hard, has_ace, index + 2), more, sequences, rules)
+
+
+@lru_cache(maxsize=None)
+def _dealer_paths(upcard, rules=CLASSIC):
+    """
+    Returns the dealer's possible draws for an upcard, grouped by the drawn cards.
+
+    The probability of drawing a given sequence without replacement depends only on how many cards of every
+    value it holds, so every group is weighted once per composition instead of walking all the draws again.
+
+    Returns:
+    --------
+    tuple: Tuples of (number of drawn cards, ((value index, count), ...), number of orders, final index).
+    """
+    sequences = {}
+    empty = (0,) * len(CARD_VALUES)
+    up_state = _add_card(0, False, upcard)
+    for index in range(len(CARD_VALUES)):
+        drawn = empty[:index] + (1,) + empty[index + 1:]
+        state = _add_card(*up_state, index + 2)
+        if _points(*state) == 21:
+            sequences[(drawn, _BLACKJACK)] = 1
+        else:
+            _dealer_sequences(*state, drawn, sequences, rules)
+    return tuple((sum(drawn), tuple((index, count) for index, count in enumerate(drawn) if count), orders, final)
+                 for (drawn, final), orders in sequences.items())
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def dealer_distribution(counts, upcard, rules=CLASSIC):
+    """
+    Returns the dealer's final-total distribution. The hole card and the dealer's hits are drawn
+    from the composition without replacement.
+
+    Parameters:
+    -----------
+    - counts (tuple): The composition of the unseen cards.
+    - upcard (int): Points of the dealer's face-up card.
+    - rules (RuleSet): The rules the dealer plays. Default is CLASSIC.
+
+    Returns:
+    --------
+    tuple: Probabilities of the final totals 17, 18, 19, 20, 21, bust and blackjack.
+    """
+    total = sum(counts)
+    # falling factorials: ways[index][k] is the number of ordered draws of k cards of the value index
+    # (zero when there are less than k such cards left)
+    ways = []
+    for count in counts:
+        products = [1]
+        for k in range(_MAX_DEALER_CARDS):
+            products.append(products[-1] * max(count - k, 0))
+        ways.append(products)
+    all_ways = [1.0]
+    for k in range(_MAX_DEALER_CARDS):
+        all_ways.append(all_ways[-1] * max(total - k, 0))
+
+    distribution = [0.0] * (_BLACKJACK + 1)
+    for cards_count, drawn, orders, final in _dealer_paths(upcard, rules):
+        weight = orders
+        for index, count in drawn:
+            weight *= ways[index][count]
+        if weight:
+            distribution[final] += weight / all_ways[cards_count]
+    return tuple(distribution)
+
+
+# _NEXT_STATES[hard][has_ace][value index] is the (hard, has_ace, points) state after drawing a card
+_NEXT_STATES = [[[(*_add_card(hard, has_ace, value), _points(*_add_card(hard, has_ace, value)))
+                  for value in CARD_VALUES] for has_ace in (False, True)] for hard in range(22)]
+
+
+def _stand_evs(distribution, rules):
+    """
+    Returns the expected values of standing with 0 to 21 points against the dealer's distribution, per bet
+    unit: 21 points are paid at once, less points win against a dealer's bust or lower total, push at equal
+    points and lose otherwise.
+    """
+    payouts = rules.payouts
+    win, push, lose = payouts[WIN] - 1, payouts[PUSH] - 1, payouts[LOSE] - 1
+    evs = []
+    for points in range(21):
+        ev = win * distribution[_BUST] + lose * distribution[_BLACKJACK]
+        for index, final in enumerate(_FINALS):
+            if final < points:
+                ev += win * distribution[index]
+            elif final > points:
+                ev += lose * distribution[index]
+            else:
+                ev += push * distribution[index]
+        evs.append(ev)
+    evs.append(payouts[TWENTY_ONE] - 1)
+    return evs
+
+
+def _pack(counts):
+    """
+    Returns a composition packed into an integer, _COUNT_BITS per value.
+    """
+    packed = 0
+    for shift, count in zip(_SHIFTS, counts):
+        packed |= count << shift
+    return packed
+
+
+def _hit_ev(counts, hard, has_ace, stand_evs, bust, memo):
+    """
+    Returns the expected value of hitting and then playing on optimally, drawing without replacement.
+
+    The memo key is the remaining composition packed into an integer with the hand state in its low bits,
+    so the memo can be shared by all the hands and decisions played against the same stand values.
+    A hand reaching 21 points is paid at once and takes no more cards.
+    """
+    def hit(hard, has_ace, remaining, total):
+        key = remaining << 6 | hard << 1 | has_ace
+        if not total:
+            ev = memo[key] = stand_evs[_points(hard, has_ace)]
+            return ev
+        ev = 0.0
+        next_states = _NEXT_STATES[hard][has_ace]
+        for index, shift in enumerate(_SHIFTS):
+            count = remaining >> shift & _COUNT_MASK
+            if not count:
+                continue
+            probability = count / total
+            next_hard, next_ace, points = next_states[index]
+            if points > 21:
+                ev += bust * probability
+            elif points == 21:
+                ev += stand_evs[21] * probability
+            else:
+                left = remaining - (1 << shift)
+                hit_ev = memo.get(left << 6 | next_hard << 1 | next_ace)
+                if hit_ev is None:
+                    hit_ev = hit(next_hard, next_ace, left, total - 1)
+                stand = stand_evs[points]
+                ev += (hit_ev if hit_ev > stand else stand) * probability
+        memo[key] = ev
+        return ev
+
+    remaining = _pack(counts)
+    ev = memo.get(remaining << 6 | hard << 1 | has_ace)
+    return hit(hard, has_ace, remaining, sum(counts)) if ev is None else ev
+
+
+def _double_ev(counts, hard, has_ace, stand_evs, bust):
+    total = sum(counts)
+    if not total:
+        return 2 * stand_evs[_points(hard, has_ace)]
+    ev = 0.0
+    for index, count in enumerate(counts):
+        if count:
+            points = _points(*_add_card(hard, has_ace, index + 2))
+            ev += count / total * (stand_evs[points] if points <= 21 else bust)
+    return 2 * ev
+
+
+@lru_cache(maxsize=MEMOS_SIZE)
+def _dealer_values(dealer_counts, upcard, rules):
+    """
+    Returns the stand values against the dealer's distribution for a composition and a new memo of the
+    hit values computed against them.
+    """
+    return _stand_evs(dealer_distribution(dealer_counts, upcard, rules), rules), {}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def action_evs(counts, points, soft, upcard, rules=CLASSIC, dealer_counts=None):
+    """
+    Returns the expected values of the player actions, per bet unit.
+
+    The player's hits are drawn from the composition without replacement. The dealer's distribution is
+    computed once for a composition (by default the composition at the decision), the usual
+    combinatorial-analysis simplification that keeps a query to a few milliseconds.
+
+    Parameters:
+    -----------
+    - counts (tuple): The composition of the unseen cards (the dealer's hole card included).
+    - points (int): The player's points.
+    - soft (bool): True if an ace of the player's hand is counted as 11.
+    - upcard (int): Points of the dealer's face-up card.
+    - rules (RuleSet): The rules of the table. Default is CLASSIC.
+    - dealer_counts (tuple): The composition the dealer's distribution is computed for. Default is counts.
+
+    Returns:
+    --------
+    MappingProxyType: Read-only mapping of 'stand', 'hit' and 'double' to the expected value; the cached
+    result is shared by every caller.
+    """
+    hard, has_ace = (points - 10, True) if soft else (points, False)
+    stand_evs, memo = _dealer_values(dealer_counts or counts, upcard, rules)
+    bust = rules.payouts[BUST] - 1
+    return MappingProxyType({'stand': stand_evs[points] if points <= 21 else bust,
+                             'hit': _hit_ev(counts, hard, has_ace, stand_evs, bust, memo),
+                             'double': _double_ev(counts, hard, has_ace, stand_evs, bust)})
+
+
+def cache_info():
+    """
+    Returns the statistics of the caches.
+
+    Returns:
+    --------
+    dict: Mapping of the cached function name to its CacheInfo.
+    """
+    return {function.__name__: function.cache_info()
+            for function in (action_evs, dealer_distribution, _dealer_values)}
+
+
+class ExpectedValueDecider(Decider):
+    """
+    Decider for the headless engine that plays the action with the highest EV for the remaining cards:
+    it hits or stands, and doubles down when the rules allow it. It never splits.
+
+    The unseen cards are the cards in the deck plus the dealer's hole card. The dealer's distribution is
+    computed for the unseen cards at the first decision of a round and reused by the later decisions of
+    the round, so they share the memo of the hit values.
+
+    Attributes:
+    -----------
+    - bet (int): Fixed bet amount, or None for the table's minimum bet.
+    - engine (SimulationEngine): The engine of the table, set when the seat joins it.
+    - dealer_counts (tuple): The composition of the dealer's distribution in the current round.
+    """
+
+    def __init__(self, bet=None):
+        """
+        Initializes a new expected value decider.
+
+        Parameters:
+        -----------
+        - bet (int): Fixed bet amount. Default is the table's minimum bet.
+        """
+        self.bet = bet
+        self.engine = None
+        self.dealer_counts = None
+        self.round = None
+
+    def join(self, engine):
+        self.engine = engine
+
+    def make_a_bet(self, player):
+        """
+        Returns the fixed bet within the table's bet limits, or all the player's money if it's less.
+        """
+        bet = self.bet if self.bet is not None else player.min_bet
+        return min(max(bet, player.min_bet), player.max_bet, player.player_money)
+
+    def _evs(self, player):
+        engine = self.engine
+        dealer_cards = engine.dealer.player_cards
+        counts = list(composition_of(engine.game_deck))
+        counts[dealer_cards[0].points - 2] += 1  # the hole card is unseen
+        counts = tuple(counts)
+        # a new round, or a shoe reshuffled during the round
+        if self.round != engine.rounds_played or sum(counts) > sum(self.dealer_counts):
+            self.round = engine.rounds_played
+            self.dealer_counts = counts
+        return action_evs(counts, player.player_points, player.is_soft(), dealer_cards[1].points, engine.rules,
+                          self.dealer_counts)
+
+    def hit_or_stand(self, player):
+        """
+        Returns True if hitting has a higher expected value than standing.
+        """
+        if player.player_points >= 21:
+            return False
+        evs = self._evs(player)
+        return evs['hit'] > evs['stand']
+
+    def action(self, player, allowed):
+        """
+        Returns DOUBLE if it's allowed and has the highest expected value, otherwise hits or stands.
+        """
+        if player.player_points >= 21:
+            return STAND
+        evs = self._evs(player)
+        best = max(evs['hit'], evs['stand'])
+        if DOUBLE in allowed and evs['double'] > best:
+            return DOUBLE
+        return HIT if evs['hit'] > evs['stand'] else STAND
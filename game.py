@@ -5,11 +5,13 @@ This module includes the following classes and functions:
 - Game: Represents the main game controller.
 """
 
-from deck import Deck
-from players import Dealer, BotPlayer, Player
-from constants import BOT_PLAYERS_LIMITS, NumberException
-import time
-from random import shuffle
+from engine import WIN, TWENTY_ONE, PUSH, BUST, RoundListener, RoundResult, SeatResult, hand_results
+from pacing import RealTimePacer
+from players import STAND, HIT, DOUBLE, SPLIT, Dealer, BotPlayer, Player
+from constants import BOT_NAMES, NumberException
+from rules import CLASSIC
+from settlement import Settlement
+import random
 
 
 class Game:
@@ -18,6 +20,7 @@ class Game:
 
         Attributes:
         -----------
+        - rules (RuleSet): The rules of the game (see rules.py).
         - max_players_count (int): Maximum number of bot players allowed in the game.
         - min_players_count (int): Minimum number of bot players allowed in the game.
 
@@ -26,31 +29,61 @@ class Game:
         - __init__: Initializes a new game by creating a deck, dealer, and player instances.
         - clear_cards: Clears player's hand cards and deals two new cards.
         - reset_game: Resets the game state to the initial state.
-        - _generate_bot_players: Generates a specified number of bot players based on user input.
+        - seat_bots: Seats a number of bot players, asking the player for it if it isn't given.
         - list_of_players: Creates a list of all players in the game.
         - open_hidden_cards: Reveals the dealer's and bot players' hidden cards.
         - initial_deal: Deals two cards to each player at the beginning of the game.
         - print_all_players_cards: Prints the hand cards of all players.
+        - players_in_play: Returns the players still in the round.
         - making_a_bets: Prompts all players to make their bets.
-        - asking_card: Asks each player whether they want to hit or stand and adds cards accordingly.
+        - offer_insurance: Offers insurance to the players when the dealer shows an ace.
+        - pending_hands: Returns the hands of a player that take a decision in the next pass.
+        - asking_card: Asks each hand for its action (hit, stand, double down or split) and adds cards accordingly.
         - check_winner: Checks for winners and losers based on game conditions.
+        - check_round: Announces and checks the current state of the round.
+        - hit_pass: Asks all players for one more card and finishes the round if nobody wants it.
+        - finish_round: Reports the outcomes of the round to the listener.
         - game_round: Executes a round of the game, including player turns and checking for winners.
         - distribute_prizes: Distributes prizes to the winners based on game outcomes.
+        - play_again: Applies the player's answer to the play again question.
         - play_again_prompt: Prompts the player to play the game again or exit.
+        - can_stay_in_room: Checks if the player can play again in the same room.
+        - stay_in_room: Applies the player's answer to the stay in this room question.
         - start_game: Starts the main loop of the Blackjack game.
+        - resume_game: Resumes the main loop of a game restored from a checkpoint.
+        - play_rounds: Plays rounds until the player leaves the game.
         """
-    max_players_count = BOT_PLAYERS_LIMITS.get('max')
-    min_players_count = BOT_PLAYERS_LIMITS.get('min')
-
-    def __init__(self):
+    def __init__(self, game_deck=None, pacer=None, player=None, listener=None, rng=random, rules=CLASSIC):
         """
         Initializes a new game by creating a deck, dealer, and player instances.
-        """
-        self.game_deck = Deck()
-        self.game_dealer = Dealer()
+
+        Parameters:
+        -----------
+        - game_deck (Deck or Shoe): The cards of the game. Default is a new deck of the rules (a single Deck).
+        - pacer: The pacer making the game's pauses (see pacing.py). Default is a RealTimePacer.
+        - player (Player): The human player. Default is a new Player taking console input.
+        - listener (RoundListener): The observer of the round events (see engine.py). Default is a no-op listener.
+        - rng: Random number generator used for the shuffles, the seating and the bots' names and bets.
+          Default is the random module; pass a seeded random.Random to make the session reproducible.
+        - rules (RuleSet): The rules of the game: bet and bot limits, dealer action and payouts. Default is CLASSIC.
+        """
+        self.rng = rng
+        self.rules = rules
+        self.max_players_count = rules.max_bots
+        self.min_players_count = rules.min_bots
+        self.game_deck = game_deck if game_deck is not None else rules.new_deck(rng)
+        self.pacer = pacer if pacer is not None else RealTimePacer()
+        self.game_dealer = Dealer(rng=rng, rules=rules)
         self.bot_players = []
-        self.player = Player()
+        self.bot_names = list(BOT_NAMES)
+        self.player = player if player is not None else Player()
+        self.player.apply_rules(rules)
         self.all_players = []
+        self.listener = listener if listener is not None else RoundListener()
+        self.rounds_played = 0
+        self.round_players = []
+        self.settlement = None
+        self.passes = 0
 
     def clear_and_deal_cards(self):
         """
@@ -68,65 +101,73 @@ class Game:
         """
         Resets the game state to the initial state.
         """
-        self.game_deck = Deck()
-        self.game_dealer = Dealer()
+        self.game_deck.prepare_round()
+        self.game_dealer = Dealer(rng=self.rng, rules=self.rules)
         self.bot_players = []
         self.player.player_cards = self.clear_and_deal_cards()
         self.all_players = []
 
-        time.sleep(2)
+        self.pacer.pause(2)
         print('*' * 100)
         print('\nGlad to see you again! You are thr lucky one if you still have some money😎')
-        time.sleep(3)
+        self.pacer.pause(3)
 
     def reset_room(self):
         """
         Resets the game state to the initial state.
         """
-        self.game_deck = Deck()
+        self.game_deck.prepare_round()
+        self.settlement = None
         for player in self.all_players:
             player.clear_cards()
             player.deal_cards(self.game_deck)
             player.reveal_card(status=True)
 
-        time.sleep(2)
+        self.pacer.pause(2)
         print('*' * 100)
         print('\nSeems you\'re fall in love with the dealer!'
               '\nHow else to explain that you are still here?! OK, another game 😎')
-        time.sleep(3)
+        self.pacer.pause(3)
 
-    def _generate_bot_players(self):
+    def seat_bots(self, count=None):
         """
-        Generates a specified number of bot players based on user input.
+        Seats a number of bot players at the table, asking the player for it if it isn't given.
+
+        Parameters:
+        -----------
+        - count (int): Number of bot players. If None, the player is asked for it.
 
         Returns:
         --------
         list: List of bot players.
         """
-        while True:
+        while count is None:
             try:
-                players_count = int(input(
+                count = int(input(
                     f'\n➡️ Enter the number of computer players ({self.min_players_count}-{self.max_players_count}) '
                     f'you wanna play with: '))
-                if not (self.min_players_count <= players_count <= self.max_players_count):
+                if not (self.min_players_count <= count <= self.max_players_count):
                     raise NumberException
             except (ValueError, TypeError, AttributeError):
                 print('‼️Can\'t accept incorrect input. Try again!\n')
             except NumberException:
                 print('‼️Your number of players is not in the accessible range. Please, try again!\n')
-            else:
-                break
+                count = None
 
-        for bot_player in range(players_count):
-            bot_player = BotPlayer()
+        if len(self.bot_names) < count:
+            self.bot_names = list(BOT_NAMES)
+        for bot_player in range(count):
+            bot_player = BotPlayer(self.rng, self.bot_names)
+            bot_player.apply_rules(self.rules)
             self.bot_players.append(bot_player)
 
-        time.sleep(1)
+        self.pacer.pause(1)
         print('🔎Looking for your opponents...')
-        time.sleep(2)
+        self.pacer.pause(2)
         print('👥 You will play with {}'.format(', '.join([bot.name for bot in self.bot_players])))
         self.all_players = self.list_of_players()
-        time.sleep(2)
+        self.listener.on_seating(self.all_players)
+        self.pacer.pause(2)
         return self.bot_players
 
     def list_of_players(self):
@@ -137,10 +178,11 @@ class Game:
         --------
         list: List of all players in the game.
         """
+        self.settlement = None
         self.all_players = [self.player, self.game_dealer]
         for bot_in_list in self.bot_players:
             self.all_players.append(bot_in_list)
-        shuffle(self.all_players)  # change players places
+        self.rng.shuffle(self.all_players)  # change players places
         return self.all_players
 
     def open_hidden_cards(self):
@@ -160,55 +202,141 @@ class Game:
             if not player.count_player_points():
                 player.deal_cards(self.game_deck)
 
-        time.sleep(2)
+        self.pacer.pause(2)
         print('😎DONE')
-        time.sleep(2)
+        self.pacer.pause(2)
         print('\nYou can look over your cards...\n')
-        time.sleep(2)
+        self.pacer.pause(2)
         self.print_all_players_cards()
         self.open_hidden_cards()
 
     def print_all_players_cards(self):
         """
-        Prints the hand cards of all players.
+        Prints the hand cards of all players, every hand of the players who split a pair.
         """
-        for player in self.all_players:
-            cards = player.print_cards()
-            if not cards:
-                print(f'👀{player.name} looked over the playing cards')
-            else:
-                print(f'😎{player.name} has cards:\n{cards}')
-            if not player.hidden_card:
-                print(f'⚪️Points: {player.player_points}\n')
-            time.sleep(2)
+        for player in self.players_in_play():
+            hands = player.hands
+            for hand in range(hands.count):
+                hands.select(player, hand)
+                cards = player.print_cards()
+                label = f' (hand {hand + 1})' if hands.count > 1 else ''
+                if not cards:
+                    print(f'👀{player.name} looked over the playing cards')
+                else:
+                    print(f'😎{player.name} has cards{label}:\n{cards}')
+                if not player.hidden_card:
+                    print(f'⚪️Points: {player.player_points}\n')
+                self.pacer.pause(2)
+            hands.select(player, 0)
+
+    def players_in_play(self):
+        """
+        Returns the players with a hand still in the round: the busted ones keep their seats but leave the round.
+
+        Returns:
+        --------
+        list: The players in the seating order.
+        """
+        if self.settlement is None:
+            return self.all_players
+        return [self.round_players[seat] for seat in self.settlement.seats_in_play()]
 
     def making_a_bets(self):
         """
         Prompts all players to make their bets.
         """
         print('\n💰TIME FOR BETS💰\n')
+        self.round_players = list(self.all_players)
+        self.settlement = None
+        self.passes = 0
         for player in self.all_players:
             player.make_a_bet()
-            time.sleep(2)
+            self.listener.on_bet(player, player.player_bet)
+            self.pacer.pause(2)
+        self.settlement = Settlement([player.player_bet for player in self.round_players],
+                                     self.round_players.index(self.game_dealer), self.rules.payouts,
+                                     self.rules.max_hands)
+
+    def offer_insurance(self):
+        """
+        Offers insurance to the players when the dealer shows an ace. The insurance bets are settled at once:
+        the dealer's first two cards are known.
+        """
+        rules = self.rules
+        dealer = self.game_dealer
+        bets = [player.insurance_bet(rules, dealer) for player in self.round_players]
+        if not any(bets):
+            return
+        print('\n🛡The DEALER shows an ace. Insurance, anyone?\n')
+        dealer_blackjack = dealer.is_blackjack()
+        for seat, (player, bet) in enumerate(zip(self.round_players, bets)):
+            if bet and player.take_insurance():
+                player.insure(self.settlement, seat, bet, dealer_blackjack, rules, self.listener)
+                print(f'{player.name} takes insurance for {bet}$')
+                self.pacer.pause(1)
+
+    def pending_hands(self, player):
+        """
+        Returns the hands of a player that take a decision in the next pass (asking_card).
+
+        Parameters:
+        -----------
+        - player (AbstractPlayer): A player of the round.
+
+        Returns:
+        --------
+        list: (points, allowed actions) of every hand, in the order of the decisions.
+        """
+        settlement = self.settlement
+        seat = self.round_players.index(player)
+        hands = player.hands
+        pending = []
+        for hand in range(hands.count):
+            if settlement.active[hand * settlement.seats + seat] and not hands.done[hand]:
+                hands.select(player, hand)
+                pending.append((player.player_points, player.allowed_actions(self.rules)))
+        hands.select(player, 0)
+        return pending
 
     def asking_card(self):
         """
-        Asks each player whether they want to hit or stand and adds cards accordingly.
+        Asks each hand still in the round for its action and adds cards accordingly.
+        The hands made by a split take their first decision in the next pass.
 
         Returns:
         --------
-        list: List of True/False values indicating whether each player chose to hit.
+        list: List of True/False values indicating whether each hand took a card.
         """
         answers = []
-        for player in self.all_players:
-            if player.hit_or_stand():
-                player.add_card(self.game_deck.get_card())
-                answers.append(True)
-            else:
-                answers.append(False)
-            time.sleep(2)
+        settlement = self.settlement
+        active = settlement.active
+        for seat, player in enumerate(self.round_players):
+            hands = player.hands
+            for hand in range(hands.count):
+                if not active[hand * settlement.seats + seat] or hands.done[hand]:
+                    continue
+                hands.select(player, hand)
+                action = player.choose_action(player.allowed_actions(self.rules))
+                hit = action != STAND
+                self.listener.on_decision(player, hit)
+                if action == HIT:
+                    self._deal_card(player)
+                elif action == DOUBLE:
+                    player.double_down(self.settlement, seat, hand, self._deal_card, self.listener)
+                    print(f'{player.name} doubles down, the bet is {player.player_bet}$')
+                elif action == SPLIT:
+                    player.split_pair(self.settlement, seat, hand, self._deal_card, self.listener)
+                    print(f'{player.name} splits the pair')
+                answers.append(hit)
+                self.pacer.pause(2)
+            hands.select(player, 0)
         return answers
 
+    def _deal_card(self, player):
+        card = self.game_deck.get_card()
+        player.add_card(card)
+        self.listener.on_deal(player, card)
+
     def check_winner(self):
         """
         Checks for winners and losers based on game conditions.
@@ -217,90 +345,136 @@ class Game:
         --------
         bool: True if the game has winners, False otherwise.
         """
-        dealer_points = self.game_dealer.count_player_points()
+        settlement = self.settlement
+        players = self.round_players
+        over = settlement.check(settlement.points(players))
+        seats = settlement.seats
 
-        losers = [player for player in self.all_players if player.player_points > 21 and not isinstance(player, Dealer)]
-        if losers:
+        if settlement.busted:
             print('\n')
-            for loser in losers:
-                print(f'☠️{loser.name}, you are busted! Hit the road!')
-                self.all_players.remove(loser)
-                time.sleep(1)
-
-        if dealer_points > 21:
+            for entry in settlement.busted:
+                print(f'☠️{players[entry % seats].name}, you are busted! Hit the road!')
+                self.pacer.pause(1)
+        if not over:
+            return False  # гра триває
+
+        self._pay_prizes()
+        outcomes = settlement.outcomes
+        if outcomes[settlement.dealer] == BUST:
             print('\n🤑The DEALER is busted! All players in the game are winners!')
-            self.all_players.remove(self.game_dealer)
-            for player in self.all_players:
-                prize = (1.5 * player.player_bet).__round__(0)
-                print(f'{player.name}, congrats! Take your prize {prize}$')
-                player.player_money += prize
-                time.sleep(1)
-            return True  # гравці виграли
-
-        winners21 = [player for player in self.all_players if player.player_points == 21]
-        if winners21:
-            for winner21 in winners21:
-                print(f'\n🎉{winner21.name}, you are a winner with 21 points!')
-
-                prize = (2 * winner21.player_bet).__round__(0)
-                winner21.player_money += prize  # виграш з бету + сам бет
-
-                print(f'{winner21.name}, your prize is {prize}! Take your money!')
-
-            return True  # є переможець
-
-        if len(self.all_players) == 1 and self.all_players[0].player_points < 21:
-            prize = (1.5 * self.all_players[0].player_bet).__round__(0)
-            print(f'\n🎉{self.all_players[0].name}, you are the only winner! '
-                  f'Your prize is {prize}! Take your money!')
-            self.all_players[0].player_money += prize
+            for entry, outcome in enumerate(outcomes):
+                if outcome == WIN:
+                    print(f'{players[entry % seats].name}, congrats! Take your prize {settlement.prizes[entry]}$')
+                    self.pacer.pause(1)
+        elif TWENTY_ONE in outcomes:
+            for entry, outcome in enumerate(outcomes):
+                if outcome == TWENTY_ONE:
+                    name = players[entry % seats].name
+                    print(f'\n🎉{name}, you are a winner with 21 points!')
+                    print(f'{name}, your prize is {settlement.prizes[entry]}! Take your money!')
+        else:
+            entry = outcomes.index(WIN)
+            print(f'\n🎉{players[entry % seats].name}, you are the only winner! '
+                  f'Your prize is {settlement.prizes[entry]}! Take your money!')
+        return True  # є переможець
+
+    def _pay_prizes(self):
+        """
+        Pays the payout vector of the settled round to the players (all their hands and insurance).
+        """
+        for player, prize in zip(self.round_players, self.settlement.seat_prizes()):
+            player.player_money += prize
+
+    def check_round(self):
+        """
+        Announces and checks the current state of the round.
+
+        Returns:
+        --------
+        bool: True if the round has winners and is over, False otherwise.
+        """
+        print('\nSo, what do we have?..')
+        self.pacer.pause(2)
+        if self.check_winner():
+            self.finish_round()
             return True
+        return False
 
-        return False  # гра триває
+    def hit_pass(self):
+        """
+        Asks all players for one more card and finishes the round if nobody wants it.
+
+        Returns:
+        --------
+        bool: True if the round is over, False otherwise.
+        """
+        print('\n😎Anyone want to take one more card?\n')
+        self.pacer.pause(2)
+        self.passes += 1
+        answers = self.asking_card()
+
+        if not any(answers):  # Якщо всі елементи списку False
+            print('\n🏁Let\'s finish our game\n')
+            self.pacer.pause(2)
+            self.distribute_prizes()
+            self.finish_round()
+            return True
+        else:
+            self.pacer.pause(2)
+            print('\nLet\'s look over our cards!\n')
+            self.pacer.pause(2)
+            self.print_all_players_cards()
+            return False
+
+    def finish_round(self):
+        """
+        Reports the outcomes of the round to the listener. Players without a prize lost the round.
+
+        Returns:
+        --------
+        RoundResult: The structured result of the round.
+        """
+        self.rounds_played += 1
+        results = []
+        settlement = self.settlement
+        seat_bets = settlement.seat_bets()
+        seat_prizes = settlement.seat_prizes()
+        for seat, player in enumerate(self.round_players):
+            outcome, prize = settlement.outcomes[seat], seat_prizes[seat]
+            self.listener.on_outcome(player, outcome, prize)
+            results.append(SeatResult(player.name, seat_bets[seat], player.player_points, outcome, prize,
+                                      player.player_money, hand_results(settlement, seat, player)))
+        result = RoundResult(self.rounds_played, results, self.game_dealer.player_points, self.passes)
+        self.listener.on_round(self.round_players, result)
+        return result
 
     def game_round(self):
         """
         Executes a round of the game, including player turns and checking for winners.
         """
         while True:
-            print('\nSo, what do we have?..')
-            time.sleep(2)
-
-            winners_list = self.check_winner()
-            if winners_list:
+            if self.check_round() or self.hit_pass():
                 break
-            else:
-                print('\n😎Anyone want to take one more card?\n')
-                time.sleep(2)
-                answers = self.asking_card()
-
-                if not any(answers):  # Якщо всі елементи списку False
-                    print('\n🏁Let\'s finish our game\n')
-                    time.sleep(2)
-                    self.distribute_prizes()
-                    break
-                else:
-                    time.sleep(2)
-                    print('\nLet\'s look over our cards!\n')
-                    time.sleep(2)
-                    self.print_all_players_cards()
 
     def distribute_prizes(self):
         """
         Distributes prizes to the winners based on game outcomes.
         """
-        for player in self.all_players:
-            if 21 > player.player_points > self.game_dealer.player_points:
-                prize = (1.5 * player.player_bet).__round__(0)
-                player.player_money += prize  # виграш з бету + сам бет
+        settlement = self.settlement
+        players = self.round_players
+        points = settlement.points(players)
+        settlement.stand(points)
+        self._pay_prizes()
+        for entry, outcome in enumerate(settlement.outcomes):
+            player = players[entry % settlement.seats]
+            if outcome == WIN:
                 print(f'🏆{player.name}, you beat the DEALER\n'
-                      f'{player.name}, your prize is {prize}! Congrats and take your money!')
-            elif player.player_points == self.game_dealer.player_points and not isinstance(player, Dealer):
-                player.player_money += player.player_bet
+                      f'{player.name}, your prize is {settlement.prizes[entry]}! Congrats and take your money!')
+            elif outcome == PUSH:
                 print(
-                    f'🤜🤛 OMG! It\'s a hit! {player.name} and {self.game_dealer.name}, you have the same points ({player.player_points})!\n'
-                    f'{player.name}, take your bet {player.player_bet}$ only back. Good luck next time!')
-                time.sleep(1)
+                    f'🤜🤛 OMG! It\'s a hit! {player.name} and {self.game_dealer.name}, you have the same points ({points[entry]})!\n'
+                    f'{player.name}, take your bet {settlement.bets[entry]}$ only back. Good luck next time!')
+                self.pacer.pause(1)
 
     def play_again_prompt(self):
         """
@@ -318,16 +492,57 @@ class Game:
             except ValueError:
                 print('‼️Invalid input. Please enter "y" or "n".')
             else:
-                if play_again_input == 'y':
-                    if self.player.player_money < self.player.min_bet:
-                        print("☠️ Sorry, you don't have enough money for the minimum bet. Game over.")
-                        return False
-                    else:
-                        if self.game_dealer not in self.all_players:
-                            self.all_players.append(self.game_dealer)
-                        return True
-                else:
-                    return False
+                return self.play_again(play_again_input)
+
+    def play_again(self, play_again_input):
+        """
+        Applies the player's answer to the play again question.
+
+        Parameters:
+        -----------
+        - play_again_input (str): 'y' or 'n'.
+
+        Returns:
+        --------
+        bool: True if the game goes on, False otherwise.
+        """
+        if play_again_input == 'y':
+            if self.player.player_money < self.player.min_bet:
+                print("☠️ Sorry, you don't have enough money for the minimum bet. Game over.")
+                return False
+            else:
+                return True
+        else:
+            return False
+
+    def can_stay_in_room(self):
+        """
+        Checks if the player can play again in the same room.
+
+        Returns:
+        --------
+        bool: True if the room still has bots and the player, and everyone can make the minimum bet.
+        """
+        return (len(self.all_players) > 2 and self.player in self.all_players
+                and all(player.player_money >= player.min_bet for player in self.all_players))
+
+    def stay_in_room(self, room_input):
+        """
+        Applies the player's answer to the stay in this room question.
+
+        Parameters:
+        -----------
+        - room_input (str): 'y' or 'n'.
+
+        Returns:
+        --------
+        bool: True if the player stays in the room, False otherwise.
+        """
+        if room_input == 'y':
+            self.reset_room()
+            return True
+        else:
+            return False
 
     def room_promt(self):
         """
@@ -337,7 +552,7 @@ class Game:
         --------
         bool: True if the player wants to play again, False otherwise.
         """
-        if len(self.all_players) > 2 and self.player in self.all_players:
+        if self.can_stay_in_room():
             while True:
                 try:
                     room_input = input('\n➡️ Stay in this room? (y/n): ').lower().strip()
@@ -346,30 +561,54 @@ class Game:
                 except ValueError:
                     print('‼️Invalid input. Please enter "y" or "n".')
                 else:
-                    if room_input == 'y':
-                        self.reset_room()
-                        return True
-                    else:
-                        return False
+                    return self.stay_in_room(room_input)
         else:
             return False
 
-    def start_game(self):
+    def start_game(self, checkpointer=None):
         """
         Starts the main loop of the Blackjack game.
+
+        Parameters:
+        -----------
+        - checkpointer (Checkpointer): Saves the game before every round (see checkpoint.py). Default is None.
         """
         print('👋 Hello! Nice to see you here:) Let\'s start our BLACKJACK GAME!\n'
               'Follow the tips in the game and break a leg 😎')
-        time.sleep(3)
-        self._generate_bot_players()
+        self.pacer.pause(3)
+        self.seat_bots()
+        self.play_rounds(checkpointer)
+
+    def resume_game(self, checkpointer=None):
+        """
+        Resumes the main loop of a game restored from a checkpoint.
 
+        Parameters:
+        -----------
+        - checkpointer (Checkpointer): Saves the game before every round (see checkpoint.py). Default is None.
+        """
+        print(f'👋 Welcome back! You have ${self.player.player_money}, let\'s go on with our BLACKJACK GAME!')
+        self.pacer.pause(3)
+        self.play_rounds(checkpointer)
+
+    def play_rounds(self, checkpointer=None):
+        """
+        Plays rounds until the player leaves the game.
+
+        Parameters:
+        -----------
+        - checkpointer (Checkpointer): Saves the game before every round (see checkpoint.py). Default is None.
+        """
         while True:
+            if checkpointer is not None:
+                checkpointer.save(self)
             self.making_a_bets()
             self.initial_deal()
-            time.sleep(3)
+            self.pacer.pause(3)
             print('\nOK, guys, open your cards!\n')
-            time.sleep(3)
+            self.pacer.pause(3)
             self.print_all_players_cards()
+            self.offer_insurance()
             self.game_round()
 
             print(f"\n💰Your current balance: ${self.player.player_money}")
@@ -380,4 +619,4 @@ class Game:
             else:
                 if not self.room_promt():
                     self.reset_game()
-                    self._generate_bot_players()
+                    self.seat_bots()
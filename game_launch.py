@@ -1,17 +1,31 @@
 """
 game_launch.py: Launches the Blackjack game.
 
+The pace of the game's pauses is chosen per deployment with the --pace option or the BLACKJACK_PACE
+environment variable: 'real' (the default), 'instant' or 'scaled:SPEED' (see pacing.py).
+
 This module includes the following:
 - Main script for launching the Blackjack game.
 """
 
+import argparse
+
 from game import Game
+from pacing import PACE_VARIABLE, pacer_from_spec
 
 if __name__ == '__main__':
     """
     Main script for launching the Blackjack game.
 
-    Creates an instance of the Game class and starts the Blackjack game.
+    Creates an instance of the Game class with the chosen pacer and starts the Blackjack game.
     """
-    current_game = Game()
+    parser = argparse.ArgumentParser(description='Blackjack game')
+    parser.add_argument('--pace', default=None,
+                        help=f"real, instant or scaled:SPEED (default: ${PACE_VARIABLE} or real)")
+    options = parser.parse_args()
+    try:
+        pacer = pacer_from_spec(options.pace)
+    except ValueError as error:
+        parser.error(str(error))
+    current_game = Game(pacer=pacer)
     current_game.start_game()
@@ -0,0 +1,518 @@
+"""
+history.py: Records every played round into an append-only hand-history log.
+
+A log file starts with a short header followed by length-prefixed binary records:
+- a session record holds the seed, the name of the rule set and the cards of a reproducible Game session
+  (see replay.py),
+- a table record is written when the players take their seats at a new table, with the number of bots,
+- a name record maps a small number to a player's name the first time the name is seen,
+- a round record holds the round number, the dealer's points and one entry per seat: the player's name
+  number, role, bet, initial bet, dealt card codes, actions (stand, hit, double down or split, two bits each),
+  insurance flag, final points, outcome, prize and money after the round; a seat that split a pair also gets
+  the bet, cards, points, outcome and prize of every hand.
+
+A round of a full table (four bots, the dealer and the player) takes about 175 bytes. Records go through a buffered file, so writing
+a round is a few struct.pack calls. The log can be read back as a stream of RoundRecord objects or
+exported to JSON Lines.
+
+This module includes the following classes and functions:
+- SeatRecord: The history of a single seat in a round.
+- RoundRecord: The history of a round.
+- HandHistoryWriter: Appends round records to a log file.
+- MemoryHistory: Keeps the records of a HandHistoryListener in memory instead of a file.
+- HandHistoryListener: RoundListener that writes every round of a Game or SimulationEngine to a log.
+- read_events: Reads all the records of a log file back as a stream.
+- read_history: Reads a log file back as a stream of RoundRecord objects.
+- export_jsonl: Exports a log file to JSON Lines.
+"""
+
+import json
+import os
+from struct import Struct
+
+from engine import OUTCOMES, RoundListener
+from players import Dealer, Player, STAND, HIT, DOUBLE, SPLIT
+from rules import CLASSIC
+
+MAGIC = b'BJHH'
+VERSION = 4
+
+ROLES = ('player', 'dealer', 'bot')
+PLAYER, DEALER, BOT = range(len(ROLES))
+
+NAME_RECORD = 1
+ROUND_RECORD = 2
+SESSION_RECORD = 3
+TABLE_RECORD = 4
+
+_HEADER = Struct('<4sB')
+_LENGTH = Struct('<H')
+_NAME = Struct('<BH')  # kind, name number; followed by the UTF-8 name
+_ROUND = Struct('<BIBB')  # kind, round number, dealer points, seats count
+# kind, decks count (0 for a single Deck), penetration, rules name length; followed by the UTF-8 rules name and seed
+_SESSION = Struct('<BBdB')
+_TABLE = Struct('<BB')  # kind, bots count
+# name number, role, outcome, points, bet, initial bet, prize, money, cards count, actions count, insurance flag,
+# hands count (0 for a seat that didn't split); followed by the card codes, the action bits and the hands
+_SEAT = Struct('<HBBBIIiiBBBB')
+_HAND = Struct('<BBIiB')  # outcome, points, bet, prize, cards count; followed by the card codes
+_OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+_ACTION_LETTERS = {STAND: 's', HIT: 'h', DOUBLE: 'd', SPLIT: 'p'}
+
+
+def _unpack_actions(bits, actions_count):
+    """
+    Returns the list of the actions packed two bits each into an integer, the first one in the lowest bits.
+    """
+    return [bits >> 2 * index & 3 for index in range(actions_count)]
+
+
+def role_of(player):
+    """
+    Returns the role code of a player object.
+    """
+    if isinstance(player, Dealer):
+        return DEALER
+    if isinstance(player, Player):
+        return PLAYER
+    return BOT
+
+
+class SeatRecord:
+    """
+    The history of a single seat in a round.
+
+    Attributes:
+    -----------
+    - name (str): The name of the player.
+    - role (int): One of PLAYER, DEALER or BOT.
+    - bet (int): The bets made by the player (every hand, doubles and insurance included).
+    - initial_bet (int): The bet made before the cards were dealt.
+    - cards (bytes): Codes of the cards of the player's (first) hand in the dealing order (see deck.CARDS).
+    - actions (list): The player's actions (STAND, HIT, DOUBLE or SPLIT) in the order they were made.
+    - points (int): The final points of the player's (first) hand.
+    - outcome (str): One of engine.OUTCOMES, for the first hand.
+    - prize (int): The amount paid back to the player (including the bets).
+    - money (int): The player's money after the round.
+    - insurance (bool): True if the player took insurance.
+    - hands (list): (bet, card codes, points, outcome, prize) of every hand of a seat that split a pair,
+      None otherwise.
+    """
+
+    def __init__(self, name, role, bet, initial_bet, cards, actions, points, outcome, prize, money, insurance=False,
+                 hands=None):
+        self.name = name
+        self.role = role
+        self.bet = bet
+        self.initial_bet = initial_bet
+        self.cards = cards
+        self.actions = actions
+        self.points = points
+        self.outcome = outcome
+        self.prize = prize
+        self.money = money
+        self.insurance = insurance
+        self.hands = hands
+
+    def to_dict(self):
+        """
+        Returns the seat as a JSON-serializable dict.
+        """
+        seat = {'name': self.name, 'role': ROLES[self.role], 'bet': self.bet,
+                'initial_bet': self.initial_bet, 'cards': list(self.cards),
+                'actions': ''.join(_ACTION_LETTERS[action] for action in self.actions), 'points': self.points,
+                'outcome': self.outcome, 'prize': self.prize, 'money': self.money, 'insurance': self.insurance}
+        if self.hands is not None:
+            seat['hands'] = [{'bet': bet, 'cards': list(cards), 'points': points, 'outcome': outcome,
+                              'prize': prize} for bet, cards, points, outcome, prize in self.hands]
+        return seat
+
+    def __eq__(self, other):
+        return isinstance(other, SeatRecord) and self.__dict__ == other.__dict__
+
+    def __repr__(self):
+        return (f'SeatRecord(name={self.name!r}, bet={self.bet}, points={self.points}, '
+                f'outcome={self.outcome!r}, prize={self.prize})')
+
+
+class RoundRecord:
+    """
+    The history of a round.
+
+    Attributes:
+    -----------
+    - number (int): The number of the round in the session.
+    - dealer_points (int): The final points of the dealer.
+    - seats (list): List of SeatRecord objects in the seating order.
+    """
+
+    def __init__(self, number, dealer_points, seats):
+        self.number = number
+        self.dealer_points = dealer_points
+        self.seats = seats
+
+    def to_dict(self):
+        """
+        Returns the round as a JSON-serializable dict.
+        """
+        return {'round': self.number, 'dealer_points': self.dealer_points,
+                'seats': [seat.to_dict() for seat in self.seats]}
+
+    def __eq__(self, other):
+        return isinstance(other, RoundRecord) and self.__dict__ == other.__dict__
+
+    def __repr__(self):
+        return f'RoundRecord(number={self.number}, dealer_points={self.dealer_points}, seats={self.seats!r})'
+
+
+class HandHistoryWriter:
+    """
+    Appends round records to a log file through a buffered file.
+
+    Attributes:
+    -----------
+    - path (str): The path of the log file.
+    - rounds_written (int): Number of rounds written by the writer.
+
+    Methods:
+    --------
+    - write: Appends a round record.
+    - write_seats: Appends a round given as plain tuples.
+    - write_session: Appends a session record.
+    - write_table: Appends a table record.
+    - flush: Writes the buffered records to the file.
+    - close: Flushes and closes the file.
+    """
+
+    def __init__(self, path, buffer_size=1 << 16):
+        """
+        Opens a log file for appending, writing its header if the file is new.
+
+        Parameters:
+        -----------
+        - path (str): The path of the log file.
+        - buffer_size (int): Size of the write buffer in bytes. Default is 64 KiB.
+        """
+        self.path = path
+        self.rounds_written = 0
+        self.names = {}
+        if os.path.exists(path) and os.path.getsize(path):
+            # the names of an existing log are numbered again from its name records
+            for kind, payload in _records(path):
+                if kind == NAME_RECORD:
+                    self.names[payload[_NAME.size:].decode()] = _NAME.unpack_from(payload)[1]
+            self.file = open(path, 'ab', buffering=buffer_size)
+        else:
+            self.file = open(path, 'wb', buffering=buffer_size)
+            self.file.write(_HEADER.pack(MAGIC, VERSION))
+
+    def _write_record(self, payload):
+        self.file.write(_LENGTH.pack(len(payload)) + payload)
+
+    def _name_number(self, name):
+        number = self.names.get(name)
+        if number is None:
+            number = self.names[name] = len(self.names)
+            self._write_record(_NAME.pack(NAME_RECORD, number) + name.encode())
+        return number
+
+    def write(self, record):
+        """
+        Appends a round record.
+
+        Parameters:
+        -----------
+        - record (RoundRecord): The round to write.
+        """
+        seats = []
+        for seat in record.seats:
+            bits = 0
+            for index, action in enumerate(seat.actions):
+                bits |= action << 2 * index
+            hands = seat.hands and [(bet, bytes(cards), points, outcome, prize)
+                                    for bet, cards, points, outcome, prize in seat.hands]
+            seats.append((seat.name, seat.role, seat.bet, seat.initial_bet, bytes(seat.cards), bits, len(seat.actions),
+                          seat.points, seat.outcome, seat.prize, seat.money, seat.insurance, hands))
+        self.write_seats(record.number, record.dealer_points, seats)
+
+    def write_seats(self, number, dealer_points, seats):
+        """
+        Appends a round given as plain tuples, without building the record objects.
+
+        Parameters:
+        -----------
+        - number (int): The number of the round.
+        - dealer_points (int): The final points of the dealer.
+        - seats (list): Tuples of (name, role, bet, initial bet, card codes, action bits, actions count, points,
+          outcome, prize, money, insurance, hands). The first action is in the lowest two bits; hands is None or
+          the (bet, card codes, points, outcome, prize) of every hand of a seat that split a pair.
+        """
+        parts = [_ROUND.pack(ROUND_RECORD, number, dealer_points, len(seats))]
+        for name, role, bet, initial_bet, cards, bits, actions_count, points, outcome, prize, money, insurance, \
+                hands in seats:
+            parts.append(_SEAT.pack(self._name_number(name), role, _OUTCOME_CODES[outcome], points, bet, initial_bet,
+                                    int(prize), int(money), len(cards), actions_count, insurance,
+                                    len(hands) if hands else 0))
+            parts.append(cards)
+            parts.append(bits.to_bytes((actions_count + 3) // 4, 'little'))
+            for hand_bet, hand_cards, hand_points, hand_outcome, hand_prize in hands or ():
+                parts.append(_HAND.pack(_OUTCOME_CODES[hand_outcome], hand_points, hand_bet, int(hand_prize),
+                                        len(hand_cards)))
+                parts.append(hand_cards)
+        self._write_record(b''.join(parts))
+        self.rounds_written += 1
+
+    def write_session(self, seed, decks_count=0, penetration=0.0, rules_name=CLASSIC.name):
+        """
+        Appends a session record.
+
+        Parameters:
+        -----------
+        - seed (str): The seed of the session's random number generator.
+        - decks_count (int): Number of decks in the Shoe, or 0 for a single Deck. Default is 0.
+        - penetration (float): The penetration of the Shoe. Default is 0.0.
+        - rules_name (str): The name of the session's rule set (see rules.RULE_SETS). Default is CLASSIC's.
+        """
+        rules_name = rules_name.encode()
+        self._write_record(_SESSION.pack(SESSION_RECORD, decks_count, penetration, len(rules_name))
+                           + rules_name + str(seed).encode())
+
+    def write_table(self, bots_count):
+        """
+        Appends a table record.
+
+        Parameters:
+        -----------
+        - bots_count (int): Number of bot players at the new table.
+        """
+        self._write_record(_TABLE.pack(TABLE_RECORD, bots_count))
+
+    def flush(self):
+        """
+        Writes the buffered records to the file.
+        """
+        self.file.flush()
+
+    def close(self):
+        """
+        Flushes and closes the file.
+        """
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MemoryHistory:
+    """
+    Keeps the records of a HandHistoryListener in memory instead of a file.
+
+    Attributes:
+    -----------
+    - events (list): The (kind, value) records in the form returned by read_events.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def write_seats(self, number, dealer_points, seats):
+        records = [SeatRecord(name, role, bet, initial_bet, cards, _unpack_actions(bits, actions_count), points,
+                              outcome, int(prize), int(money), bool(insurance),
+                              hands and [(hand_bet, hand_cards, hand_points, hand_outcome, int(hand_prize))
+                                         for hand_bet, hand_cards, hand_points, hand_outcome, hand_prize in hands])
+                   for name, role, bet, initial_bet, cards, bits, actions_count, points, outcome, prize, money,
+                   insurance, hands in seats]
+        self.events.append((ROUND_RECORD, RoundRecord(number, dealer_points, records)))
+
+    def write_session(self, seed, decks_count=0, penetration=0.0, rules_name=CLASSIC.name):
+        self.events.append((SESSION_RECORD, (str(seed), decks_count, penetration, rules_name)))
+
+    def write_table(self, bots_count):
+        self.events.append((TABLE_RECORD, bots_count))
+
+
+class HandHistoryListener(RoundListener):
+    """
+    RoundListener that writes every round of a Game or SimulationEngine to a hand-history log.
+
+    The bets, cards, points and outcomes are taken from the round result and the players' hands,
+    only the initial bets, the actions and the insurance bets are collected while the round is played.
+    A double down or a split is reported as a hit decision followed by on_double or on_split, which turn that
+    hit into the actual action.
+
+    Attributes:
+    -----------
+    - writer (HandHistoryWriter or MemoryHistory): The writer of the log.
+    """
+
+    def __init__(self, writer):
+        """
+        Initializes a new listener.
+
+        Parameters:
+        -----------
+        - writer (HandHistoryWriter or MemoryHistory): The writer of the log.
+        """
+        self.writer = writer
+        self.bets = {}  # player -> initial bet
+        self.actions = {}  # player -> (action bits, actions count)
+        self.insured = set()
+
+    def on_bet(self, player, bet):
+        self.bets[player] = bet
+
+    def on_decision(self, player, hit):
+        bits, count = self.actions.get(player, (0, 0))
+        self.actions[player] = (bits | (HIT if hit else STAND) << 2 * count, count + 1)
+
+    def _replace_hit(self, player, action):
+        bits, count = self.actions[player]
+        self.actions[player] = (bits + ((action - HIT) << 2 * (count - 1)), count)
+
+    def on_double(self, player, bet):
+        self._replace_hit(player, DOUBLE)
+
+    def on_split(self, player, hand):
+        self._replace_hit(player, SPLIT)
+
+    def on_insurance(self, player, bet):
+        self.insured.add(player)
+
+    def on_round(self, players, result):
+        bets = self.bets
+        actions = self.actions
+        insured = self.insured
+        seats = []
+        for player, seat in zip(players, result.seats):
+            bits, count = actions.get(player, (0, 0))
+            hands = None
+            if seat.hands is not None:
+                hand_cards = player.hands.cards
+                hands = [(bet, bytes([card.code for card in (hand_cards[hand] if hand else player.player_cards)]),
+                          points, outcome, prize)
+                         for hand, (bet, points, outcome, prize) in enumerate(seat.hands)]
+            seats.append((seat.name, role_of(player), seat.bet, bets.get(player, seat.bet),
+                          bytes([card.code for card in player.player_cards]), bits, count, seat.points,
+                          seat.outcome, seat.prize, seat.money, player in insured, hands))
+        self.bets = {}
+        self.actions = {}
+        self.insured = set()
+        self.writer.write_seats(result.number, result.dealer_points, seats)
+
+    def on_seating(self, players):
+        self.writer.write_table(sum(role_of(player) == BOT for player in players))
+
+
+def _records(path):
+    """
+    Yields the (kind, payload) of every record of a log file.
+    """
+    with open(path, 'rb') as log_file:
+        header = log_file.read(_HEADER.size)
+        if len(header) < _HEADER.size or _HEADER.unpack(header) != (MAGIC, VERSION):
+            raise ValueError(f'{path} is not a hand-history log of version {VERSION}')
+        while True:
+            prefix = log_file.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            payload = log_file.read(length)
+            if len(payload) < length:
+                return  # the last record was cut short, e.g. by a crash while writing
+            yield payload[0], payload
+
+
+def _decode_round(payload, names):
+    number, dealer_points, seats_count = _ROUND.unpack_from(payload)[1:]
+    offset = _ROUND.size
+    seats = []
+    for _ in range(seats_count):
+        name, role, outcome, points, bet, initial_bet, prize, money, cards_count, actions_count, insurance, \
+            hands_count = \
+            _SEAT.unpack_from(payload, offset)
+        offset += _SEAT.size
+        cards = payload[offset:offset + cards_count]
+        offset += cards_count
+        bits_size = (actions_count + 3) // 4
+        actions = _unpack_actions(int.from_bytes(payload[offset:offset + bits_size], 'little'), actions_count)
+        offset += bits_size
+        hands = None
+        if hands_count:
+            hands = []
+            for _ in range(hands_count):
+                hand_outcome, hand_points, hand_bet, hand_prize, hand_cards_count = _HAND.unpack_from(payload, offset)
+                offset += _HAND.size
+                hands.append((hand_bet, payload[offset:offset + hand_cards_count], hand_points,
+                              OUTCOMES[hand_outcome], hand_prize))
+                offset += hand_cards_count
+        seats.append(SeatRecord(names[name], role, bet, initial_bet, cards, actions, points, OUTCOMES[outcome], prize,
+                                money, bool(insurance), hands))
+    return RoundRecord(number, dealer_points, seats)
+
+
+def read_events(path):
+    """
+    Reads all the records of a log file back as a stream. Name records are resolved, not yielded.
+
+    Parameters:
+    -----------
+    - path (str): The path of the log file.
+
+    Yields:
+    -------
+    tuple: (ROUND_RECORD, RoundRecord), (TABLE_RECORD, bots count) or
+    (SESSION_RECORD, (seed, decks count, penetration, rules name)) in the order they were written.
+    """
+    names = []
+    for kind, payload in _records(path):
+        if kind == NAME_RECORD:
+            names.append(payload[_NAME.size:].decode())
+        elif kind == ROUND_RECORD:
+            yield kind, _decode_round(payload, names)
+        elif kind == TABLE_RECORD:
+            yield kind, _TABLE.unpack(payload)[1]
+        elif kind == SESSION_RECORD:
+            decks_count, penetration, name_length = _SESSION.unpack_from(payload)[1:]
+            rules_name = payload[_SESSION.size:_SESSION.size + name_length].decode()
+            yield kind, (payload[_SESSION.size + name_length:].decode(), decks_count, penetration, rules_name)
+
+
+def read_history(path):
+    """
+    Reads a log file back as a stream of round records.
+
+    Parameters:
+    -----------
+    - path (str): The path of the log file.
+
+    Yields:
+    -------
+    RoundRecord: Every round of the log in the order it was written.
+    """
+    for kind, value in read_events(path):
+        if kind == ROUND_RECORD:
+            yield value
+
+
+def export_jsonl(path, jsonl_path):
+    """
+    Exports a log file to JSON Lines, one round per line.
+
+    Parameters:
+    -----------
+    - path (str): The path of the log file.
+    - jsonl_path (str): The path of the JSON Lines file.
+
+    Returns:
+    --------
+    int: Number of exported rounds.
+    """
+    rounds_count = 0
+    with open(jsonl_path, 'w', encoding='utf-8') as jsonl_file:
+        for record in read_history(path):
+            jsonl_file.write(json.dumps(record.to_dict(), ensure_ascii=False) + '\n')
+            rounds_count += 1
+    return rounds_count
@@ -0,0 +1,242 @@
+"""
+history_table.py: Memory-mapped analytics over hand histories (requires numpy).
+
+A hand-history log (see history.py) has variable-length records, so it is compacted once into a table file
+of fixed-width rows, one row per seat of every round. The table file is memory-mapped and exposed as a
+read-only NumPy structured array, so queries over tens of millions of rounds don't build any Python objects
+and only touch the pages of the columns they read.
+
+Table file layout: a header (magic, version, number of rows, offset of the names), the rows
+(ROW_DTYPE, little-endian) and the player names as UTF-8 lines.
+
+This module includes the following classes and functions:
+- ROW_DTYPE: The row of a seat in a round.
+- compact: Converts hand-history logs into a table file.
+- HandHistoryTable: A memory-mapped table file with aggregations matching the outcomes of Game.
+"""
+
+from struct import Struct
+
+import numpy as np
+
+from deck import CARDS
+from engine import OUTCOMES, WIN, TWENTY_ONE, PUSH, BUST
+from history import DEALER, read_history
+from players import STAND
+
+MAGIC = b'BJHT'
+VERSION = 1
+
+_HEADER = Struct('<4sB3xQQ')  # magic, version, rows count, names offset
+
+ROW_DTYPE = np.dtype([
+    ('round', '<u4'),
+    ('seat', 'u1'),
+    ('role', 'u1'),
+    ('name', '<u2'),
+    ('outcome', 'u1'),
+    ('points', 'u1'),
+    ('cards', 'u1'),
+    ('hits', 'u1'),
+    ('dealer_points', 'u1'),
+    ('dealer_upcard', 'u1'),
+    ('bet', '<u4'),
+    ('prize', '<i4'),
+    ('money', '<i4'),
+])
+
+OUTCOME_CODES = {outcome: code for code, outcome in enumerate(OUTCOMES)}
+_CARD_POINTS = bytes(card.points for card in CARDS)
+
+
+def compact(log_paths, table_path, chunk_rows=1 << 16):
+    """
+    Converts hand-history logs into a table file. The rounds of several logs are numbered on in their order.
+
+    Parameters:
+    -----------
+    - log_paths (str or list): The path(s) of the hand-history logs.
+    - table_path (str): The path of the table file.
+    - chunk_rows (int): Number of rows converted at once. Default is 65536.
+
+    Returns:
+    --------
+    int: Number of written rows.
+    """
+    if isinstance(log_paths, str):
+        log_paths = [log_paths]
+    names = {}
+    rows_count = 0
+    round_offset = 0
+    rows = []
+
+    with open(table_path, 'wb') as table_file:
+        table_file.write(_HEADER.pack(MAGIC, VERSION, 0, 0))
+        for log_path in log_paths:
+            last_round = 0
+            for record in read_history(log_path):
+                last_round = record.number
+                upcard = 0
+                for seat in record.seats:
+                    if seat.role == DEALER and len(seat.cards) > 1:
+                        upcard = _CARD_POINTS[seat.cards[1]]
+                for index, seat in enumerate(record.seats):
+                    rows.append((round_offset + record.number, index, seat.role,
+                                 names.setdefault(seat.name, len(names)), OUTCOME_CODES[seat.outcome],
+                                 seat.points, len(seat.cards), sum(action != STAND for action in seat.actions),
+                                 record.dealer_points, upcard, seat.bet, seat.prize, seat.money))
+                if len(rows) >= chunk_rows:
+                    table_file.write(np.array(rows, dtype=ROW_DTYPE).tobytes())
+                    rows_count += len(rows)
+                    rows = []
+            round_offset += last_round
+        table_file.write(np.array(rows, dtype=ROW_DTYPE).tobytes())
+        rows_count += len(rows)
+
+        names_offset = table_file.tell()
+        table_file.write(''.join(f'{name}\n' for name in names).encode())
+        table_file.seek(0)
+        table_file.write(_HEADER.pack(MAGIC, VERSION, rows_count, names_offset))
+    return rows_count
+
+
+class HandHistoryTable:
+    """
+    A memory-mapped table file with aggregations matching the outcomes of Game.check_winner
+    and Game.distribute_prizes.
+
+    Attributes:
+    -----------
+    - rows (ndarray): Read-only structured array (ROW_DTYPE) mapped onto the file.
+    - names (list): The player names, indexed by the 'name' column.
+
+    Methods:
+    --------
+    - outcome_counts: Returns the number of every outcome.
+    - win_rate_by_name: Returns the share of won rounds of every player.
+    - push_rate_by_name: Returns the share of pushed rounds of every player.
+    - bust_rate_by_upcard: Returns the bust rate for every dealer upcard.
+    - bankroll: Returns the money of a player after each of the player's rounds.
+    - drawdown_by_name: Returns the largest bankroll drawdown of every player.
+    """
+
+    def __init__(self, path):
+        """
+        Maps a table file.
+
+        Parameters:
+        -----------
+        - path (str): The path of the table file written by compact.
+        """
+        with open(path, 'rb') as table_file:
+            header = table_file.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:4] != MAGIC or header[4] != VERSION:
+                raise ValueError(f'{path} is not a hand-history table of version {VERSION}')
+            rows_count, names_offset = _HEADER.unpack(header)[2:]
+            table_file.seek(names_offset)
+            self.names = table_file.read().decode().splitlines()
+        if rows_count:
+            self.rows = np.memmap(path, dtype=ROW_DTYPE, mode='r', offset=_HEADER.size, shape=(rows_count,))
+        else:
+            self.rows = np.zeros(0, dtype=ROW_DTYPE)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _select(self, role=None):
+        if role is None:
+            return self.rows
+        return self.rows[self.rows['role'] == role]
+
+    def outcome_counts(self, role=None):
+        """
+        Returns the number of every outcome.
+
+        Parameters:
+        -----------
+        - role (int): Only count the seats of this role (history.PLAYER, DEALER or BOT). Default is all seats.
+
+        Returns:
+        --------
+        dict: Mapping of the outcome (see engine.OUTCOMES) to its number.
+        """
+        counts = np.bincount(self._select(role)['outcome'], minlength=len(OUTCOMES))
+        return dict(zip(OUTCOMES, counts.tolist()))
+
+    def win_rate_by_name(self):
+        """
+        Returns the share of rounds every player won (a win or 21; a push is not a win).
+
+        Returns:
+        --------
+        dict: Mapping of the player name to the win rate.
+        """
+        names = self.rows['name']
+        outcomes = self.rows['outcome']
+        won = (outcomes == OUTCOME_CODES[WIN]) | (outcomes == OUTCOME_CODES[TWENTY_ONE])
+        rounds = np.bincount(names, minlength=len(self.names))
+        wins = np.bincount(names, weights=won, minlength=len(self.names))
+        return {name: float(wins[index] / rounds[index]) for index, name in enumerate(self.names) if rounds[index]}
+
+    def push_rate_by_name(self):
+        """
+        Returns the share of rounds every player pushed with the dealer.
+
+        Returns:
+        --------
+        dict: Mapping of the player name to the push rate.
+        """
+        names = self.rows['name']
+        rounds = np.bincount(names, minlength=len(self.names))
+        pushes = np.bincount(names, weights=self.rows['outcome'] == OUTCOME_CODES[PUSH], minlength=len(self.names))
+        return {name: float(pushes[index] / rounds[index]) for index, name in enumerate(self.names) if rounds[index]}
+
+    def bust_rate_by_upcard(self, role=DEALER):
+        """
+        Returns the bust rate of the seats of a role for every dealer upcard.
+
+        Parameters:
+        -----------
+        - role (int): The role of the seats. Default is the dealer.
+
+        Returns:
+        --------
+        dict: Mapping of the upcard points (2-11) to the bust rate.
+        """
+        rows = self._select(role)
+        upcards = rows['dealer_upcard']
+        hands = np.bincount(upcards, minlength=12)
+        busts = np.bincount(upcards, weights=rows['outcome'] == OUTCOME_CODES[BUST], minlength=12)
+        return {upcard: float(busts[upcard] / hands[upcard]) for upcard in range(2, 12) if hands[upcard]}
+
+    def bankroll(self, name):
+        """
+        Returns the money of a player after each of the player's rounds.
+
+        Parameters:
+        -----------
+        - name (str): The player name.
+
+        Returns:
+        --------
+        ndarray: The money after every round, in the order of the rounds.
+        """
+        return self.rows['money'][self.rows['name'] == self.names.index(name)]
+
+    def drawdown_by_name(self):
+        """
+        Returns the largest bankroll drawdown of every player: the largest drop from a previous peak.
+
+        Returns:
+        --------
+        dict: Mapping of the player name to the largest drawdown.
+        """
+        order = np.argsort(self.rows['name'], kind='stable')
+        names = self.rows['name'][order]
+        money = self.rows['money'][order].astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+        drawdowns = {}
+        for start, end in zip(starts, np.r_[starts[1:], len(names)]):
+            series = money[start:end]
+            drawdowns[self.names[names[start]]] = int((np.maximum.accumulate(series) - series).max())
+        return drawdowns
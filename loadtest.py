@@ -0,0 +1,306 @@
+"""
+loadtest.py: Load-tests the multi-table server with scripted human clients.
+
+Every client connects to the server (see server.py), opens its own table and plays a number of rounds,
+answering the bet and hit/stand prompts after a think time drawn from a configurable distribution.
+The report gives the rounds per second of all the tables, the percentiles of the server's response latency
+(from sending an answer to receiving the next prompt, the output lines in between included) and the memory
+used per table by an in-process server. While the memory is traced, the clients run in a process of their
+own, so the traced memory is the server's only.
+
+Think time specifications:
+- 'fixed:SECONDS'
+- 'uniform:LOW:HIGH'
+- 'exp:MEAN'
+- 'lognormal:MU:SIGMA' (of the underlying normal distribution, in log-seconds)
+
+This module includes the following classes and functions:
+- think_time: Returns a sampler of think times from a specification.
+- ScriptedClient: A simulated human player connected to the server.
+- LoadReport: The results of a load test.
+- run_load: Runs one load test against an in-process or an external server.
+- main: Runs load tests for growing numbers of tables from the command line.
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import random
+import time
+import tracemalloc
+
+from constants import BOT_PLAYERS_LIMITS
+from server import TableServer
+
+
+def think_time(spec):
+    """
+    Returns a sampler of think times from a specification.
+
+    Parameters:
+    -----------
+    - spec (str): The distribution, e.g. 'fixed:0', 'uniform:0.1:0.5', 'exp:0.2' or 'lognormal:-2:0.5'.
+
+    Returns:
+    --------
+    callable: Function taking a random.Random and returning a think time in seconds.
+    """
+    kind, *parameters = spec.split(':')
+    parameters = [float(parameter) for parameter in parameters]
+    samplers = {
+        'fixed': (1, lambda rng, seconds: seconds),
+        'uniform': (2, lambda rng, low, high: rng.uniform(low, high)),
+        'exp': (1, lambda rng, mean: rng.expovariate(1 / mean) if mean else 0.0),
+        'lognormal': (2, lambda rng, mu, sigma: rng.lognormvariate(mu, sigma)),
+    }
+    if kind not in samplers or len(parameters) != samplers[kind][0]:
+        raise ValueError(f'Unknown think time specification: {spec!r}')
+    sampler = samplers[kind][1]
+    return lambda rng: sampler(rng, *parameters)
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class ScriptedClient:
+    """
+    A simulated human player connected to the server.
+
+    The client answers the prompts of server.Table the way a careful player answers Player.make_a_bet and
+    Player.hit_or_stand: the minimum bet, and a hit below stand_on points. It never doubles down, splits or
+    takes insurance.
+
+    Attributes:
+    -----------
+    - rounds (int): Number of rounds to play before leaving.
+    - latencies (list): Seconds from every answer to the next prompt of the server.
+    - rounds_played (int): Number of rounds played.
+
+    Methods:
+    --------
+    - answer: Returns the answer to a prompt.
+    - play: Plays the rounds on an open connection.
+    """
+
+    def __init__(self, rounds, bet_think=None, hit_think=None, bots_count=BOT_PLAYERS_LIMITS.get('max'),
+                 stand_on=17, seed=None):
+        """
+        Initializes a new scripted client.
+
+        Parameters:
+        -----------
+        - rounds (int): Number of rounds to play before leaving.
+        - bet_think (callable): Sampler of the think time before a bet. Default is no think time.
+        - hit_think (callable): Sampler of the think time before a hit/stand decision. Default is no think time.
+        - bots_count (int): Number of bot players asked for. Default is the maximum.
+        - stand_on (int): The client stands at this number of points or more. Default is 17.
+        - seed: Seed of the think times.
+        """
+        self.rounds = rounds
+        self.bet_think = bet_think or think_time('fixed:0')
+        self.hit_think = hit_think or think_time('fixed:0')
+        self.bots_count = bots_count
+        self.stand_on = stand_on
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.rounds_played = 0
+
+    def answer(self, prompt):
+        """
+        Returns the answer to a prompt and the think time before sending it.
+
+        Parameters:
+        -----------
+        - prompt (str): The prompt line, without the leading '?'.
+
+        Returns:
+        --------
+        tuple: The answer and the think time in seconds.
+        """
+        kind, *arguments = prompt.split()
+        if kind == 'bots':
+            return str(self.bots_count), 0.0
+        if kind == 'bet':
+            return arguments[0].split('-')[0], self.bet_think(self.rng)
+        if kind == 'hit':
+            return 'y' if int(arguments[0]) < self.stand_on else 'n', self.hit_think(self.rng)
+        if kind == 'play':
+            return 'h' if int(arguments[0]) < self.stand_on else 's', self.hit_think(self.rng)
+        if kind == 'insurance':
+            return 'n', 0.0
+        if kind == 'again':
+            self.rounds_played += 1
+            return 'y' if self.rounds_played < self.rounds else 'n', 0.0
+        return 'y', 0.0
+
+    async def play(self, reader, writer):
+        """
+        Plays the rounds on an open connection and closes it.
+        """
+        answered = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line or line.startswith(b'!bye'):
+                    break
+                if line.startswith(b'?'):
+                    if answered is not None:
+                        self.latencies.append(time.perf_counter() - answered)
+                    answer, delay = self.answer(line[1:].decode().strip())
+                    if delay:
+                        await asyncio.sleep(delay)
+                    writer.write(f'{answer}\n'.encode())
+                    await writer.drain()
+                    answered = time.perf_counter()
+        finally:
+            writer.close()
+
+
+class LoadReport:
+    """
+    The results of a load test.
+
+    Attributes:
+    -----------
+    - tables (int): Number of tables (clients).
+    - rounds (int): Number of rounds played at all the tables.
+    - seconds (float): Wall time of the test.
+    - latencies (list): Response latencies of all the answers, in seconds.
+    - memory_per_table (float): Peak traced memory of the server per table in bytes, or None if not measured.
+    """
+
+    def __init__(self, tables, rounds, seconds, latencies, memory_per_table=None):
+        self.tables = tables
+        self.rounds = rounds
+        self.seconds = seconds
+        self.latencies = latencies
+        self.memory_per_table = memory_per_table
+
+    @property
+    def rounds_per_second(self):
+        return self.rounds / self.seconds if self.seconds else 0.0
+
+    @property
+    def p50(self):
+        return _percentile(self.latencies, 50)
+
+    @property
+    def p99(self):
+        return _percentile(self.latencies, 99)
+
+    def __str__(self):
+        memory = 'n/a' if self.memory_per_table is None else f'{self.memory_per_table / 1024:.1f} KiB'
+        p50 = self.p50 * 1000 if self.latencies else float('nan')
+        p99 = self.p99 * 1000 if self.latencies else float('nan')
+        return (f'{self.tables:>6} tables | {self.rounds_per_second:>9.1f} rounds/s | '
+                f'p50 {p50:>7.2f} ms | p99 {p99:>7.2f} ms | {memory} per table')
+
+
+async def _play_clients(address, tables, rounds, bet_think, hit_think, bots_count, seed):
+    """
+    Connects the scripted clients to the server and plays all their rounds.
+
+    Returns:
+    --------
+    tuple: The wall time of the rounds in seconds and the (latencies, rounds played) of every client.
+    """
+    clients = [ScriptedClient(rounds, think_time(bet_think), think_time(hit_think), bots_count,
+                              seed=f'{seed}:{index}') for index in range(tables)]
+    started = time.perf_counter()
+    connections = [await asyncio.open_connection(*address) for _ in clients]
+    await asyncio.gather(*(client.play(*connection) for client, connection in zip(clients, connections)))
+    return time.perf_counter() - started, [(client.latencies, client.rounds_played) for client in clients]
+
+
+def _run_clients(*arguments):
+    """
+    Plays the scripted clients (see _play_clients) in the event loop of a child process.
+    """
+    return asyncio.run(_play_clients(*arguments))
+
+
+async def run_load(tables, rounds=20, bet_think='fixed:0', hit_think='fixed:0', bots_count=None,
+                   address=None, measure_memory=True, seed=0):
+    """
+    Runs one load test.
+
+    Parameters:
+    -----------
+    - tables (int): Number of simulated clients, each at its own table.
+    - rounds (int): Number of rounds played by every client. Default is 20.
+    - bet_think (str), hit_think (str): Think time specifications of the bets and the hit/stand decisions.
+    - bots_count (int): Number of bot players at every table. Default is the maximum.
+    - address (tuple): (host, port) of an external server. Default starts a server in this process.
+    - measure_memory (bool): Trace the memory of an in-process server, with the clients in a child process.
+      Default is True.
+    - seed: Seed of the think times.
+
+    Returns:
+    --------
+    LoadReport: The results of the test.
+    """
+    server = None
+    if address is None:
+        server = TableServer()
+        address = (await server.start(port=0))[0].sockets[0].getsockname()[:2]
+    measure_memory = measure_memory and server is not None
+    executor = None
+    if measure_memory:
+        # the clients' process is started before the tracing, so the traced memory is the server's only
+        executor = ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn'))
+        await asyncio.get_running_loop().run_in_executor(executor, int)
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+
+    bots_count = bots_count if bots_count is not None else BOT_PLAYERS_LIMITS.get('max')
+    arguments = (address, tables, rounds, bet_think, hit_think, bots_count, seed)
+    try:
+        if executor is not None:
+            seconds, clients = await asyncio.get_running_loop().run_in_executor(executor, _run_clients, *arguments)
+        else:
+            seconds, clients = await _play_clients(*arguments)
+    finally:
+        memory_per_table = None
+        if measure_memory:
+            memory_per_table = (tracemalloc.get_traced_memory()[1] - baseline) / tables
+            tracemalloc.stop()
+            executor.shutdown()
+        if server is not None:
+            server.close()
+
+    latencies = [latency for client_latencies, _ in clients for latency in client_latencies]
+    return LoadReport(tables, sum(rounds_played for _, rounds_played in clients), seconds, latencies,
+                      memory_per_table)
+
+
+def main(arguments=None):
+    """
+    Runs load tests for growing numbers of tables from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Load test of the Blackjack multi-table server')
+    parser.add_argument('--tables', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--rounds', type=int, default=20, help='rounds played by every client')
+    parser.add_argument('--bet-think', default='fixed:0', help="e.g. 'uniform:0.1:0.5'")
+    parser.add_argument('--hit-think', default='fixed:0', help="e.g. 'exp:0.2'")
+    parser.add_argument('--bots', type=int, default=None, help='bot players at every table')
+    parser.add_argument('--connect', default=None, help='HOST:PORT of a running server.py')
+    parser.add_argument('--no-memory', action='store_true', help='don\'t trace the memory (faster)')
+    options = parser.parse_args(arguments)
+
+    address = None
+    if options.connect:
+        host, port = options.connect.rsplit(':', 1)
+        address = (host, int(port))
+    for tables in options.tables:
+        report = asyncio.run(run_load(tables, options.rounds, options.bet_think, options.hit_think, options.bots,
+                                      address, not options.no_memory))
+        print(report)
+
+
+if __name__ == '__main__':
+    main()
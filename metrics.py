@@ -0,0 +1,360 @@
+"""
+metrics.py: Optional instrumentation of the round loop and profiling of whole runs.
+
+A Metrics object is attached to a Game or a SimulationEngine with instrument(). It wraps the step methods
+of that one object (the class is left untouched, so games without metrics pay nothing) and registers
+itself as an observer of the deck:
+- phase timings: the time spent in every phase of the rounds. Phases are exclusive, a render inside
+  the deal only counts as render, and the game's pauses are a phase of their own.
+    - bet: making_a_bets
+    - deal: initial_deal
+    - decision: offer_insurance and asking_card (the players' decisions and the extra cards)
+    - settle: check_winner, distribute_prizes and finish_round
+    - render: print_all_players_cards
+    - pause: the pacer's pauses (Game only)
+- counters: the rounds, dealt cards, reshuffles and busts.
+
+The metrics are exposed as a snapshot dict or as a Prometheus text dump.
+profile_run runs a function under cProfile or a sampling profiler and writes the profile to a file.
+
+This module includes the following classes and functions:
+- PHASES: The measured phases.
+- COUNTERS: The counters.
+- Metrics: Phase timings and counters of an instrumented Game or SimulationEngine.
+- SamplingProfiler: Samples the stack of a thread at a fixed interval.
+- profile_run: Runs a function under a profiler and writes the profile to a file.
+- main: Runs instrumented headless rounds from the command line.
+"""
+
+import argparse
+import cProfile
+from collections import Counter
+import random
+import sys
+import threading
+import time
+
+from engine import BUST, SimulationEngine
+
+BET = 'bet'
+DEAL = 'deal'
+DECISION = 'decision'
+SETTLE = 'settle'
+RENDER = 'render'
+PAUSE = 'pause'
+PHASES = (BET, DEAL, DECISION, SETTLE, RENDER, PAUSE)
+
+ROUNDS = 'rounds'
+CARDS_DEALT = 'cards_dealt'
+RESHUFFLES = 'reshuffles'
+BUSTS = 'busts'
+COUNTERS = (ROUNDS, CARDS_DEALT, RESHUFFLES, BUSTS)
+
+# instrumented step methods of Game and SimulationEngine, by phase
+_GAME_STEPS = {
+    BET: ('making_a_bets',),
+    DEAL: ('initial_deal',),
+    DECISION: ('offer_insurance', 'asking_card'),
+    SETTLE: ('check_winner', 'distribute_prizes'),
+    RENDER: ('print_all_players_cards',),
+}
+_ENGINE_STEPS = {
+    BET: ('_making_a_bets',),
+    DEAL: ('_initial_deal',),
+    DECISION: ('_offer_insurance', '_asking_card'),
+    SETTLE: ('_check_winner', '_distribute_prizes'),
+}
+_FINISH_STEPS = ('finish_round', '_finish_round')
+
+
+class Metrics:
+    """
+    Phase timings and counters of an instrumented Game or SimulationEngine.
+
+    Attributes:
+    -----------
+    - labels (dict): Labels added to every Prometheus sample (e.g. {'table': '1'}).
+    - calls (dict): Number of calls of every phase.
+    - seconds (dict): Total (exclusive) time of every phase, in seconds.
+    - max_seconds (dict): Longest call of every phase, in seconds.
+    - counters (dict): The counters (see COUNTERS).
+
+    Methods:
+    --------
+    - instrument: Attaches the metrics to a Game or a SimulationEngine.
+    - detach: Restores the instrumented objects.
+    - card_dealt, shuffled: Deck observer methods updating the counters.
+    - snapshot: Returns the metrics as a dict.
+    - prometheus: Returns the metrics in the Prometheus text format.
+    """
+
+    def __init__(self, labels=None):
+        """
+        Initializes empty metrics.
+
+        Parameters:
+        -----------
+        - labels (dict): Labels added to every Prometheus sample. Default is None.
+        """
+        self.labels = dict(labels or {})
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.max_seconds = dict.fromkeys(PHASES, 0.0)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._nested = []  # time of the nested phases of every running phase
+        self._instrumented = []
+
+    def _timed(self, phase, method):
+        clock = time.perf_counter
+        nested = self._nested
+
+        def timed_method(*args, **kwargs):
+            started = clock()
+            nested.append(0.0)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = clock() - started
+                own = elapsed - nested.pop()
+                if nested:
+                    nested[-1] += elapsed
+                self.calls[phase] += 1
+                self.seconds[phase] += own
+                if own > self.max_seconds[phase]:
+                    self.max_seconds[phase] = own
+        return timed_method
+
+    def _counted(self, method):
+        def counted_method(*args, **kwargs):
+            result = method(*args, **kwargs)
+            self.counters[ROUNDS] += 1
+            self.counters[BUSTS] += sum(seat.outcome == BUST for seat in result.seats)
+            return result
+        return counted_method
+
+    def instrument(self, game):
+        """
+        Attaches the metrics to a Game or a SimulationEngine: wraps its step methods and observes its deck.
+
+        Parameters:
+        -----------
+        - game (Game or SimulationEngine): The object to instrument.
+
+        Returns:
+        --------
+        The instrumented object.
+        """
+        steps = _ENGINE_STEPS if isinstance(game, SimulationEngine) else _GAME_STEPS
+        for phase, names in steps.items():
+            for name in names:
+                setattr(game, name, self._timed(phase, getattr(game, name)))
+        for name in _FINISH_STEPS:
+            if hasattr(game, name):
+                setattr(game, name, self._timed(SETTLE, self._counted(getattr(game, name))))
+        if hasattr(game, 'pacer'):
+            game.pacer.pause = self._timed(PAUSE, game.pacer.pause)
+        game.game_deck.add_observer(self)
+        self._instrumented.append(game)
+        return game
+
+    def detach(self):
+        """
+        Restores the instrumented objects (e.g. before pickling them). The collected metrics are kept.
+        """
+        for game in self._instrumented:
+            for names in list(_GAME_STEPS.values()) + list(_ENGINE_STEPS.values()) + [_FINISH_STEPS]:
+                for name in names:
+                    game.__dict__.pop(name, None)
+            if hasattr(game, 'pacer'):
+                game.pacer.__dict__.pop('pause', None)
+            if self in game.game_deck.observers:
+                game.game_deck.observers.remove(self)
+        self._instrumented = []
+
+    def card_dealt(self, card):
+        self.counters[CARDS_DEALT] += 1
+
+    def shuffled(self, game_deck):
+        self.counters[RESHUFFLES] += 1
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_instrumented'] = []
+        return state
+
+    def snapshot(self):
+        """
+        Returns the metrics as a dict.
+
+        Returns:
+        --------
+        dict: {'phases': {phase: {'calls', 'seconds', 'max_seconds', 'mean_seconds'}}, 'counters': {...}}.
+        """
+        phases = {}
+        for phase in PHASES:
+            calls = self.calls[phase]
+            phases[phase] = {'calls': calls, 'seconds': self.seconds[phase], 'max_seconds': self.max_seconds[phase],
+                             'mean_seconds': self.seconds[phase] / calls if calls else 0.0}
+        return {'phases': phases, 'counters': dict(self.counters)}
+
+    def _labels(self, **extra):
+        labels = {**self.labels, **extra}
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+    def prometheus(self, prefix='blackjack'):
+        """
+        Returns the metrics in the Prometheus text exposition format.
+
+        Parameters:
+        -----------
+        - prefix (str): The prefix of the metric names. Default is 'blackjack'.
+
+        Returns:
+        --------
+        str: The text dump.
+        """
+        lines = []
+        families = (
+            ('phase_seconds_total', 'counter', 'Time spent in every phase of the rounds.', self.seconds),
+            ('phase_calls_total', 'counter', 'Number of calls of every phase.', self.calls),
+            ('phase_max_seconds', 'gauge', 'Longest call of every phase.', self.max_seconds),
+        )
+        for name, kind, help_text, values in families:
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} {kind}')
+            for phase in PHASES:
+                lines.append(f'{prefix}_{name}{self._labels(phase=phase)} {values[phase]}')
+        for counter in COUNTERS:
+            lines.append(f'# HELP {prefix}_{counter}_total Number of {counter.replace("_", " ")}.')
+            lines.append(f'# TYPE {prefix}_{counter}_total counter')
+            lines.append(f'{prefix}_{counter}_total{self._labels()} {self.counters[counter]}')
+        return '\n'.join(lines) + '\n'
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of a thread at a fixed interval from a background thread. The profile is written
+    in the collapsed stack format (one 'frame;frame;frame count' line per stack), readable by flame graph tools.
+
+    Attributes:
+    -----------
+    - interval (float): Time between two samples, in seconds.
+    - stacks (Counter): Number of samples of every stack.
+
+    Methods:
+    --------
+    - start: Starts sampling the calling thread.
+    - stop: Stops sampling.
+    - dump: Writes the collapsed stacks to a file.
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        self._thread = None
+        self._running = threading.Event()
+
+    def start(self):
+        """
+        Starts sampling the calling thread.
+        """
+        target = threading.get_ident()
+        self._running.set()
+        self._thread = threading.Thread(target=self._sample, args=(target,), daemon=True)
+        self._thread.start()
+
+    def _sample(self, target):
+        while self._running.is_set():
+            frame = sys._current_frames().get(target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_filename.rsplit("/", 1)[-1]}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+    def stop(self):
+        """
+        Stops sampling.
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def dump(self, path):
+        """
+        Writes the collapsed stacks to a file, the most sampled first.
+        """
+        with open(path, 'w') as profile_file:
+            for stack, count in self.stacks.most_common():
+                profile_file.write(f'{stack} {count}\n')
+
+
+def profile_run(function, path, mode='cprofile', interval=0.001):
+    """
+    Runs a function under a profiler and writes the profile to a file.
+
+    Parameters:
+    -----------
+    - function (callable): The function to run, without arguments.
+    - path (str): The path of the profile: pstats data for 'cprofile' (open it with pstats or snakeviz),
+      collapsed stacks for 'sampling'.
+    - mode (str): 'cprofile' (deterministic, every call) or 'sampling' (low overhead). Default is 'cprofile'.
+    - interval (float): Sampling interval in seconds, for the 'sampling' mode. Default is 0.001.
+
+    Returns:
+    --------
+    The return value of the function.
+    """
+    if mode == 'cprofile':
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(function)
+        finally:
+            profiler.dump_stats(path)
+    if mode == 'sampling':
+        profiler = SamplingProfiler(interval)
+        profiler.start()
+        try:
+            return function()
+        finally:
+            profiler.stop()
+            profiler.dump(path)
+    raise ValueError(f'Unknown profiler mode {mode!r}, expected "cprofile" or "sampling"')
+
+
+def main(arguments=None):
+    """
+    Plays instrumented headless rounds and prints their metrics, optionally under a profiler.
+    """
+    parser = argparse.ArgumentParser(description='Instrumented headless Blackjack rounds')
+    parser.add_argument('--rounds', type=int, default=10000)
+    parser.add_argument('--bots', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=('prometheus', 'snapshot'), default='prometheus')
+    parser.add_argument('--profile', choices=('cprofile', 'sampling'), help='run under a profiler')
+    parser.add_argument('--profile-output', default='blackjack.prof', help='file for the profile')
+    options = parser.parse_args(arguments)
+
+    metrics = Metrics()
+    engine = metrics.instrument(SimulationEngine.with_bots(options.bots, rng=random.Random(options.seed)))
+
+    def play():
+        for _ in engine.play(options.rounds):
+            pass
+
+    if options.profile:
+        profile_run(play, options.profile_output, options.profile)
+        print(f'The profile was written to {options.profile_output}', file=sys.stderr)
+    else:
+        play()
+    print(metrics.prometheus() if options.format == 'prometheus' else metrics.snapshot())
+
+
+if __name__ == '__main__':
+    main()
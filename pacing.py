@@ -0,0 +1,112 @@
+"""
+pacing.py: Defines the pacers that control the pauses of the Blackjack game.
+
+This module includes the following classes:
+- RealTimePacer: Pauses for the requested time.
+- ScaledPacer: Pauses for the requested time divided by a speed factor.
+- InstantPacer: Doesn't pause at all, for tests, replays and high-volume sessions.
+- PACE_VARIABLE: The environment variable holding the pace of a deployment.
+- pacer_from_spec: Creates a pacer from a pace specification ('real', 'instant' or 'scaled:SPEED').
+"""
+
+import os
+import time
+
+PACE_VARIABLE = 'BLACKJACK_PACE'
+
+
+class RealTimePacer:
+    """
+    Pauses for the requested time.
+
+    Attributes:
+    -----------
+    - requested (float): Total pause time requested by the game, in seconds.
+
+    Methods:
+    --------
+    - pause: Pauses the game.
+    """
+
+    def __init__(self):
+        """
+        Initializes a new pacer.
+        """
+        self.requested = 0
+
+    def pause(self, seconds):
+        """
+        Pauses the game.
+
+        Parameters:
+        -----------
+        - seconds (float): The pause time the game asks for, in seconds.
+        """
+        self.requested += seconds
+        self._sleep(seconds)
+
+    def _sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class ScaledPacer(RealTimePacer):
+    """
+    Pauses for the requested time divided by a speed factor (e.g. 10 for a game 10x faster).
+
+    Attributes:
+    -----------
+    - speed (float): The speed factor.
+    """
+
+    def __init__(self, speed):
+        """
+        Initializes a new scaled pacer.
+
+        Parameters:
+        -----------
+        - speed (float): The speed factor. Must be positive.
+        """
+        if speed <= 0:
+            raise ValueError('The speed factor must be positive')
+        super().__init__()
+        self.speed = speed
+
+    def _sleep(self, seconds):
+        time.sleep(seconds / self.speed)
+
+
+class InstantPacer(RealTimePacer):
+    """
+    Doesn't pause at all. The requested pause time is still added up.
+    """
+
+    def _sleep(self, seconds):
+        pass
+
+
+def pacer_from_spec(spec=None):
+    """
+    Creates a pacer from a pace specification.
+
+    Parameters:
+    -----------
+    - spec (str): 'real', 'instant' or 'scaled:SPEED' (e.g. 'scaled:10' for a game 10x faster).
+      Default is the PACE_VARIABLE environment variable, or 'real' if it isn't set.
+
+    Returns:
+    --------
+    RealTimePacer: The pacer.
+    """
+    if spec is None:
+        spec = os.environ.get(PACE_VARIABLE, 'real')
+    kind, _, speed = spec.strip().lower().partition(':')
+    if kind == 'real' and not speed:
+        return RealTimePacer()
+    if kind == 'instant' and not speed:
+        return InstantPacer()
+    if kind == 'scaled':
+        try:
+            return ScaledPacer(float(speed))
+        except ValueError:
+            pass
+    raise ValueError(f'Unknown pace {spec!r}, expected real, instant or scaled:SPEED')
@@ -0,0 +1,208 @@
+"""
+parallel.py: Runs headless Blackjack simulations on a pool of processes.
+
+Every worker plays its share of rounds on its own table with an independent random generator seeded from
+the run seed and the worker index, so the same seed and worker count always produce the same tallies.
+
+This module includes the following classes and functions:
+- Tally: Outcome counts, net gains and bankroll trajectories of one or several workers.
+- worker_seed: Returns the seed of a worker's random generator.
+- simulate_worker: Plays the rounds of one worker and returns its Tally.
+- run_parallel: Spreads the rounds across a process pool and merges the workers' tallies.
+"""
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import random
+
+from deck import Shoe
+from engine import SimulationEngine, ThresholdDecider
+from players import Dealer, Player
+from rules import CLASSIC
+from shoe_pool import ShoePool
+
+
+class Tally:
+    """
+    Outcome counts, net gains and bankroll trajectories of one or several workers.
+
+    Seats are grouped by role: 'dealer', 'player' (the optional player seat) and 'bots'.
+
+    Attributes:
+    -----------
+    - rounds (int): Number of played rounds.
+    - outcomes (dict): Mapping of the role to a Counter of the outcomes ('win', 'twenty_one', 'push', 'lose', 'bust').
+    - net (Counter): Net gain per role.
+    - rebuys (int): How many times the players got a new bankroll.
+    - trajectories (list): One dict per worker, mapping the seat name to the list of its sampled money.
+    """
+
+    def __init__(self):
+        self.rounds = 0
+        self.outcomes = {'dealer': Counter(), 'player': Counter(), 'bots': Counter()}
+        self.net = Counter()
+        self.rebuys = 0
+        self.trajectories = []
+
+    @staticmethod
+    def role(player):
+        """
+        Returns the role of the player in the tally.
+        """
+        if isinstance(player, Dealer):
+            return 'dealer'
+        if isinstance(player, Player):
+            return 'player'
+        return 'bots'
+
+    def wins(self, role='bots'):
+        """
+        Returns the number of won hands (including the 21 points wins) for a role.
+        """
+        return self.outcomes[role]['win'] + self.outcomes[role]['twenty_one']
+
+    def pushes(self, role='bots'):
+        """
+        Returns the number of pushes for a role.
+        """
+        return self.outcomes[role]['push']
+
+    def busts(self, role='bots'):
+        """
+        Returns the number of busted hands for a role.
+        """
+        return self.outcomes[role]['bust']
+
+    def merge(self, other):
+        """
+        Adds the tally of another worker to this one.
+
+        Returns:
+        --------
+        Tally: This tally.
+        """
+        self.rounds += other.rounds
+        for role, counter in other.outcomes.items():
+            self.outcomes[role].update(counter)
+        self.net.update(other.net)
+        self.rebuys += other.rebuys
+        self.trajectories.extend(other.trajectories)
+        return self
+
+    def __eq__(self, other):
+        return (self.rounds, self.outcomes, self.net, self.rebuys, self.trajectories) == \
+            (other.rounds, other.outcomes, other.net, other.rebuys, other.trajectories)
+
+    def __repr__(self):
+        return f'Tally(rounds={self.rounds}, outcomes={self.outcomes}, net={dict(self.net)})'
+
+
+def worker_seed(seed, worker_index):
+    """
+    Returns the seed of a worker's random generator.
+
+    Parameters:
+    -----------
+    - seed (int): The seed of the run.
+    - worker_index (int): The index of the worker.
+
+    Returns:
+    --------
+    str: The seed of the worker (strings are hashed with SHA-512 by random.Random, so the streams are independent).
+    """
+    return f'{seed}:{worker_index}'
+
+
+def simulate_worker(seed, worker_index, rounds_count, bots_count, player_stands_on=None, player_bet=10,
+                    trajectory_step=1, decks_count=None, penetration=None, rules=CLASSIC, lazy_shoe=False,
+                    pooled_shoes=False):
+    """
+    Plays the rounds of one worker on its own table and returns its tally.
+
+    Parameters:
+    -----------
+    - seed (int): The seed of the run.
+    - worker_index (int): The index of the worker.
+    - rounds_count (int): Number of rounds to play.
+    - bots_count (int): Number of bot players at the table.
+    - player_stands_on (int): Points at which the player seat stands. If None, the table has no player.
+    - player_bet (int): Fixed bet of the player seat. Default is 10.
+    - trajectory_step (int): The money of every seat is sampled every trajectory_step rounds. Default is 1.
+    - decks_count (int), penetration (float): The Shoe of the table. They take precedence over the shoe of
+      the rules; a missing one comes from the rules. Default is the shoe of the rules.
+    - rules (RuleSet): The rules of the table (the shoe, the dealer's action, the payouts and the bet limits).
+      Default is CLASSIC.
+    - lazy_shoe (bool): The Shoe shuffles incrementally while dealing (see deck.Shoe). Default is False.
+    - pooled_shoes (bool): The Deck or Shoe takes its shuffled cards from a ShoePool seeded from the worker's
+      generator (see shoe_pool.py). Default is False.
+
+    Returns:
+    --------
+    Tally: The tally of the worker.
+    """
+    rng = random.Random(worker_seed(seed, worker_index))
+    player_decider = None
+    if player_stands_on is not None:
+        player_decider = ThresholdDecider(player_stands_on, bet=player_bet, rng=rng)
+    custom_shoe = decks_count is not None or penetration is not None
+    decks_count = decks_count or rules.decks_count or 1
+    pool = ShoePool(decks_count, seed=rng.getrandbits(64)) if pooled_shoes else None
+    try:
+        if custom_shoe:
+            game_deck = Shoe(decks_count, penetration or rules.penetration, rng, lazy_shoe, pool)
+        else:
+            game_deck = rules.new_deck(rng, lazy_shoe, pool)
+        engine = SimulationEngine.with_bots(bots_count, player_decider=player_decider, rng=rng,
+                                            game_deck=game_deck, rules=rules)
+
+        tally = Tally()
+        trajectories = {seat.player.name: [seat.player.player_money] for seat in engine.seats}
+        roles = [Tally.role(seat.player) for seat in engine.seats]
+        for round_result in engine.play(rounds_count):
+            for role, seat_result in zip(roles, round_result.seats):
+                tally.outcomes[role][seat_result.outcome] += 1
+                tally.net[role] += seat_result.net
+            if round_result.number % trajectory_step == 0:
+                for seat_result in round_result.seats:
+                    trajectories[seat_result.name].append(seat_result.money)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    tally.rounds = engine.rounds_played
+    tally.rebuys = engine.rebuys
+    tally.trajectories.append(trajectories)
+    return tally
+
+
+def run_parallel(rounds_count, workers=None, seed=0, bots_count=3, **kwargs):
+    """
+    Spreads the rounds across a process pool and merges the workers' tallies in the workers' order.
+
+    Every task runs in a fresh process, so the global state of a worker (e.g. BOT_NAMES) never depends
+    on the tasks it ran before.
+
+    Parameters:
+    -----------
+    - rounds_count (int): Total number of rounds to play.
+    - workers (int): Number of workers. Default is the number of CPUs.
+    - seed (int): The seed of the run. Default is 0.
+    - bots_count (int): Number of bot players at every table. Default is 3.
+    - **kwargs: Passed to simulate_worker.
+
+    Returns:
+    --------
+    Tally: The merged tally of all the workers.
+    """
+    workers = workers or multiprocessing.cpu_count()
+    shares = [rounds_count // workers + (index < rounds_count % workers) for index in range(workers)]
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1) as executor:
+        futures = [executor.submit(simulate_worker, seed, index, share, bots_count, **kwargs)
+                   for index, share in enumerate(shares)]
+        tally = Tally()
+        for future in futures:
+            tally.merge(future.result())
+    return tally
@@ -2,17 +2,156 @@
 players.py: Defines player classes for the Blackjack game.
 
 This module includes the following classes:
+- STAND, HIT, DOUBLE, SPLIT: The actions of a hand (ACTION_KEYS maps the console keys to them).
+- Hands: The hands of a seat in fixed-capacity arrays (split hands and their bets).
 - AbstractPlayer: Abstract base class for all player types.
 - Player: Represents the human player in the game.
 - BotPlayer: Represents a computer-controlled bot player in the game.
+- CountingBotPlayer: Represents a bot player that sizes its bets from the card count.
 - Dealer: Represents the dealer in the game.
 """
 
 from abc import ABC, abstractmethod
+from array import array
 import random
 
-from constants import BOT_NAMES, BET_LIMITS, NumberException
+from constants import BOT_NAMES, BET_LIMITS, RANKS, NumberException
 from deck import player_hand_cards, dealer_hand_cards
+from rules import CLASSIC, HAND_STRIDE
+
+ACE_POINTS = RANKS.get('Ace')
+
+STAND, HIT, DOUBLE, SPLIT = range(4)
+# the allowed actions of a hand, indexed by [can double][can split]
+HIT_OR_STAND = (STAND, HIT)
+_ALLOWED_ACTIONS = ((HIT_OR_STAND, (STAND, HIT, SPLIT)), ((STAND, HIT, DOUBLE), (STAND, HIT, DOUBLE, SPLIT)))
+ACTION_KEYS = {'s': STAND, 'h': HIT, 'd': DOUBLE, 'p': SPLIT}
+_ACTION_NAMES = ('stand', 'hit', 'double down', 'split')
+
+
+def _score(cards):
+    """
+    Returns the (hard points, aces count, points) state of a list of cards.
+    """
+    hard = aces = 0
+    for card in cards:
+        if card.points == ACE_POINTS:
+            hard += 1
+            aces += 1
+        else:
+            hard += card.points
+    return hard, aces, hard + 10 if aces and hard <= 11 else hard
+
+
+class Hands:
+    """
+    The hands of a seat, kept in arrays allocated once for the most hands the rules allow, so a split moves
+    a card to a free slot instead of creating a hand.
+
+    The player's own attributes (player_cards, hard_points, aces_count, player_points and player_bet) hold
+    the current hand, which is hand 0 outside the player's decisions; the slots keep the other hands.
+
+    Attributes:
+    -----------
+    - capacity (int): The most hands of the seat.
+    - count (int): Number of hands in the round.
+    - current (int): Index of the hand held by the player's attributes.
+    - bets, hard, aces, points (array): The bet and the points of every hand.
+    - cards (list): The card list of every hand.
+    - done (bytearray): 1 for the hands that take no more decisions (doubled hands and split aces).
+
+    Methods:
+    --------
+    - select: Makes a hand the current hand of the player.
+    - split: Moves the second card of the current hand to a new hand with the same bet.
+    - reset: Goes back to a single empty hand.
+    - hand_points: Returns the points of a hand.
+    """
+
+    def __init__(self, capacity=1):
+        """
+        Initializes the hands of a seat.
+
+        Parameters:
+        -----------
+        - capacity (int): The most hands of the seat. Default is 1.
+        """
+        self.capacity = capacity
+        self.count = 1
+        self.current = 0
+        self.bets = array('l', [0]) * capacity
+        self.hard = array('h', [0]) * capacity
+        self.aces = array('h', [0]) * capacity
+        self.points = array('h', [0]) * capacity
+        self.cards = [[] for _ in range(capacity)]
+        self.done = bytearray(capacity)
+
+    def select(self, player, hand):
+        """
+        Makes a hand the current hand of the player: the current hand goes back to its slot
+        and the hand is loaded into the player's attributes.
+
+        Parameters:
+        -----------
+        - player (AbstractPlayer): The player of the seat.
+        - hand (int): The index of the hand.
+        """
+        current = self.current
+        if hand == current:
+            return
+        self.bets[current] = player.player_bet
+        self.hard[current] = player.hard_points
+        self.aces[current] = player.aces_count
+        self.points[current] = player.player_points
+        self.cards[current] = player.player_cards
+        player.player_bet = self.bets[hand]
+        player.hard_points = self.hard[hand]
+        player.aces_count = self.aces[hand]
+        player.player_points = self.points[hand]
+        player.player_cards = self.cards[hand]
+        self.current = hand
+
+    def split(self, player):
+        """
+        Moves the second card of the current hand (a pair) to a new hand with the same bet.
+
+        Parameters:
+        -----------
+        - player (AbstractPlayer): The player of the seat.
+
+        Returns:
+        --------
+        int: The index of the new hand.
+        """
+        if self.count == self.capacity:
+            raise ValueError('The seat has no room for another hand')
+        hand = self.count
+        self.count += 1
+        card = player.player_cards.pop()
+        player.hard_points, player.aces_count, player.player_points = _score(player.player_cards)
+        cards = self.cards[hand]
+        cards.clear()
+        cards.append(card)
+        self.hard[hand], self.aces[hand], self.points[hand] = _score(cards)
+        self.bets[hand] = player.player_bet
+        self.done[hand] = 0
+        return hand
+
+    def reset(self, player):
+        """
+        Goes back to a single hand (hand 0 of the player) before a new round.
+        """
+        if self.current:
+            self.select(player, 0)
+        for hand in range(self.count):
+            self.done[hand] = 0
+        self.count = 1
+
+    def hand_points(self, player, hand):
+        """
+        Returns the points of a hand of the player.
+        """
+        return player.player_points if hand == self.current else self.points[hand]
 
 
 class AbstractPlayer(ABC):
@@ -27,12 +166,23 @@ class AbstractPlayer(ABC):
     Methods:
     --------
     - __init__: Initializes a new player with default attributes.
-    - add_card: Adds a card to the player's hand.
-    - count_player_points: Calculates and returns the total points of the player's hand.
+    - add_card: Adds a card to the player's hand and updates the hand's points.
+    - count_player_points: Returns the total points of the player's hand.
+    - is_soft: Returns True if an ace of the hand is counted as 11.
+    - is_blackjack: Returns True if the hand is a natural (an ace and a 10-card).
+    - is_busted: Returns True if the hand has more than 21 points.
     - make_a_bet: Abstract method for making a bet.
     - hit_or_stand: Abstract method for deciding whether to hit or stand.
     - reveal_card: Abstract method for revealing a card.
     - print_cards: Prints the player's hand cards.
+    - apply_rules: Applies the bet limits and the number of hands of a rule set.
+    - allowed_actions: Returns the actions allowed for the current hand.
+    - choose_action: Chooses the action of the current hand (hit or stand by default).
+    - take_insurance: Decides whether to take insurance (never by default).
+    - insurance_bet: Returns the insurance bet offered to the player.
+    - insure: Takes the insurance bet and settles it.
+    - double_down: Doubles the bet of the current hand and deals its last card.
+    - split_pair: Splits the pair of the current hand and deals the second cards.
     """
     max_bet = BET_LIMITS.get('max')
     min_bet = BET_LIMITS.get('min')
@@ -50,29 +200,61 @@ class AbstractPlayer(ABC):
         self.player_cards = []
         self.player_money = 100
         self.player_bet = 0
-        self.player_points = self.count_player_points()
+        self.hard_points = 0
+        self.aces_count = 0
+        self.player_points = 0
+        self.hands = Hands()
 
     def add_card(self, card):
         """
-        Adds a card to the player's hand.
+        Adds a card to the player's hand and updates the hand's points.
+
+        The hand keeps a running hard total (every ace counted as 1) and the number of aces,
+        so the points are known without summing the cards again.
 
         Parameters:
         -----------
         - card: The card object to be added to the player's hand.
         """
+        if card.points == ACE_POINTS:
+            self.hard_points += 1
+            self.aces_count += 1
+        else:
+            self.hard_points += card.points
+        if self.aces_count and self.hard_points <= 11:
+            self.player_points = self.hard_points + 10
+        else:
+            self.player_points = self.hard_points
         return self.player_cards.append(card)
 
     def count_player_points(self):
         """
-        Calculates and returns the total points of the player's hand.
+        Returns the total points of the player's hand. An ace is counted as 11 unless the hand would bust.
 
         Returns:
         --------
         int: The total points of the player's hand.
         """
-        self.player_points = sum([card.points for card in self.player_cards])
         return self.player_points
 
+    def is_soft(self):
+        """
+        Returns True if an ace of the hand is counted as 11.
+        """
+        return self.player_points != self.hard_points
+
+    def is_blackjack(self):
+        """
+        Returns True if the hand is a natural (an ace and a 10-card).
+        """
+        return self.player_points == 21 and len(self.player_cards) == 2
+
+    def is_busted(self):
+        """
+        Returns True if the hand has more than 21 points.
+        """
+        return self.player_points > 21
+
     @abstractmethod
     def make_a_bet(self):
         """
@@ -106,8 +288,155 @@ class AbstractPlayer(ABC):
         --------
         list: empty list.
         """
+        self.hands.reset(self)
+        self.hard_points = 0
+        self.aces_count = 0
+        self.player_points = 0
         return self.player_cards.clear()
 
+    def apply_rules(self, rules):
+        """
+        Applies the bet limits and the number of hands of a rule set to the player.
+
+        Parameters:
+        -----------
+        - rules (RuleSet): The rules of the table.
+        """
+        self.min_bet = rules.min_bet
+        self.max_bet = rules.max_bet
+        if self.hands.capacity != rules.max_hands:
+            self.hands.reset(self)
+            self.hands = Hands(rules.max_hands)
+
+    def allowed_actions(self, rules):
+        """
+        Returns the actions allowed for the current hand: doubling down and splitting are allowed on
+        the first two cards of a hand, if the rules allow them and the player can match the bet.
+
+        Parameters:
+        -----------
+        - rules (RuleSet): The rules of the table.
+
+        Returns:
+        --------
+        tuple: The allowed actions (STAND, HIT, DOUBLE, SPLIT).
+        """
+        cards = self.player_cards
+        if len(cards) != 2 or self.player_money < self.player_bet:
+            return HIT_OR_STAND
+        hands = self.hands
+        can_split = hands.count < hands.capacity and cards[0].points == cards[1].points
+        return _ALLOWED_ACTIONS[rules.doubles[self.player_points]][can_split]
+
+    def choose_action(self, allowed):
+        """
+        Chooses the action of the current hand. By default the player only hits or stands (hit_or_stand).
+
+        Parameters:
+        -----------
+        - allowed (tuple): The allowed actions.
+
+        Returns:
+        --------
+        int: One of the allowed actions.
+        """
+        return HIT if self.hit_or_stand() else STAND
+
+    def take_insurance(self):
+        """
+        Decides whether to take insurance against a dealer's blackjack. By default the player never does.
+
+        Returns:
+        --------
+        bool: True to take insurance.
+        """
+        return False
+
+    def insurance_bet(self, rules, dealer):
+        """
+        Returns the insurance bet (half the bet) offered to the player when the rules allow insurance and
+        the dealer shows an ace.
+
+        Parameters:
+        -----------
+        - rules (RuleSet): The rules of the table.
+        - dealer (Dealer): The dealer of the round.
+
+        Returns:
+        --------
+        int: The insurance bet, or 0 if the player isn't offered insurance.
+        """
+        if not rules.insurance or self is dealer or dealer.player_cards[1].points != ACE_POINTS:
+            return 0
+        bet = self.player_bet // 2
+        return bet if self.player_money >= bet else 0
+
+    def insure(self, settlement, seat, bet, dealer_blackjack, rules, listener):
+        """
+        Takes the insurance bet and settles it at once: the dealer's first two cards are known.
+
+        Parameters:
+        -----------
+        - settlement (Settlement): The settlement of the round.
+        - seat (int): The index of the player's seat.
+        - bet (int): The insurance bet (insurance_bet).
+        - dealer_blackjack (bool): True if the dealer's first two cards are a blackjack.
+        - rules (RuleSet): The rules of the table.
+        - listener (RoundListener): The observer of the round events.
+        """
+        self.player_money -= bet
+        settlement.insure(seat, bet, dealer_blackjack, rules.insurance_payout)
+        listener.on_insurance(self, bet)
+
+    def double_down(self, settlement, seat, hand, deal, listener):
+        """
+        Doubles the bet of the current hand, which takes exactly one more card.
+
+        Parameters:
+        -----------
+        - settlement (Settlement): The settlement of the round.
+        - seat (int): The index of the player's seat.
+        - hand (int): The index of the current hand.
+        - deal (callable): Deals one card to the player.
+        - listener (RoundListener): The observer of the round events.
+        """
+        self.player_money -= self.player_bet
+        self.player_bet *= 2
+        settlement.double(seat, hand)
+        listener.on_double(self, self.player_bet)
+        deal(self)
+        self.hands.done[hand] = 1
+
+    def split_pair(self, settlement, seat, hand, deal, listener):
+        """
+        Splits the pair of the current hand: both hands get a second card, split aces take no more cards.
+
+        Parameters:
+        -----------
+        - settlement (Settlement): The settlement of the round.
+        - seat (int): The index of the player's seat.
+        - hand (int): The index of the current hand.
+        - deal (callable): Deals one card to the player.
+        - listener (RoundListener): The observer of the round events.
+
+        Returns:
+        --------
+        int: The index of the new hand.
+        """
+        hands = self.hands
+        aces = self.player_cards[0].points == ACE_POINTS
+        new_hand = hands.split(self)
+        self.player_money -= self.player_bet
+        settlement.split(seat, new_hand, self.player_bet)
+        listener.on_split(self, new_hand)
+        deal(self)
+        hands.select(self, new_hand)
+        deal(self)
+        hands.select(self, hand)
+        if aces:
+            hands.done[hand] = hands.done[new_hand] = 1
+        return new_hand
+
     def deal_cards(self, deck_cards):
         for _ in range(2):
             self.add_card(deck_cards.get_card())
@@ -146,6 +475,8 @@ class Player(AbstractPlayer):
     - __init__: Initializes a new human player.
     - make_a_bet: Takes user input to determine the bet amount.
     - hit_or_stand: Takes user input to decide whether to hit or stand.
+    - choose_action: Takes user input to choose the action of a hand that may double down or split.
+    - take_insurance: Takes user input to decide whether to take insurance.
     - reveal_card: Not implemented for the human player.
     """
 
@@ -194,7 +525,7 @@ class Player(AbstractPlayer):
         """
         while True:
             try:
-                player_hit_or_stand_input = input(f'➡️ Your have {self.player_points} points.'
+                player_hit_or_stand_input = input(f'➡️ You have {self.player_points} points.'
                                                   f'\nDo you want to take one more card? (y/n): ').lower().strip()
                 if player_hit_or_stand_input not in ['y', 'n']:
                     raise ValueError
@@ -210,6 +541,46 @@ class Player(AbstractPlayer):
             print(f'{self.name} don\'t want to take anymore card.')
             return False
 
+    def choose_action(self, allowed):
+        """
+        Takes user input to choose the action of a hand. Without doubling or splitting it's hit_or_stand.
+
+        Returns:
+        --------
+        int: The action chosen by the human player.
+        """
+        if allowed is HIT_OR_STAND:
+            return super().choose_action(allowed)
+        options = ', '.join(f'{key} - {_ACTION_NAMES[action]}' for key, action in ACTION_KEYS.items()
+                            if action in allowed)
+        while True:
+            answer = input(f'➡️ You have {self.player_points} points.'
+                           f'\nWhat do you do? ({options}): ').lower().strip()
+            if ACTION_KEYS.get(answer) in allowed:
+                break
+            print(f'‼️Invalid input. Please enter one of: {options}.')
+
+        action = ACTION_KEYS[answer]
+        if action == HIT:
+            print(f'{self.name} decided to take one more card.')
+        elif action == STAND:
+            print(f'{self.name} don\'t want to take anymore card.')
+        return action
+
+    def take_insurance(self):
+        """
+        Takes user input to decide whether to take insurance.
+
+        Returns:
+        --------
+        bool: True if the human player takes insurance.
+        """
+        while True:
+            answer = input('➡️ The DEALER shows an ace. Take insurance for half your bet? (y/n): ').lower().strip()
+            if answer in ['y', 'n']:
+                return answer == 'y'
+            print('‼️Invalid input. Please enter "y" or "n".')
+
     def reveal_card(self, status):
         """
         Not implemented for the human player.
@@ -230,10 +601,17 @@ class BotPlayer(AbstractPlayer):
     - reveal_card: Reveals the hidden card for the bot player.
     """
 
-    def __init__(self):
+    def __init__(self, rng=random, names=BOT_NAMES):
         """
         Initializes a new bot player.
+
+        Parameters:
+        -----------
+        - rng: Random number generator used for the name and the bets. Default is the random module.
+        - names (list): The free bot names. The chosen name is removed from it. Default is BOT_NAMES.
         """
+        self.rng = rng
+        self.names = names
         super().__init__(self.get_name())
         self.hidden_card = True
 
@@ -245,19 +623,19 @@ class BotPlayer(AbstractPlayer):
         --------
         str: A randomly selected bot name.
         """
-        bot_name = random.choice(BOT_NAMES)
-        BOT_NAMES.remove(bot_name)
+        bot_name = self.rng.choice(self.names)
+        self.names.remove(bot_name)
         return bot_name
 
     def make_a_bet(self):
         """
-        Randomly determines the bet amount for the bot player.
+        Randomly determines the bet amount for the bot player, within the table's bet limits.
 
         Returns:
         --------
         int: The randomly determined bet amount for the bot player.
         """
-        self.player_bet = random.randint(self.min_bet, self.player_money)
+        self.player_bet = self.rng.randint(self.min_bet, min(self.max_bet, self.player_money))
         self.player_money -= self.player_bet
         print(f'{self.name} put {self.player_bet}$')
         return self.player_bet
@@ -289,6 +667,46 @@ class BotPlayer(AbstractPlayer):
         return self.hidden_card
 
 
+class CountingBotPlayer(BotPlayer):
+    """
+    Represents a bot player that counts cards and sizes its bets from the true count.
+
+    Methods:
+    --------
+    - __init__: Initializes a new counting bot player.
+    - make_a_bet: Bets one unit up to a true count of +1, then one more unit per true count.
+    """
+
+    def __init__(self, counter, rng=random, names=BOT_NAMES, max_units=8):
+        """
+        Initializes a new counting bot player.
+
+        Parameters:
+        -----------
+        - counter (CardCounter): The counter observing the game's deck.
+        - rng: Random number generator used for the name. Default is the random module.
+        - names (list): The free bot names. Default is BOT_NAMES.
+        - max_units (int): The largest bet in minimum bets (the bet spread). Default is 8.
+        """
+        super().__init__(rng, names)
+        self.counter = counter
+        self.max_units = max_units
+
+    def make_a_bet(self):
+        """
+        Determines the bet amount from the true count.
+
+        Returns:
+        --------
+        int: The bet amount for the bot player.
+        """
+        units = min(max(int(self.counter.true_count()), 1), self.max_units)
+        self.player_bet = min(units * self.min_bet, self.max_bet, self.player_money)
+        self.player_money -= self.player_bet
+        print(f'{self.name} put {self.player_bet}$')
+        return self.player_bet
+
+
 class Dealer(AbstractPlayer):
     """
     Represents the dealer in the Blackjack game.
@@ -299,18 +717,37 @@ class Dealer(AbstractPlayer):
     - reveal_card: Reveals the hidden card for the dealer.
     - make_a_bet: Randomly determines the bet amount for the dealer.
     - hit_or_stand: Decides whether to hit or stand based on the dealer's strategy.
+    - apply_rules: Applies the bet limits and the dealer action of a rule set.
+    - allowed_actions: The dealer only hits or stands.
     """
 
-    def __init__(self, name='DEALER'):
+    def __init__(self, name='DEALER', rng=random, rules=CLASSIC):
         """
         Initializes a new dealer.
 
         Parameters:
         -----------
         - name (str): The name of the dealer.
+        - rng: Random number generator used for the bets. Default is the random module.
+        - rules (RuleSet): The rules of the table. Default is CLASSIC.
         """
         super().__init__(name)
+        self.rng = rng
         self.hidden_card = True
+        self.apply_rules(rules)
+
+    def apply_rules(self, rules):
+        """
+        Applies the bet limits and the compiled dealer action (RuleSet.dealer_hits) of a rule set.
+        """
+        super().apply_rules(rules)
+        self.dealer_hits = rules.dealer_hits
+
+    def allowed_actions(self, rules):
+        """
+        Returns HIT_OR_STAND: the dealer never doubles down or splits.
+        """
+        return HIT_OR_STAND
 
     def reveal_card(self, status):
         """
@@ -325,13 +762,13 @@ class Dealer(AbstractPlayer):
 
     def make_a_bet(self):
         """
-        Randomly determines the bet amount for the dealer.
+        Randomly determines the bet amount for the dealer, within the table's bet limits.
 
         Returns:
         --------
         int: The randomly determined bet amount for the dealer.
         """
-        self.player_bet = random.randint(self.min_bet, self.player_money)
+        self.player_bet = self.rng.randint(self.min_bet, min(self.max_bet, self.player_money))
         self.player_money -= self.player_bet
         print(f'{self.name} put {self.player_bet}$')
         return self.player_bet
@@ -344,7 +781,7 @@ class Dealer(AbstractPlayer):
         --------
         bool: True if the dealer decides to hit, False if the dealer decides to stand.
         """
-        if self.count_player_points() < 17:
+        if self.dealer_hits[self.is_soft() * HAND_STRIDE + self.player_points]:
             print(f'{self.name} takes one more card.')
             return True
         else:
@@ -0,0 +1,280 @@
+"""
+replay.py: Records reproducible Game sessions and replays them deterministically from their hand-history log.
+
+A recorded session uses one seeded random.Random for the shuffles, the seating and the bots' names and bets,
+and writes its seed and rule set, every new table and every round to a hand-history log (see history.py). The human
+decisions are part of the log: the number of bots of every table, and the player's bet, insurance decision
+and actions (stand, hit, double down or split) of every round. A replay re-executes the session through the same Game steps as Game.start_game
+with an InstantPacer and checks every round (cards, decisions, outcomes and money of all the seats)
+against the log.
+
+This module includes the following classes and functions:
+- create_game: Creates a Game whose randomness comes from a seed.
+- record_session: Creates a Game that records a reproducible session to a log file.
+- ScriptedPlayer: Human player whose decisions come from the log.
+- ReplayMismatch: Raised when a replayed round differs from the log.
+- Replayer: Replays a recorded session, with periodic snapshots to jump to any round.
+"""
+
+from contextlib import redirect_stdout
+import os
+import pickle
+import random
+
+from deck import Deck, Shoe
+from game import Game
+from history import (HandHistoryListener, HandHistoryWriter, MemoryHistory, read_events,
+                     PLAYER, ROUND_RECORD, SESSION_RECORD, TABLE_RECORD)
+from pacing import InstantPacer
+from players import Player, STAND
+from rules import CLASSIC, RULE_SETS
+
+
+def create_game(seed, decks_count=0, penetration=0.75, **kwargs):
+    """
+    Creates a Game whose shuffles, seating and bots all come from one random.Random seeded with seed.
+
+    Parameters:
+    -----------
+    - seed: The seed of the session (used as a string).
+    - decks_count (int): Number of decks in a Shoe, or 0 for a single Deck like Game. Default is 0.
+    - penetration (float): The penetration of the Shoe. Default is 0.75.
+    - **kwargs: Passed to Game (pacer, player, listener, rules).
+
+    Returns:
+    --------
+    Game: The new game.
+    """
+    rng = random.Random(str(seed))
+    game_deck = Shoe(decks_count, penetration, rng) if decks_count else Deck(rng)
+    return Game(game_deck, rng=rng, **kwargs)
+
+
+def record_session(path, seed, decks_count=0, penetration=0.75, rules=CLASSIC, **kwargs):
+    """
+    Creates a Game that records a reproducible session to a hand-history log.
+
+    Parameters:
+    -----------
+    - path (str): The path of the log file (a new file).
+    - seed: The seed of the session.
+    - decks_count (int), penetration (float): The cards of the session, as in create_game.
+    - rules (RuleSet): The rules of the session, one of rules.RULE_SETS. Default is CLASSIC.
+    - **kwargs: Passed to Game (pacer, player).
+
+    Returns:
+    --------
+    tuple: The Game and its HandHistoryWriter (close it when the session is over).
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f'{path} already exists, a session log must be a new file')
+    if RULE_SETS.get(rules.name) is not rules:
+        raise ValueError(f'{rules!r} is not in rules.RULE_SETS, the session couldn\'t be replayed')
+    writer = HandHistoryWriter(path)
+    writer.write_session(seed, decks_count, penetration, rules.name)
+    game = create_game(seed, decks_count, penetration, listener=HandHistoryListener(writer), rules=rules,
+                       **kwargs)
+    return game, writer
+
+
+class ScriptedPlayer(Player):
+    """
+    Human player whose bet, insurance decision and actions are set from the log before every round.
+
+    Attributes:
+    -----------
+    - bet (int): The bet of the round.
+    - actions (list): The actions of the round (STAND, HIT, DOUBLE or SPLIT), consumed in order.
+    - insurance (bool): True if the player takes insurance when it's offered.
+    """
+
+    def __init__(self, name='YOU'):
+        super().__init__(name)
+        self.bet = 0
+        self.actions = []
+        self.insurance = False
+
+    def make_a_bet(self):
+        """
+        Makes the recorded bet.
+        """
+        self.player_bet = self.bet
+        print(f'{self.name} put {self.player_bet}$')
+        self.player_money -= self.player_bet
+        return self.player_bet
+
+    def choose_action(self, allowed):
+        """
+        Returns the next recorded action.
+        """
+        if not self.actions:
+            raise ReplayMismatch(f'{self.name} was asked for more decisions than recorded')
+        action = self.actions.pop(0)
+        if action not in allowed:
+            raise ReplayMismatch(f'The recorded action {action} of {self.name} isn\'t allowed')
+        return action
+
+    def hit_or_stand(self):
+        """
+        Returns True if the next recorded action takes a card.
+        """
+        return self.choose_action(tuple(range(4))) != STAND
+
+    def take_insurance(self):
+        """
+        Returns the recorded insurance decision.
+        """
+        return self.insurance
+
+
+class ReplayMismatch(Exception):
+    """
+    Raised when a replayed round differs from the log.
+    """
+    pass
+
+
+class _NullOutput:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+class Replayer:
+    """
+    Replays a recorded session deterministically.
+
+    While replaying, a snapshot of the whole game is kept every snapshot_every rounds, so jumping to
+    a round only replays the rounds after the nearest snapshot.
+
+    Attributes:
+    -----------
+    - seed (str): The seed of the session.
+    - rules (RuleSet): The rules of the session.
+    - script (list): The table and round records of the log, in order.
+    - rounds_count (int): Number of rounds in the log.
+    - snapshots (dict): Mapping of the round number to the pickled state after that round.
+
+    Methods:
+    --------
+    - replay: Replays (and verifies) the session up to a round.
+    - state_at: Returns the Game as it was right after a round.
+    """
+
+    def __init__(self, path, snapshot_every=100):
+        """
+        Reads a session log.
+
+        Parameters:
+        -----------
+        - path (str): The path of the log written by record_session.
+        - snapshot_every (int): Number of rounds between two snapshots. Default is 100.
+        """
+        events = list(read_events(path))
+        if not events or events[0][0] != SESSION_RECORD:
+            raise ValueError(f'{path} has no session record, it can\'t be replayed')
+        self.seed, self.decks_count, self.penetration, rules_name = events[0][1]
+        if rules_name not in RULE_SETS:
+            raise ValueError(f'{path} was recorded with the unknown rule set {rules_name!r}')
+        self.rules = RULE_SETS[rules_name]
+        self.script = [event for event in events[1:] if event[0] in (TABLE_RECORD, ROUND_RECORD)]
+        self.rounds_count = sum(kind == ROUND_RECORD for kind, _ in self.script)
+        self.snapshot_every = snapshot_every
+        self.snapshots = {}
+
+    def _new_game(self):
+        return create_game(self.seed, self.decks_count, self.penetration, pacer=InstantPacer(),
+                           player=ScriptedPlayer(), listener=HandHistoryListener(MemoryHistory()),
+                           rules=self.rules)
+
+    def _play_round(self, game, record):
+        """
+        Plays one round with the recorded human decisions and checks it against the record.
+        """
+        player_seats = [seat for seat in record.seats if seat.role == PLAYER]
+        if player_seats:
+            seat = player_seats[0]
+            game.player.bet = seat.initial_bet
+            game.player.actions = list(seat.actions)
+            game.player.insurance = seat.insurance
+
+        game.making_a_bets()
+        game.initial_deal()
+        print('\nOK, guys, open your cards!\n')
+        game.print_all_players_cards()
+        game.offer_insurance()
+        while not (game.check_round() or game.hit_pass()):
+            pass
+
+        events = game.listener.writer.events
+        replayed = events.pop()[1]
+        events.clear()
+        if replayed != record:
+            raise ReplayMismatch(f'Round {record.number} differs from the log:\n'
+                                 f'logged:   {record.to_dict()}\nreplayed: {replayed.to_dict()}')
+
+    def _step(self, game, index):
+        """
+        Applies the script entry at index: a new table (after the player left the room) or a round.
+        """
+        kind, value = self.script[index]
+        previous = self.script[index - 1][0] if index else None
+        if kind == TABLE_RECORD:
+            if previous == ROUND_RECORD:
+                # the player played again and didn't stay in the room
+                game.play_again('y')
+                game.reset_game()
+            game.listener.writer.events.clear()
+            game.seat_bots(value)
+        else:
+            if previous == ROUND_RECORD:
+                # the player played again and stayed in the room
+                if not game.play_again('y') or not game.can_stay_in_room():
+                    raise ReplayMismatch(f'Round {value.number} can\'t be played in the same room')
+                game.stay_in_room('y')
+            self._play_round(game, value)
+
+    def replay(self, to_round=None, from_start=False):
+        """
+        Replays the session up to a round, starting from the nearest snapshot.
+        Every replayed round is checked against the log.
+
+        Parameters:
+        -----------
+        - to_round (int): The last round to replay. Default is the whole session.
+        - from_start (bool): Replay from the first round even if there is a snapshot. Default is False.
+
+        Returns:
+        --------
+        Game: The game right after to_round.
+        """
+        to_round = self.rounds_count if to_round is None else to_round
+        if not 0 <= to_round <= self.rounds_count:
+            raise ValueError(f'The session has {self.rounds_count} rounds')
+        start = max((number for number in self.snapshots if number <= to_round), default=None)
+        if start is None or from_start:
+            game, index, rounds = self._new_game(), 0, 0
+        else:
+            game, index = pickle.loads(self.snapshots[start])
+            rounds = start
+
+        with redirect_stdout(_NullOutput()):
+            while index < len(self.script):
+                kind = self.script[index][0]
+                if rounds == to_round and (to_round or kind == ROUND_RECORD):
+                    break
+                self._step(game, index)
+                index += 1
+                if kind == ROUND_RECORD:
+                    rounds += 1
+                    if rounds % self.snapshot_every == 0 and rounds not in self.snapshots:
+                        self.snapshots[rounds] = pickle.dumps((game, index))
+        return game
+
+    def state_at(self, round_number):
+        """
+        Returns the Game as it was right after a round (round 0 is the first table before any round).
+        """
+        return self.replay(round_number)
@@ -0,0 +1,151 @@
+"""
+rules.py: Defines the rule sets of the casino variants and compiles them into lookup tables.
+
+A RuleSet is compiled once when it is created:
+- dealer_hits: one byte per (soft flag, points), 1 if the dealer hits. The dealer of a table looks up
+  dealer_hits[soft * HAND_STRIDE + points] instead of checking the rules.
+- payouts: the amount paid back per bet unit for every outcome (see settlement.OUTCOMES), used by Settlement.
+- doubles: one byte per points of a two-card hand, 1 if the hand may double down.
+The original game has no doubling, splitting or insurance; the casino variants follow bj_rules (doubling on
+9, 10 or 11, splitting pairs into up to max_hands hands, insurance against a dealer's ace).
+
+Game, SimulationEngine, BatchSimulator, the environments and the solvers (strategy.py, expected_value.py)
+take a rule set as an input; the default is CLASSIC, the rules of the original game.
+
+This module includes the following classes and functions:
+- RuleSet: A compiled rule variant.
+- CLASSIC, SHOE_S17, SHOE_H17, DOUBLE_DECK_H17: The variants run at our tables.
+- RULE_SETS: The variants by name.
+"""
+
+import random
+
+from constants import BET_LIMITS, BOT_PLAYERS_LIMITS
+from deck import Deck, Shoe
+from settlement import WIN, TWENTY_ONE, PUSH, LOSE, BUST
+
+HAND_STRIDE = 32  # points of a hand are below 32, the dealer table has one row per soft flag
+
+
+class RuleSet:
+    """
+    A compiled rule variant.
+
+    Attributes:
+    -----------
+    - name (str): The name of the variant.
+    - decks_count (int): Number of decks in the shoe, or None for a single deck reshuffled before every round.
+    - penetration (float): Share of the shoe dealt before the cut card.
+    - dealer_stands_on (int): The dealer stands at this number of points (or more).
+    - dealer_hits_soft_17 (bool): True if the dealer hits a soft 17 (H17), False if the dealer stands (S17).
+    - win_payout (float): Amount paid back per bet unit for a win.
+    - blackjack_payout (float): Amount paid back per bet unit for a winner with 21 points.
+    - push_payout (float): Amount paid back per bet unit for a push.
+    - min_bet, max_bet (int): The bet limits of the seats.
+    - min_bots, max_bots (int): The limits of the number of bot players at a table.
+    - double_totals (tuple): The points of the two-card hands that may double down.
+    - max_hands (int): The most hands a seat can have after splitting pairs (1 if splitting isn't allowed).
+    - insurance (bool): True if the players may take insurance when the dealer's upcard is an ace.
+    - insurance_payout (float): Amount paid back per insurance bet unit when the dealer has a blackjack.
+    - dealer_hits (bytes): Compiled dealer action: 1 at soft * HAND_STRIDE + points if the dealer hits.
+    - payouts (dict): Compiled payouts: the amount paid back per bet unit for every outcome.
+    - doubles (bytes): Compiled doubling rule: 1 at the points of a two-card hand that may double down.
+
+    Methods:
+    --------
+    - dealer_hit: Returns True if the dealer hits a hand.
+    - prize: Returns the prize of an outcome for a bet.
+    - new_deck: Returns the cards of a table playing these rules.
+    """
+
+    def __init__(self, name, decks_count=None, penetration=0.75, dealer_stands_on=17, dealer_hits_soft_17=False,
+                 win_payout=1.5, blackjack_payout=2.0, push_payout=1.0, min_bet=BET_LIMITS.get('min'),
+                 max_bet=BET_LIMITS.get('max'), min_bots=BOT_PLAYERS_LIMITS.get('min'),
+                 max_bots=BOT_PLAYERS_LIMITS.get('max'), double_totals=(), max_hands=1, insurance=False,
+                 insurance_payout=3.0):
+        """
+        Initializes and compiles a rule set. The defaults are the rules of the original game.
+        """
+        if decks_count is not None and decks_count < 1 or not 0 < penetration <= 1:
+            raise ValueError('The shoe needs at least one deck and a penetration in (0, 1]')
+        if not 0 < min_bet <= max_bet or not 0 < min_bots <= max_bots:
+            raise ValueError('The bet and bot limits must be positive ranges')
+        if max_hands < 1:
+            raise ValueError('A seat has at least one hand')
+
+        self.name = name
+        self.decks_count = decks_count
+        self.penetration = penetration
+        self.dealer_stands_on = dealer_stands_on
+        self.dealer_hits_soft_17 = dealer_hits_soft_17
+        self.win_payout = win_payout
+        self.blackjack_payout = blackjack_payout
+        self.push_payout = push_payout
+        self.min_bet = min_bet
+        self.max_bet = max_bet
+        self.min_bots = min_bots
+        self.max_bots = max_bots
+        self.double_totals = tuple(double_totals)
+        self.max_hands = max_hands
+        self.insurance = insurance
+        self.insurance_payout = insurance_payout
+
+        dealer_hits = bytearray(2 * HAND_STRIDE)
+        for soft in (0, 1):
+            for points in range(HAND_STRIDE):
+                dealer_hits[soft * HAND_STRIDE + points] = (
+                    points < dealer_stands_on or soft and points == 17 and dealer_hits_soft_17)
+        self.dealer_hits = bytes(dealer_hits)
+        self.payouts = {WIN: win_payout, TWENTY_ONE: blackjack_payout, PUSH: push_payout, LOSE: 0, BUST: 0}
+        self.doubles = bytes(points in self.double_totals for points in range(HAND_STRIDE))
+
+    def dealer_hit(self, points, soft):
+        """
+        Returns True if the dealer hits a hand.
+
+        Parameters:
+        -----------
+        - points (int): The dealer's points.
+        - soft (bool): True if an ace of the hand is counted as 11.
+        """
+        return points < HAND_STRIDE and self.dealer_hits[soft * HAND_STRIDE + points] == 1
+
+    def prize(self, outcome, bet):
+        """
+        Returns the amount paid back for an outcome and a bet.
+        """
+        return round(self.payouts[outcome] * bet)
+
+    def new_deck(self, rng=random, lazy=False, pool=None):
+        """
+        Returns the cards of a table playing these rules: a Shoe, or a single Deck if decks_count is None.
+
+        Parameters:
+        -----------
+        - rng: Random number generator used for the shuffles. Default is the random module.
+        - lazy (bool): Make a Shoe that shuffles incrementally while dealing (see Shoe). Default is False.
+        - pool (ShoePool): A pool of pre-shuffled shoes of the rules' size (see shoe_pool.py). Default is None.
+        """
+        if self.decks_count is None:
+            return Deck(rng, pool)
+        return Shoe(self.decks_count, self.penetration, rng, lazy, pool)
+
+    def __repr__(self):
+        return f'RuleSet({self.name!r})'
+
+    def __reduce__(self):
+        # the predefined variants stay the same objects (and cache keys) after pickling
+        if RULE_SETS.get(self.name) is self:
+            return self.name.upper()
+        return super().__reduce__()
+
+
+_CASINO_OPTIONS = {'double_totals': (9, 10, 11), 'max_hands': 4, 'insurance': True}
+
+CLASSIC = RuleSet('classic')
+SHOE_S17 = RuleSet('shoe_s17', decks_count=6, **_CASINO_OPTIONS)
+SHOE_H17 = RuleSet('shoe_h17', decks_count=6, dealer_hits_soft_17=True, **_CASINO_OPTIONS)
+DOUBLE_DECK_H17 = RuleSet('double_deck_h17', decks_count=2, penetration=0.65, dealer_hits_soft_17=True,
+                          min_bet=10, max_bet=1000, **_CASINO_OPTIONS)
+
+RULE_SETS = {rules.name: rules for rules in (CLASSIC, SHOE_S17, SHOE_H17, DOUBLE_DECK_H17)}
@@ -0,0 +1,356 @@
+"""
+server.py: Hosts many Blackjack tables in one process with asyncio.
+
+Every connection (local TCP or Unix socket) opens its own table: a Game instance with the connected human
+player and bot players. The table's turn loop runs as a coroutine. Bot turns resolve immediately (the games
+use an InstantPacer) and only the human decisions are awaited, each with a timeout, so one slow client never
+stalls the other tables.
+
+Protocol (UTF-8 text lines):
+- The server sends the game's output as plain lines.
+- A line starting with '?' is a prompt: '?bots <min>-<max>', '?bet <min>-<max>', '?insurance <bet>', '?hit <points>',
+  '?again' or '?room'. The client answers with one line (a number, or 'y'/'n').
+- A hand that may double down or split is asked '?play <points> <keys>' instead of '?hit', and the client answers
+  with one of the keys ('s' - stand, 'h' - hit, 'd' - double down, 'p' - split).
+- A line '!bye' ends the table.
+
+This module includes the following classes and functions:
+- RemotePlayer: Human player whose answers come from the table's connection.
+- Table: Drives the turn loop of one Game as a coroutine.
+- TableServer: Accepts connections and keeps the tables in memory.
+- main: Runs the server from the command line.
+"""
+
+import argparse
+import asyncio
+from contextlib import redirect_stdout
+import io
+import itertools
+
+from game import Game
+from pacing import InstantPacer
+from players import ACTION_KEYS, HIT, HIT_OR_STAND, STAND, Player
+from rules import RULE_SETS, SHOE_S17
+
+
+class RemotePlayer(Player):
+    """
+    Human player whose answers come from the table's connection.
+
+    The table awaits the answers of the client and stores them in the player before the game asks for them.
+
+    Attributes:
+    -----------
+    - answer: The last answer of the client (the bet amount or True to take insurance).
+    - actions (list): The actions of the player's hands in the next pass, consumed in order.
+    """
+
+    def __init__(self, name='YOU'):
+        super().__init__(name)
+        self.answer = None
+        self.actions = []
+
+    def make_a_bet(self):
+        """
+        Makes the bet received from the client.
+
+        Returns:
+        --------
+        int: The bet amount chosen by the client.
+        """
+        self.player_bet = self.answer
+        print(f'{self.name} put {self.player_bet}$')
+        self.player_money -= self.player_bet
+        return self.player_bet
+
+    def hit_or_stand(self):
+        """
+        Returns the hit/stand decision received from the client.
+
+        Returns:
+        --------
+        bool: True if the client decided to hit, False otherwise.
+        """
+        return self.choose_action(HIT_OR_STAND) == HIT
+
+    def choose_action(self, allowed):
+        """
+        Returns the next action received from the client. A double down or a split that is no more allowed
+        (an earlier hand of the pass used the money) becomes a hit.
+
+        Returns:
+        --------
+        int: The action of the hand.
+        """
+        action = self.actions.pop(0) if self.actions else STAND
+        if action not in allowed:
+            action = HIT
+        if action == HIT:
+            print(f'{self.name} decided to take one more card.')
+        elif action == STAND:
+            print(f'{self.name} don\'t want to take anymore card.')
+        return action
+
+    def take_insurance(self):
+        """
+        Returns the insurance decision received from the client.
+        """
+        return bool(self.answer)
+
+
+class Table:
+    """
+    Drives the turn loop of one Game (the same steps as Game.start_game) as a coroutine.
+
+    Attributes:
+    -----------
+    - table_id (int): The number of the table on the server.
+    - game (Game): The game played at the table.
+    - decision_timeout (float): Seconds to wait for an answer before the default answer is used.
+    - decisions (list): Latency of every answered prompt, in seconds.
+    - rounds (int): Number of rounds played at the table.
+
+    Methods:
+    --------
+    - step: Runs a synchronous game step and sends its output to the client.
+    - ask: Sends a prompt and awaits a valid answer.
+    - run: Plays the game until the player leaves.
+    """
+
+    def __init__(self, table_id, reader, writer, decision_timeout=60.0, rules=SHOE_S17):
+        self.table_id = table_id
+        self.reader = reader
+        self.writer = writer
+        self.decision_timeout = decision_timeout
+        self.player = RemotePlayer()
+        self.game = Game(rules.new_deck(), InstantPacer(), self.player, rules=rules)
+        self.decisions = []
+        self.rounds = 0
+
+    async def send(self, text):
+        """
+        Sends text to the client.
+        """
+        if text:
+            self.writer.write(text.encode())
+            await self.writer.drain()
+
+    async def step(self, method, *args):
+        """
+        Runs a synchronous game step and sends its output to the client.
+
+        The step doesn't await anything, so no other table runs while stdout is redirected.
+
+        Returns:
+        --------
+        The result of the step.
+        """
+        output = io.StringIO()
+        with redirect_stdout(output):
+            result = method(*args)
+        await self.send(output.getvalue())
+        return result
+
+    async def ask(self, prompt, parse, default):
+        """
+        Sends a prompt and awaits a valid answer.
+
+        Parameters:
+        -----------
+        - prompt (str): The prompt line, without the leading '?'.
+        - parse (callable): Function returning the parsed answer, raising ValueError for an invalid one.
+        - default: The answer used after the decision timeout.
+
+        Returns:
+        --------
+        The parsed answer.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.send(f'?{prompt}\n')
+            started = loop.time()
+            try:
+                line = await asyncio.wait_for(self.reader.readline(), self.decision_timeout)
+            except asyncio.TimeoutError:
+                await self.send('‼️Time is up!\n')
+                return default
+            if not line:
+                raise ConnectionResetError('The client has left the table')
+            try:
+                answer = parse(line.decode().strip().lower())
+            except ValueError:
+                await self.send('‼️Can\'t accept incorrect input. Try again!\n')
+            else:
+                self.decisions.append(loop.time() - started)
+                return answer
+
+    async def ask_bots_count(self):
+        low, high = self.game.min_players_count, self.game.max_players_count
+        return await self.ask(f'bots {low}-{high}', _number_parser(low, high), low)
+
+    async def ask_yes_no(self, prompt):
+        return await self.ask(prompt, _yes_no, 'n')
+
+    async def ask_action(self, points, allowed):
+        if allowed is HIT_OR_STAND:
+            return HIT if await self.ask_yes_no(f'hit {points}') == 'y' else STAND
+        keys = ''.join(key for key, action in ACTION_KEYS.items() if action in allowed)
+        return await self.ask(f'play {points} {keys}', _action_parser(allowed), STAND)
+
+    async def run(self):
+        """
+        Plays the game until the player leaves (the same steps as Game.start_game).
+        """
+        game = self.game
+        await self.send(f'👋 Hello! You are at table #{self.table_id}. Let\'s start our BLACKJACK GAME!\n')
+        await self.step(game.seat_bots, await self.ask_bots_count())
+
+        while True:
+            high = min(self.player.max_bet, self.player.player_money)
+            self.player.answer = await self.ask(f'bet {self.player.min_bet}-{high}',
+                                                _number_parser(self.player.min_bet, high), self.player.min_bet)
+            await self.step(game.making_a_bets)
+            await self.step(game.initial_deal)
+            await self.step(print, '\nOK, guys, open your cards!\n')
+            await self.step(game.print_all_players_cards)
+            insurance = self.player.insurance_bet(game.rules, game.game_dealer)
+            if insurance:
+                self.player.answer = await self.ask_yes_no(f'insurance {insurance}') == 'y'
+            await self.step(game.offer_insurance)
+
+            while not await self.step(game.check_round):
+                self.player.actions = [await self.ask_action(points, allowed)
+                                       for points, allowed in game.pending_hands(self.player)]
+                if await self.step(game.hit_pass):
+                    break
+            self.rounds += 1
+
+            await self.send(f'\n💰Your current balance: ${self.player.player_money}\n')
+            if not await self.step(game.play_again, await self.ask_yes_no('again')):
+                await self.send('👋 Thank you for playing! Have a great day!\n')
+                break
+            if not (game.can_stay_in_room() and await self.step(game.stay_in_room, await self.ask_yes_no('room'))):
+                await self.step(game.reset_game)
+                await self.step(game.seat_bots, await self.ask_bots_count())
+        await self.send('!bye\n')
+
+
+def _yes_no(answer):
+    if answer not in ['y', 'n']:
+        raise ValueError(answer)
+    return answer
+
+
+def _action_parser(allowed):
+    def parse(answer):
+        action = ACTION_KEYS.get(answer)
+        if action not in allowed:
+            raise ValueError(answer)
+        return action
+    return parse
+
+
+def _number_parser(low, high):
+    def parse(answer):
+        number = int(answer)
+        if not low <= number <= high:
+            raise ValueError(answer)
+        return number
+    return parse
+
+
+class TableServer:
+    """
+    Accepts connections and keeps their tables in memory, one table per connection.
+
+    Attributes:
+    -----------
+    - tables (dict): Mapping of the table number to the running Table.
+    - finished_tables (int): Number of closed tables.
+    - decision_timeout (float): Seconds to wait for a human decision.
+    - rules (RuleSet): The rule set of the tables.
+
+    Methods:
+    --------
+    - start: Starts listening on a TCP port and/or a Unix socket.
+    - serve_forever: Serves until cancelled.
+    - close: Stops accepting connections.
+    """
+
+    def __init__(self, decision_timeout=60.0, rules=SHOE_S17):
+        self.decision_timeout = decision_timeout
+        self.rules = rules
+        self.tables = {}
+        self.finished_tables = 0
+        self.servers = []
+        self._table_ids = itertools.count(1)
+
+    async def handle_client(self, reader, writer):
+        """
+        Opens a table for a new connection and plays it until the client leaves.
+        """
+        table = Table(next(self._table_ids), reader, writer, self.decision_timeout, self.rules)
+        self.tables[table.table_id] = table
+        try:
+            await table.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.tables[table.table_id]
+            self.finished_tables += 1
+            writer.close()
+
+    async def start(self, host='127.0.0.1', port=None, unix_path=None):
+        """
+        Starts listening on a local TCP port and/or a Unix socket.
+
+        Parameters:
+        -----------
+        - host (str): The TCP host. Default is '127.0.0.1'.
+        - port (int): The TCP port (0 picks a free one). If None, no TCP server is started.
+        - unix_path (str): The path of the Unix socket. If None, no Unix server is started.
+
+        Returns:
+        --------
+        list: The started asyncio servers.
+        """
+        if port is not None:
+            self.servers.append(await asyncio.start_server(self.handle_client, host, port))
+        if unix_path is not None:
+            self.servers.append(await asyncio.start_unix_server(self.handle_client, unix_path))
+        return self.servers
+
+    async def serve_forever(self):
+        """
+        Serves the connections until cancelled.
+        """
+        await asyncio.gather(*(server.serve_forever() for server in self.servers))
+
+    def close(self):
+        """
+        Stops accepting connections.
+        """
+        for server in self.servers:
+            server.close()
+
+
+async def main(arguments=None):
+    """
+    Runs the server from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Blackjack multi-table server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='path of a Unix socket to listen on as well')
+    parser.add_argument('--timeout', type=float, default=60.0, help='seconds to wait for a human decision')
+    parser.add_argument('--rules', choices=RULE_SETS, default=SHOE_S17.name, help='rule set of the tables')
+    options = parser.parse_args(arguments)
+
+    server = TableServer(options.timeout, RULE_SETS[options.rules])
+    await server.start(options.host, options.port, options.unix)
+    print(f'🃏Serving Blackjack tables on {options.host}:{options.port}')
+    await server.serve_forever()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
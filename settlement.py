@@ -0,0 +1,264 @@
+"""
+settlement.py: Settles the seats of a round in linear time, without touching the seating.
+
+The rules are the ones of Game.check_winner and Game.distribute_prizes:
+- a player (not the dealer) with more than 21 points is busted and leaves the round,
+- if the dealer is busted, every player still in the round wins,
+- otherwise everyone with 21 points (the dealer included) wins with 21 points and the round is over,
+- otherwise the only seat left in the round with less than 21 points wins,
+- when nobody wants one more card, a player beating the dealer (below 21) wins
+  and a player with the dealer's points pushes.
+Every other seat loses its bet. The prizes come from the payouts of the rule set (see rules.py): by default
+1.5x the bet for a win, 2x for 21 points and the bet back for a push.
+
+The seats are indexed in the seating order of the round. Every check is a single pass over the seats'
+points, the seats still in the round are flags instead of a list to remove players from, and the prizes
+are a payout vector aligned with the seats.
+
+When the rules allow splitting pairs, every hand takes part in the round on its own: the vectors have
+a fixed room of hands * seats entries, entry hand * seats + seat for a hand of a seat, so hand 0 of every
+seat is at the seat's index and a split only marks a free entry as in the round. A doubled hand doubles
+the bet of its entry. Insurance bets are settled once the dealer's first two cards are known and are added
+to the seat totals (seat_bets, seat_prizes).
+
+This module includes the following classes and functions:
+- OUTCOMES: The outcomes of a seat (also exported by engine.py).
+- DEFAULT_PAYOUTS: The payouts of the original game.
+- Settlement: The outcomes and the payout vector of the seats of a round.
+"""
+
+WIN = 'win'
+TWENTY_ONE = 'twenty_one'
+PUSH = 'push'
+LOSE = 'lose'
+BUST = 'bust'
+OUTCOMES = (WIN, TWENTY_ONE, PUSH, LOSE, BUST)
+DEFAULT_PAYOUTS = {WIN: 1.5, TWENTY_ONE: 2.0, PUSH: 1.0, LOSE: 0, BUST: 0}
+
+
+class Settlement:
+    """
+    The outcomes and the payout vector of the seats of a round.
+
+    Attributes:
+    -----------
+    - seats (int): Number of seats.
+    - hands (int): The most hands of a seat.
+    - bets (list): The bet of every entry (hand * seats + seat).
+    - dealer (int): The index of the dealer's seat.
+    - payouts (dict): The amount paid back per bet unit for every outcome.
+    - active (bytearray): 1 for the entries still in the round, 0 for the busted and the unused ones.
+    - outcomes (list): The outcome of every entry (see OUTCOMES), LOSE until the entry is settled.
+    - prizes (list): The payout vector: the amount paid back to every entry (including the bet).
+    - insurance (list): The insurance bet of every seat, or None if nobody took insurance.
+    - insurance_prizes (list): The amount paid back for the insurance bets, or None.
+    - busted (list): The entries busted by the last check.
+    - over (bool): True once the round is settled.
+
+    Methods:
+    --------
+    - check: Settles the round if it has winners (Game.check_winner).
+    - stand: Settles the round when nobody wants one more card (Game.distribute_prizes).
+    - split: Adds a split hand of a seat to the round.
+    - double: Doubles the bet of a hand.
+    - insure: Settles the insurance bet of a seat.
+    - points: Returns the points of the entries of the seats' players.
+    - seat_bets, seat_prizes: Return the totals of every seat.
+    - seats_in_play: Returns the indexes of the seats still in the round.
+    """
+
+    def __init__(self, bets, dealer, payouts=None, hands=1):
+        """
+        Initializes the settlement of a new round.
+
+        Parameters:
+        -----------
+        - bets (list): The bets of the seats in the seating order.
+        - dealer (int): The index of the dealer's seat.
+        - payouts (dict): The payouts of the rule set (RuleSet.payouts). Default is DEFAULT_PAYOUTS.
+        - hands (int): The most hands of a seat (RuleSet.max_hands). Default is 1.
+        """
+        self.seats = len(bets)
+        self.hands = hands
+        unused = (hands - 1) * self.seats
+        self.bets = list(bets) + [0] * unused
+        self.dealer = dealer
+        self.payouts = payouts if payouts is not None else DEFAULT_PAYOUTS
+        self.active = bytearray(b'\x01' * self.seats + b'\x00' * unused)
+        self.outcomes = [LOSE] * len(self.bets)
+        self.prizes = [0] * len(self.bets)
+        self.insurance = None
+        self.insurance_prizes = None
+        self.busted = []
+        self.over = False
+
+    def _settle(self, seat, outcome):
+        self.outcomes[seat] = outcome
+        self.prizes[seat] = round(self.payouts[outcome] * self.bets[seat])
+
+    def check(self, points):
+        """
+        Removes the busted players from the round and settles it if it has winners.
+
+        Parameters:
+        -----------
+        - points (list): The points of the entries.
+
+        Returns:
+        --------
+        bool: True if the round is over, False otherwise.
+        """
+        dealer = self.dealer
+        dealer_busted = points[dealer] > 21
+        active = self.active
+        outcomes = self.outcomes
+        self.busted = []
+        remaining = 0
+        last = None
+        twenty_one = False
+        for seat, seat_points in enumerate(points):
+            if not active[seat]:
+                continue
+            if seat != dealer:
+                if seat_points > 21:
+                    active[seat] = 0
+                    outcomes[seat] = BUST
+                    self.busted.append(seat)
+                    continue
+                if dealer_busted:
+                    self._settle(seat, WIN)
+                    continue
+            remaining += 1
+            last = seat
+            if seat_points == 21 and not dealer_busted:
+                self._settle(seat, TWENTY_ONE)
+                twenty_one = True
+
+        if dealer_busted:
+            active[dealer] = 0
+            outcomes[dealer] = BUST
+            self.over = True
+        elif twenty_one:
+            self.over = True
+        elif remaining == 1 and points[last] < 21:
+            self._settle(last, WIN)
+            self.over = True
+        return self.over
+
+    def stand(self, points):
+        """
+        Settles the round when nobody wants one more card: the players are compared with the dealer.
+
+        Parameters:
+        -----------
+        - points (list): The points of the entries.
+        """
+        dealer = self.dealer
+        dealer_points = points[dealer]
+        for seat, seat_points in enumerate(points):
+            if not self.active[seat]:
+                continue
+            if 21 > seat_points > dealer_points:
+                self._settle(seat, WIN)
+            elif seat_points == dealer_points and seat != dealer:
+                self._settle(seat, PUSH)
+        self.over = True
+
+    def split(self, seat, hand, bet):
+        """
+        Adds a split hand of a seat to the round.
+
+        Parameters:
+        -----------
+        - seat (int): The index of the seat.
+        - hand (int): The index of the new hand (Hands.split).
+        - bet (int): The bet of the new hand.
+
+        Returns:
+        --------
+        int: The entry of the hand.
+        """
+        entry = hand * self.seats + seat
+        self.bets[entry] = bet
+        self.active[entry] = 1
+        return entry
+
+    def double(self, seat, hand):
+        """
+        Doubles the bet of a hand of a seat.
+        """
+        self.bets[hand * self.seats + seat] *= 2
+
+    def insure(self, seat, bet, dealer_blackjack, payout=3.0):
+        """
+        Settles the insurance bet of a seat: it pays when the dealer has a blackjack.
+
+        Parameters:
+        -----------
+        - seat (int): The index of the seat.
+        - bet (int): The insurance bet.
+        - dealer_blackjack (bool): True if the dealer's first two cards are a blackjack.
+        - payout (float): Amount paid back per insurance bet unit (RuleSet.insurance_payout). Default is 3 (2 to 1).
+        """
+        if self.insurance is None:
+            self.insurance = [0] * self.seats
+            self.insurance_prizes = [0] * self.seats
+        self.insurance[seat] = bet
+        self.insurance_prizes[seat] = round(payout * bet) if dealer_blackjack else 0
+
+    def points(self, players):
+        """
+        Returns the points of the entries: hand 0 of every seat, then the split hands.
+
+        Parameters:
+        -----------
+        - players (list): The players of the seats in the seating order.
+
+        Returns:
+        --------
+        list: The points of every entry.
+        """
+        if self.hands == 1:
+            return [player.player_points for player in players]
+        seats = self.seats
+        points = [0] * len(self.bets)
+        for seat, player in enumerate(players):
+            points[seat] = player.player_points
+            hands = player.hands
+            for hand in range(1, hands.count):
+                points[hand * seats + seat] = hands.points[hand]
+        return points
+
+    def _seat_totals(self, values, insurance):
+        if self.hands == 1 and insurance is None:
+            return values
+        seats = self.seats
+        totals = values[:seats]
+        for entry in range(seats, len(values)):
+            totals[entry % seats] += values[entry]
+        if insurance is not None:
+            totals = [total + extra for total, extra in zip(totals, insurance)]
+        return totals
+
+    def seat_bets(self):
+        """
+        Returns the total bet of every seat: its hands and its insurance.
+        """
+        return self._seat_totals(self.bets, self.insurance)
+
+    def seat_prizes(self):
+        """
+        Returns the total amount paid back to every seat: its hands and its insurance.
+        """
+        return self._seat_totals(self.prizes, self.insurance_prizes)
+
+    def seats_in_play(self):
+        """
+        Returns the indexes of the seats with a hand still in the round.
+        """
+        seats = self.seats
+        in_play = bytearray(seats)
+        for entry, active in enumerate(self.active):
+            if active:
+                in_play[entry % seats] = 1
+        return [seat for seat, active in enumerate(in_play) if active]
@@ -0,0 +1,139 @@
+"""
+shoe_pool.py: Shuffles shoes ahead of time in a background thread, so a reshuffle is a single handover.
+
+A ShoePool owns a NumPy PCG64 generator and a background worker that shuffles whole shoes of card codes
+(the integers used by Deck and Shoe) in bulk: a batch of shoes is one Generator.permuted call on a 2-D array,
+one row per shoe. The shuffled shoes wait in a bounded ring buffer; a Deck or a Shoe created with the pool
+takes the next one when it reshuffles, and the worker refills the free slots while the rounds are played.
+
+The shoes are taken in the order they were shuffled, so a seeded pool deals the same shoes whatever the
+timing of the worker.
+
+This module includes the following classes and functions:
+- ShoePool: Bounded ring buffer of pre-shuffled shoes filled by a background worker.
+"""
+
+import threading
+
+import numpy as np
+
+from deck import CARDS
+
+
+class ShoePool:
+    """
+    Bounded ring buffer of pre-shuffled shoes filled by a background worker.
+
+    Attributes:
+    -----------
+    - decks_count (int): Number of 52-card decks in every shoe.
+    - size (int): Number of slots of the ring buffer.
+    - batch (int): Number of shoes shuffled by one call of the generator.
+    - generator (numpy.random.Generator): The PCG64 generator of the shuffles.
+    - taken (int): Number of shoes taken from the pool.
+    - waits (int): Number of takes that had to wait for the worker (the buffer was empty).
+
+    Methods:
+    --------
+    - take: Returns the next shuffled shoe.
+    - close: Stops the worker.
+    """
+
+    def __init__(self, decks_count=6, size=16, batch=4, seed=None):
+        """
+        Initializes a new pool and starts its worker.
+
+        Parameters:
+        -----------
+        - decks_count (int): Number of 52-card decks in every shoe. Default is 6.
+        - size (int): Number of slots of the ring buffer. Default is 16.
+        - batch (int): Number of shoes shuffled by one call of the generator (at most size). Default is 4.
+        - seed: Seed of the PCG64 generator. Default is None (fresh entropy).
+        """
+        if decks_count < 1 or size < 1 or not 1 <= batch <= size:
+            raise ValueError('The pool needs at least one deck, one slot and a batch of 1 to size shoes')
+        self.decks_count = decks_count
+        self.size = size
+        self.batch = batch
+        self.generator = np.random.Generator(np.random.PCG64(seed))
+        self.taken = 0
+        self.waits = 0
+        self._pack = np.tile(np.arange(len(CARDS), dtype=np.uint8), decks_count)
+        self._slots = [None] * size
+        self._head = 0
+        self._count = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _shuffle_batch(self, count):
+        """
+        Returns count shuffled shoes as bytearrays, shuffled together by the generator.
+        """
+        shoes = np.tile(self._pack, (count, 1))
+        self.generator.permuted(shoes, axis=1, out=shoes)
+        return [bytearray(row.tobytes()) for row in shoes]
+
+    def _fill(self):
+        """
+        The worker: shuffles batches of shoes into the free slots until the pool is closed.
+        """
+        condition = self._condition
+        while True:
+            with condition:
+                while self._count > self.size - self.batch and not self._closed:
+                    condition.wait()
+                if self._closed:
+                    return
+            shoes = self._shuffle_batch(self.batch)
+            with condition:
+                for shoe in shoes:
+                    self._slots[(self._head + self._count) % self.size] = shoe
+                    self._count += 1
+                condition.notify_all()
+
+    def take(self):
+        """
+        Returns the next shuffled shoe, waiting for the worker if the buffer is empty.
+
+        Returns:
+        --------
+        bytearray: The card codes of the shoe, decks_count * 52 of them.
+        """
+        condition = self._condition
+        with condition:
+            if not self._count:
+                self.waits += 1
+                while not self._count:
+                    if self._closed:
+                        raise RuntimeError('The shoe pool is closed')
+                    condition.wait()
+            shoe = self._slots[self._head]
+            self._slots[self._head] = None
+            self._head = (self._head + 1) % self.size
+            self._count -= 1
+            self.taken += 1
+            condition.notify_all()
+        return shoe
+
+    def close(self):
+        """
+        Stops the worker. The shoes left in the buffer can still be taken.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def __len__(self):
+        """
+        Returns the number of shuffled shoes waiting in the buffer.
+        """
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,440 @@
+"""
+strategy.py: Computes and stores the basic strategy of the Blackjack game.
+
+The solver is exact for an infinite deck: the dealer's final-total distribution for every upcard and the
+expected value of every player action are computed recursively with memoization, following bj_rules
+(split aces get one card each, no resplits). Everything else comes from a rule set (rules.py): the dealer
+plays its compiled action, the outcomes pay its payouts (a win pays 1.5 times the bet and 21 twice the bet
+at our tables), the hand may double down on its double_totals and pairs are split only if max_hands allows
+it. Every rule set but CLASSIC gets a table file of its own.
+The decisions are saved to a compact table file, so a bot decision at runtime is a single indexed lookup.
+
+This module includes the following classes and functions:
+- dealer_probabilities: Returns the dealer's final-total distribution for an upcard.
+- stand_ev, hit_ev, double_ev, split_ev: Expected values of the player actions.
+- best_action: Returns the best action for a player state.
+- StrategyTable: Compact decision table loaded from a file.
+- build_table: Solves every player state and returns a StrategyTable.
+- table_path: Returns the path of the table file of a rule set.
+- load_table: Loads the table file, building and saving it first if it's missing or outdated.
+- BasicStrategyDecider: Decider for the headless engine that follows the strategy table.
+"""
+
+from functools import lru_cache
+import os
+
+from engine import Decider
+from players import STAND, HIT, DOUBLE, SPLIT
+from rules import CLASSIC
+from settlement import WIN, TWENTY_ONE, PUSH, LOSE, BUST as BUSTED
+
+ACTION_NAMES = ('stand', 'hit', 'double', 'split')
+
+# points of the drawn card (2-11, the ace is 11) and their probabilities in an infinite deck
+CARD_VALUES = tuple(range(2, 12))
+CARD_PROBABILITIES = {value: (4 if value == 10 else 1) / 13 for value in CARD_VALUES}
+
+BUST = 22
+BLACKJACK = 'blackjack'
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'basic_strategy.bin')
+_TABLE_MAGIC = b'BJST'
+_TABLE_VERSION = 2
+_TOTALS = 22
+_UPCARDS = 12
+
+
+def _add_card(hard, has_ace, value):
+    """
+    Adds a card to a hand state and returns the new (hard, has_ace) state. Aces are counted as 1 in hard.
+    """
+    if value == 11:
+        return hard + 1, True
+    return hard + value, has_ace
+
+
+def _points(hard, has_ace):
+    """
+    Returns the points of a hand state, counting one ace as 11 unless the hand would bust.
+    """
+    return hard + 10 if has_ace and hard <= 11 else hard
+
+
+@lru_cache(maxsize=None)
+def _dealer_final(hard, has_ace, rules=CLASSIC):
+    """
+    Returns the distribution of the dealer's final points from a hand state.
+
+    Returns:
+    --------
+    dict: Mapping of the final points (17-21 or BUST) to the probability.
+    """
+    points = _points(hard, has_ace)
+    if points > 21:
+        return {BUST: 1.0}
+    if not rules.dealer_hit(points, has_ace and hard <= 11):
+        return {points: 1.0}
+
+    distribution = {}
+    for value, probability in CARD_PROBABILITIES.items():
+        for final, final_probability in _dealer_final(*_add_card(hard, has_ace, value), rules).items():
+            distribution[final] = distribution.get(final, 0.0) + probability * final_probability
+    return distribution
+
+
+@lru_cache(maxsize=None)
+def dealer_probabilities(upcard, rules=CLASSIC):
+    """
+    Returns the dealer's final-total distribution for an upcard.
+
+    Parameters:
+    -----------
+    - upcard (int): Points of the dealer's face-up card (2-11, the ace is 11).
+    - rules (RuleSet): The rules the dealer plays. Default is CLASSIC.
+
+    Returns:
+    --------
+    dict: Mapping of the final points (17-21, BUST or BLACKJACK) to the probability.
+    """
+    distribution = {}
+    up_state = _add_card(0, False, upcard)
+    for value, probability in CARD_PROBABILITIES.items():
+        state = _add_card(*up_state, value)
+        if _points(*state) == 21:
+            finals = {BLACKJACK: 1.0}
+        else:
+            finals = _dealer_final(*state, rules)
+        for final, final_probability in finals.items():
+            distribution[final] = distribution.get(final, 0.0) + probability * final_probability
+    return distribution
+
+
+def _net(rules, outcome):
+    """
+    Returns the net amount won per bet unit for an outcome: the payout minus the bet.
+    """
+    return rules.payouts[outcome] - 1
+
+
+@lru_cache(maxsize=None)
+def stand_ev(points, upcard, rules=CLASSIC):
+    """
+    Returns the expected value of standing with the given points, per bet unit.
+
+    A hand of 21 points is paid as soon as it's dealt; otherwise the hand loses to a dealer's 21 or higher
+    points, wins when the dealer busts or has less points and is pushed at equal points.
+    """
+    if points > 21:
+        return _net(rules, BUSTED)
+    if points == 21:
+        return _net(rules, TWENTY_ONE)
+    win, push, lose = _net(rules, WIN), _net(rules, PUSH), _net(rules, LOSE)
+    ev = 0.0
+    for final, probability in dealer_probabilities(upcard, rules).items():
+        if final == BLACKJACK or final != BUST and final > points:
+            ev += lose * probability
+        elif final == BUST or final < points:
+            ev += win * probability
+        else:
+            ev += push * probability
+    return ev
+
+
+@lru_cache(maxsize=None)
+def _best_ev(hard, has_ace, upcard, rules=CLASSIC):
+    """
+    Returns the expected value of the best of standing and hitting from a hand state.
+    """
+    points = _points(hard, has_ace)
+    if points > 21:
+        return _net(rules, BUSTED)
+    return max(stand_ev(points, upcard, rules), _hit_ev(hard, has_ace, upcard, rules))
+
+
+@lru_cache(maxsize=None)
+def _hit_ev(hard, has_ace, upcard, rules=CLASSIC):
+    return sum(probability * _best_ev(*_add_card(hard, has_ace, value), upcard, rules)
+               for value, probability in CARD_PROBABILITIES.items())
+
+
+def _state(points, soft):
+    """
+    Returns the (hard, has_ace) state of a hand with the given points.
+    """
+    return (points - 10, True) if soft else (points, False)
+
+
+def hit_ev(points, soft, upcard, rules=CLASSIC):
+    """
+    Returns the expected value of hitting and then playing on optimally, per bet unit.
+    """
+    return _hit_ev(*_state(points, soft), upcard, rules)
+
+
+def double_ev(points, soft, upcard, rules=CLASSIC):
+    """
+    Returns the expected value of doubling the bet and taking exactly one more card, per initial bet unit.
+    """
+    hard, has_ace = _state(points, soft)
+    return 2 * sum(probability * stand_ev(_points(*_add_card(hard, has_ace, value)), upcard, rules)
+                   for value, probability in CARD_PROBABILITIES.items())
+
+
+def _two_card_ev(hard, has_ace, upcard, rules=CLASSIC):
+    """
+    Returns the expected value of a two-card hand, doubling where the rules allow it.
+    """
+    ev = _best_ev(hard, has_ace, upcard, rules)
+    points = _points(hard, has_ace)
+    if rules.doubles[points]:
+        ev = max(ev, double_ev(points, has_ace and hard <= 11, upcard, rules))
+    return ev
+
+
+@lru_cache(maxsize=None)
+def split_ev(value, upcard, rules=CLASSIC):
+    """
+    Returns the expected value of splitting a pair of cards with the given points, per initial bet unit.
+
+    Every hand gets one more card; split aces stand after it, other hands are played optimally.
+    """
+    one_hand = 0.0
+    first = _add_card(0, False, value)
+    for second, probability in CARD_PROBABILITIES.items():
+        hard, has_ace = _add_card(*first, second)
+        if value == 11:
+            one_hand += probability * stand_ev(_points(hard, has_ace), upcard, rules)
+        else:
+            one_hand += probability * _two_card_ev(hard, has_ace, upcard, rules)
+    return 2 * one_hand
+
+
+def best_action(points, soft, upcard, pair_value=None, rules=CLASSIC):
+    """
+    Returns the best action for a two-card player state.
+
+    Parameters:
+    -----------
+    - points (int): The player's points.
+    - soft (bool): True if an ace of the hand is counted as 11.
+    - upcard (int): Points of the dealer's face-up card.
+    - pair_value (int): Points of the paired cards, if the hand is a pair.
+    - rules (RuleSet): The rules of the table. Default is CLASSIC.
+
+    Returns:
+    --------
+    int: One of STAND, HIT, DOUBLE or SPLIT, DOUBLE and SPLIT only where the rules allow them.
+    """
+    evs = {STAND: stand_ev(points, upcard, rules), HIT: hit_ev(points, soft, upcard, rules)}
+    if rules.doubles[points]:
+        evs[DOUBLE] = double_ev(points, soft, upcard, rules)
+    if pair_value is not None and rules.max_hands > 1:
+        evs[SPLIT] = split_ev(pair_value, upcard, rules)
+    return max(evs, key=evs.get)
+
+
+class StrategyTable:
+    """
+    Compact decision table of the basic strategy.
+
+    The table is a bytes object: one action code per (soft flag, points, upcard) followed by
+    one action code per (pair points, upcard), so a decision is a single indexed read.
+
+    Methods:
+    --------
+    - action: Returns the action for a player state.
+    - pair_action: Returns the action for a pair.
+    - save: Writes the table to a file.
+    - load: Reads a table from a file.
+    """
+
+    _PAIRS_OFFSET = 2 * _TOTALS * _UPCARDS
+
+    def __init__(self, data):
+        """
+        Initializes a new table.
+
+        Parameters:
+        -----------
+        - data (bytes): The action codes of the table.
+        """
+        if len(data) != self._PAIRS_OFFSET + _UPCARDS * _UPCARDS:
+            raise ValueError('The strategy table has a wrong size')
+        self.data = bytes(data)
+
+    def action(self, points, soft, upcard):
+        """
+        Returns the action for a player state. DOUBLE means "double if allowed, otherwise hit".
+
+        Parameters:
+        -----------
+        - points (int): The player's points (at most 21).
+        - soft (bool): True if an ace of the hand is counted as 11.
+        - upcard (int): Points of the dealer's face-up card (2-11).
+
+        Returns:
+        --------
+        int: One of STAND, HIT or DOUBLE.
+        """
+        return self.data[(soft * _TOTALS + points) * _UPCARDS + upcard]
+
+    def pair_action(self, pair_value, upcard):
+        """
+        Returns the action for a pair of cards with the given points.
+
+        Returns:
+        --------
+        int: One of STAND, HIT, DOUBLE or SPLIT.
+        """
+        return self.data[self._PAIRS_OFFSET + pair_value * _UPCARDS + upcard]
+
+    def save(self, path=TABLE_PATH):
+        """
+        Writes the table to a file.
+        """
+        with open(path, 'wb') as table_file:
+            table_file.write(_TABLE_MAGIC + bytes([_TABLE_VERSION]) + self.data)
+
+    @classmethod
+    def load(cls, path=TABLE_PATH):
+        """
+        Reads a table from a file.
+
+        Returns:
+        --------
+        StrategyTable: The loaded table.
+        """
+        with open(path, 'rb') as table_file:
+            content = table_file.read()
+        if content[:4] != _TABLE_MAGIC or content[4] != _TABLE_VERSION:
+            raise ValueError(f'{path} is not a strategy table of version {_TABLE_VERSION}')
+        return cls(content[5:])
+
+
+def build_table(rules=CLASSIC):
+    """
+    Solves every player state and returns the decision table.
+
+    Parameters:
+    -----------
+    - rules (RuleSet): The rules of the table. Default is CLASSIC.
+
+    Returns:
+    --------
+    StrategyTable: The table of the best actions.
+    """
+    data = bytearray(StrategyTable._PAIRS_OFFSET + _UPCARDS * _UPCARDS)
+    for upcard in CARD_VALUES:
+        for points in range(4, 22):
+            data[points * _UPCARDS + upcard] = best_action(points, False, upcard, rules=rules)
+        for points in range(12, 22):
+            data[(_TOTALS + points) * _UPCARDS + upcard] = best_action(points, True, upcard, rules=rules)
+        for pair_value in CARD_VALUES:
+            points, soft = (12, True) if pair_value == 11 else (2 * pair_value, False)
+            data[StrategyTable._PAIRS_OFFSET + pair_value * _UPCARDS + upcard] = \
+                best_action(points, soft, upcard, pair_value, rules)
+    return StrategyTable(data)
+
+
+def table_path(rules=CLASSIC):
+    """
+    Returns the path of the table file of a rule set: TABLE_PATH for CLASSIC, a file named after the rule set
+    otherwise.
+    """
+    if rules.name == CLASSIC.name:
+        return TABLE_PATH
+    return os.path.join(os.path.dirname(TABLE_PATH), f'basic_strategy_{rules.name}.bin')
+
+
+def load_table(path=None, rules=CLASSIC):
+    """
+    Loads the table file, building and saving it first if it doesn't exist or is of an older version.
+
+    Parameters:
+    -----------
+    - path (str): The path of the table file. Default is table_path(rules).
+    - rules (RuleSet): The rules the table is built for. Default is CLASSIC.
+
+    Returns:
+    --------
+    StrategyTable: The loaded table.
+    """
+    path = path or table_path(rules)
+    if os.path.exists(path):
+        try:
+            return StrategyTable.load(path)
+        except ValueError:
+            pass  # a table of an older version, solved again below
+    build_table(rules).save(path)
+    return StrategyTable.load(path)
+
+
+class BasicStrategyDecider(Decider):
+    """
+    Decider for the headless engine that follows the basic strategy table.
+
+    When the rules don't allow doubling down or splitting the hand, DOUBLE is played as a hit and pairs by
+    their points.
+
+    Attributes:
+    -----------
+    - table (StrategyTable): The decision table.
+    - bet (int): Fixed bet amount, or None for the table's minimum bet.
+    - dealer (Dealer): The dealer of the table, set when the seat joins the engine.
+    """
+
+    def __init__(self, table=None, bet=None):
+        """
+        Initializes a new basic strategy decider.
+
+        Parameters:
+        -----------
+        - table (StrategyTable): The decision table. Default is the table of the engine's rules,
+          loaded when the seat joins the engine.
+        - bet (int): Fixed bet amount. Default is the table's minimum bet.
+        """
+        self.table = table
+        self.bet = bet
+        self.dealer = None
+
+    def join(self, engine):
+        self.dealer = engine.dealer
+        if self.table is None:
+            self.table = load_table(rules=engine.rules)
+
+    def make_a_bet(self, player):
+        """
+        Returns the fixed bet within the table's bet limits, or all the player's money if it's less.
+        """
+        bet = self.bet if self.bet is not None else player.min_bet
+        return min(max(bet, player.min_bet), player.max_bet, player.player_money)
+
+    def hit_or_stand(self, player):
+        """
+        Returns True if the table says to hit (or to double) against the dealer's face-up card.
+        """
+        points = player.player_points
+        if points >= 21:
+            return False
+        upcard = self.dealer.player_cards[1].points
+        return self.table.action(points, player.is_soft(), upcard) != STAND
+
+    def action(self, player, allowed):
+        """
+        Returns the action of the table for the hand, within the allowed actions.
+        """
+        points = player.player_points
+        if points >= 21:
+            return STAND
+        upcard = self.dealer.player_cards[1].points
+        if SPLIT in allowed:
+            action = self.table.pair_action(player.player_cards[0].points, upcard)
+        else:
+            action = self.table.action(points, player.is_soft(), upcard)
+        if action not in allowed:
+            return HIT
+        return action
+
+
+if __name__ == '__main__':
+    build_table().save()